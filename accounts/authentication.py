@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.fields.files import FieldFile
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from accounts.models import User
+from core.cache import Namespace
+
+cache = Namespace('accounts')
+
+
+# Role profiles loaded together with the user and cached on it
+PROFILE_RELATIONS = ('hotelmanager', 'customer_profile')
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+def load_user(user_id):
+    return User.objects.select_related(*PROFILE_RELATIONS).get(**{api_settings.USER_ID_FIELD: user_id})
+
+
+def row_values(instance, exclude=()):
+    """Column values of a loaded row, file fields by name"""
+    values = {}
+    for field in instance._meta.concrete_fields:
+        if field.attname not in exclude:
+            value = getattr(instance, field.attname)
+            values[field.attname] = value.name if isinstance(value, FieldFile) else value
+    return values
+
+
+def from_row_values(model, db, values):
+    return model.from_db(db, list(values), list(values.values()))
+
+
+def cache_entry(user):
+    """
+    What the cache keeps of a loaded user: the columns and profiles, but not the password
+    hash. The password stays deferred on the rebuilt user (loaded only when something
+    reads it) and the revoke check compares against its md5, as the token does.
+    """
+    profiles = {}
+    for relation in PROFILE_RELATIONS:
+        profile = profile_of(user, relation)
+        profiles[relation] = None if profile is None else row_values(profile)
+    return {
+        'db': user._state.db,
+        'user': row_values(user, exclude=('password',)),
+        'password_md5': get_md5_hash_password(user.password) if api_settings.CHECK_REVOKE_TOKEN else None,
+        'profiles': profiles,
+    }
+
+
+def user_from_entry(entry):
+    user = from_row_values(User, entry['db'], entry['user'])
+    for relation, values in entry['profiles'].items():
+        related = User._meta.get_field(relation)
+        if values is None:
+            related.set_cached_value(user, None)
+        else:
+            setattr(user, relation, from_row_values(related.related_model, entry['db'], values))
+    return user
+
+
+def invalidate_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the user's columns, with their HotelManager/Customer
+    profile, in the cache for AUTH_USER_CACHE_TIMEOUT seconds. Warm requests authenticate
+    without a query; committing a save or delete of the user or a profile drops the entry.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            try:
+                entry = cache_entry(load_user(user_id))
+            except User.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(key, entry, settings.AUTH_USER_CACHE_TIMEOUT)
+        user = user_from_entry(entry)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != entry['password_md5']:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+def profile_of(user, relation):
+    """Profile already attached to the authenticated user, None when the user has none"""
+    if not user.is_authenticated:
+        return None
+    try:
+        return getattr(user, relation)
+    except ObjectDoesNotExist:
+        return None
+
+
+def request_hotel_manager(request):
+    return profile_of(request.user, 'hotelmanager')
+
+
+def request_customer(request):
+    return profile_of(request.user, 'customer_profile')
@@ -0,0 +1,66 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, must_update_salt
+
+
+# Iterations timed during calibration; the result is rounded down to ITERATION_STEP
+CALIBRATION_ITERATIONS = 20000
+ITERATION_STEP = 10000
+
+_calibrated_iterations = None
+_calibration_lock = threading.Lock()
+
+
+def time_pbkdf2(iterations):
+    start = time.perf_counter()
+    hashlib.pbkdf2_hmac('sha256', b'calibration password', b'calibration salt', iterations)
+    return time.perf_counter() - start
+
+
+def measure_iterations(target_ms, rounds=3):
+    """PBKDF2-SHA256 iterations that take about target_ms on this machine"""
+    seconds_per_iteration = min(time_pbkdf2(CALIBRATION_ITERATIONS) for _ in range(rounds)) / CALIBRATION_ITERATIONS
+    iterations = int(target_ms / 1000 / seconds_per_iteration)
+    return max(ITERATION_STEP, iterations // ITERATION_STEP * ITERATION_STEP)
+
+
+def hash_iterations():
+    """
+    PASSWORD_HASH_ITERATIONS when set, otherwise measured once per process against
+    PASSWORD_HASH_TARGET_MS and never below PASSWORD_HASH_MIN_ITERATIONS (Django's
+    default count when unset).
+    """
+    global _calibrated_iterations
+    if settings.PASSWORD_HASH_ITERATIONS:
+        return settings.PASSWORD_HASH_ITERATIONS
+    if _calibrated_iterations is None:
+        with _calibration_lock:
+            if _calibrated_iterations is None:
+                minimum = settings.PASSWORD_HASH_MIN_ITERATIONS or PBKDF2PasswordHasher.iterations
+                _calibrated_iterations = max(minimum, measure_iterations(settings.PASSWORD_HASH_TARGET_MS))
+    return _calibrated_iterations
+
+
+class CalibratedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    pbkdf2_sha256 with the iteration count from hash_iterations().
+    It keeps Django's algorithm name, so existing hashes still verify; those with a
+    lower count are rewritten on the user's next successful login, stronger ones are kept.
+    """
+
+    @property
+    def iterations(self):
+        return hash_iterations()
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        # workers calibrate a little differently, only a real increase is worth a rehash;
+        # a hash with more iterations than the current count is never weakened
+        tolerance = settings.PASSWORD_HASH_REHASH_TOLERANCE * self.iterations
+        return (
+            decoded['iterations'] < self.iterations - tolerance
+            or must_update_salt(decoded['salt'], self.salt_entropy)
+        )
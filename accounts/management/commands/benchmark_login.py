@@ -0,0 +1,64 @@
+import os
+import time
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from accounts.models import User
+
+
+BENCHMARK_EMAIL = 'login-benchmark@example.com'
+BENCHMARK_PASSWORD = 'Benchmark-Pass-1234'
+
+
+class Command(BaseCommand):
+    help = "Measure login throughput per core for the configured password hashing policy"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20, help="Logins timed for each measurement")
+
+    def handle(self, *args, **options):
+        logins = options['logins']
+        hasher = get_hasher()
+        self.stdout.write(f"Hasher: {hasher.algorithm}, iterations: {getattr(hasher, 'iterations', '-')}")
+
+        self.report("check_password, current policy", self.time_hasher(hasher, logins))
+        self.report(
+            f"check_password, Django default PBKDF2 ({PBKDF2PasswordHasher.iterations})",
+            self.time_hasher(PBKDF2PasswordHasher(), logins)
+        )
+
+        # the whole token/login/ request, against a user that is rolled back afterwards
+        with transaction.atomic():
+            User.objects.create_user(email=BENCHMARK_EMAIL, password=BENCHMARK_PASSWORD)
+            self.report("POST token/login/", self.time_logins(logins))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Cores: {os.cpu_count()} (multiply logins/s per core for the whole host)")
+
+    def time_hasher(self, hasher, logins):
+        encoded = hasher.encode(BENCHMARK_PASSWORD, hasher.salt())
+        start = time.perf_counter()
+        for _ in range(logins):
+            hasher.verify(BENCHMARK_PASSWORD, encoded)
+        return (time.perf_counter() - start) / logins
+
+    def time_logins(self, logins):
+        factory = APIRequestFactory()
+        view = TokenObtainPairView.as_view()
+        start = time.perf_counter()
+        for _ in range(logins):
+            request = factory.post(
+                '/auth/token/login/', {'email': BENCHMARK_EMAIL, 'password': BENCHMARK_PASSWORD}, format='json'
+            )
+            response = view(request)
+            if response.status_code != 200:
+                raise CommandError(f"Login failed with {response.status_code}: {response.data}")
+        return (time.perf_counter() - start) / logins
+
+    def report(self, label, seconds):
+        # one process on one thread keeps one core busy
+        self.stdout.write(f"{label}: {seconds * 1000:.1f} ms, {1 / seconds:.1f} logins/s per core")
@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.authentication import invalidate_user
+from accounts.models import User, Customer
+from hotelManager.models import HotelManager
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    # after commit, or a request in between caches the row as it was before
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver([post_save, post_delete], sender=Customer)
+@receiver([post_save, post_delete], sender=HotelManager)
+def profile_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user(user_id))
@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import (
+    CachedJWTAuthentication, cache as user_cache, request_customer, request_hotel_manager, user_cache_key,
+)
+from accounts.models import User
+from hotelManager.models import HotelManager
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='cached@example.com', password='pass1234', name='Cached')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='5656565656')
+        self.token = str(AccessToken.for_user(self.user))
+        self.auth = CachedJWTAuthentication()
+
+    def authenticate(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        user, _ = self.auth.authenticate(request)
+        return user
+
+    def test_warm_request_needs_no_queries(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+            self.assertEqual(user.hotelmanager.pk, self.hotel_manager.pk)
+            with self.assertRaises(User.customer_profile.RelatedObjectDoesNotExist):
+                user.customer_profile
+
+    def test_saving_user_or_profile_refreshes_cache(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hotel_manager.status = 'Accepted'
+            self.hotel_manager.save()
+        self.assertEqual(self.authenticate().hotelmanager.status, 'Accepted')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_cache_is_dropped_after_commit(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hotel_manager.status = 'Accepted'
+            self.hotel_manager.save()
+            # not dropped before the commit, when other requests would refill it with the old row
+            self.assertEqual(self.authenticate().hotelmanager.status, 'Pending')
+        self.assertEqual(self.authenticate().hotelmanager.status, 'Accepted')
+
+    def test_password_hash_is_not_cached(self):
+        self.authenticate()
+        entry = user_cache.get(user_cache_key(self.user.pk))
+        self.assertNotIn(self.user.password, repr(entry))
+
+        user = self.authenticate()
+        self.assertEqual(user.email, 'cached@example.com')
+        # read from the database when something asks for it
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password('pass1234'))
+
+    def test_request_accessors(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        request = APIRequestFactory().get('/')
+        request.user = self.authenticate()
+        self.assertEqual(request_hotel_manager(request), self.hotel_manager)
+        self.assertIsNone(request_customer(request))
+
+        # the reservation list reads the manager from the cached user
+        response = client.get('/reservation-api/all-hotel-reservations/')
+        self.assertEqual(response.status_code, 200)
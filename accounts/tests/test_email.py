@@ -4,8 +4,11 @@ from rest_framework.test import APIClient
 from rest_framework import status
 from unittest.mock import patch
 from django.core import mail
+from django.core.management import call_command
 from datetime import datetime, timedelta
+from io import StringIO
 from accounts.models import User, EmailVerificationCode
+from core.models import OutgoingEmail
 
 class EmailVerificationTests(TestCase):
     def setUp(self):
@@ -41,6 +44,10 @@ class EmailVerificationTests(TestCase):
         response = self.client.post(self.registration_url, self.user_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         
+        # Registration only queues the email, the outbox worker sends it
+        self.assertEqual(len(mail.outbox), 0)
+        call_command('send_queued_email', stdout=StringIO())
+
         # Check that an email was sent
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, 'Your Hotel Reservation Account Verification Code')
@@ -125,7 +132,8 @@ class EmailVerificationTests(TestCase):
         original_verification = EmailVerificationCode.objects.get(user=user)
         original_code = original_verification.code
         
-        # Clear the email outbox
+        # Deliver the registration email, then clear the email outbox
+        call_command('send_queued_email', stdout=StringIO())
         mail.outbox = []
         
         resend_data = {
@@ -133,6 +141,7 @@ class EmailVerificationTests(TestCase):
         }
         response = self.client.post(self.resend_code_url, resend_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        call_command('send_queued_email', stdout=StringIO())
         
         # Check that a new email was sent
         self.assertEqual(len(mail.outbox), 1)
@@ -158,7 +167,8 @@ class EmailVerificationTests(TestCase):
         user.is_active = True
         user.save()
         
-        # Clear the email outbox
+        # Deliver the registration email, then clear the email outbox
+        call_command('send_queued_email', stdout=StringIO())
         mail.outbox = []
         
         # Try to resend the code
@@ -167,6 +177,7 @@ class EmailVerificationTests(TestCase):
         }
         response = self.client.post(self.resend_code_url, resend_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        call_command('send_queued_email', stdout=StringIO())
         
         # Check that no email was sent
         self.assertEqual(len(mail.outbox), 0)
@@ -200,15 +211,19 @@ class EmailVerificationTests(TestCase):
         response = self.client.post(self.verify_email_url, verification_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
-    @patch('django.core.mail.EmailMessage.send')
+    @patch('django.core.mail.backends.locmem.EmailBackend.send_messages')
     def test_email_sending_failure(self, mock_send):
         # Make the email sending fail
         mock_send.side_effect = Exception("Failed to send email")
         
-        # Try to register
-        with self.assertRaises(Exception):
-            response = self.client.post(self.registration_url, self.user_data, format='json')
-            
-        # Check that no user was created (due to transaction.atomic)
-        self.assertEqual(User.objects.count(), 0)
-        self.assertEqual(EmailVerificationCode.objects.count(), 0)
\ No newline at end of file
+        # Registration does not wait for SMTP, so it still succeeds
+        response = self.client.post(self.registration_url, self.user_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(User.objects.count(), 1)
+        
+        # The worker keeps the message in the outbox for a retry
+        call_command('send_queued_email', stdout=StringIO())
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.Status.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn("Failed to send email", email.last_error)
\ No newline at end of file
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts import hashers
+from accounts.models import User
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=20000)
+class CalibratedPasswordHasherTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='hasher@example.com', password='StrongPass123!')
+
+    def iterations(self):
+        self.user.refresh_from_db()
+        return int(self.user.password.split('$')[1])
+
+    def login(self):
+        return APIClient().post('/auth/token/login/', {'email': self.user.email, 'password': 'StrongPass123!'})
+
+    def test_new_passwords_use_policy_iterations(self):
+        self.assertEqual(self.iterations(), 20000)
+
+    def test_old_hash_is_rehashed_on_login(self):
+        # e.g. a password stored with Django's default count
+        self.user.password = PBKDF2PasswordHasher().encode('StrongPass123!', 'saltsaltsaltsalt', iterations=1000)
+        self.user.save(update_fields=['password'])
+
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.iterations(), 20000)
+
+    def test_close_iteration_count_is_kept(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=22000):
+            self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.iterations(), 20000)
+
+    def test_stronger_hash_is_not_rehashed_down(self):
+        # Django's default count, well above the policy
+        hasher = PBKDF2PasswordHasher()
+        self.user.password = hasher.encode('StrongPass123!', hasher.salt(), iterations=720000)
+        self.user.save(update_fields=['password'])
+
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.iterations(), 720000)
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=0, PASSWORD_HASH_MIN_ITERATIONS=0)
+    def test_calibration_defaults_to_django_minimum(self):
+        with mock.patch.object(hashers, '_calibrated_iterations', None), \
+                mock.patch.object(hashers, 'measure_iterations', return_value=300000):
+            self.assertEqual(hashers.hash_iterations(), PBKDF2PasswordHasher.iterations)
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=0, PASSWORD_HASH_MIN_ITERATIONS=50000)
+    def test_calibration_runs_once_and_respects_minimum(self):
+        with mock.patch.object(hashers, '_calibrated_iterations', None), \
+                mock.patch.object(hashers, 'measure_iterations', return_value=30000) as measure:
+            self.assertEqual(hashers.hash_iterations(), 50000)
+            self.assertEqual(hashers.hash_iterations(), 50000)
+        measure.assert_called_once()
+
+    def test_measured_iterations_are_rounded(self):
+        with mock.patch.object(hashers, 'time_pbkdf2', return_value=0.01):
+            # 20000 iterations in 10 ms -> 2 per microsecond
+            self.assertEqual(hashers.measure_iterations(25), 50000)
+            self.assertEqual(hashers.measure_iterations(1), hashers.ITERATION_STEP)
@@ -1,6 +1,6 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView, TokenObtainPairView
-from .views import UserViewSet, AuthViewSet, FavoriteHotelsViewSet
+from rest_framework_simplejwt.views import TokenRefreshView
+from .views import UserViewSet, AuthViewSet, FavoriteHotelsViewSet, TokenLoginView
 
 urlpatterns = [
     # Auth endpoints
@@ -12,7 +12,7 @@ urlpatterns = [
 
     # JWT token endpoints
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('token/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/login/', TokenLoginView.as_view(), name='token_obtain_pair'),
 
     # User profile endpoints
     path('users/profile/', UserViewSet.as_view({'get': 'profile', 'put': 'update_profile'}), name='user_profile'),
@@ -1,4 +1,4 @@
-from django.core.mail import EmailMessage
+from core.mail import queue_email
 
 def send_verification_email(user, verification):
     # Send verification email
@@ -18,5 +18,5 @@ def send_verification_email(user, verification):
             Best regards,
             Hotel Reservation Team
             """
-    email = EmailMessage(mail_subject, message, to=[user.email])
-    email.send()
\ No newline at end of file
+    # Delivered by the send_queued_email worker once the caller's transaction commits
+    queue_email(mail_subject, message, [user.email])
\ No newline at end of file
@@ -3,24 +3,35 @@ from rest_framework import status, permissions, viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import UserSerializer
 from .models import EmailVerificationCode, User
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .utils import send_verification_email
-from django.core.cache import cache
-from django.core.mail import send_mail
-from django.conf import settings
+from core.cache import Namespace
+from core.mail import queue_email
+from core.throttling import ScopedCacheRateThrottle
 from django.shortcuts import get_object_or_404
 import random
 from hotel.models import Hotel
 from hotel.serializers import HotelSerializer
 
+cache = Namespace('accounts')
+
 
 class AuthViewSet(viewsets.ViewSet):
     """
     A viewset for handling authentication related actions.
     """
+    throttle_classes = [ScopedCacheRateThrottle]
+    throttle_scopes = {
+        'login': 'login',
+        'verify_email': 'verify_email',
+        'resend_verification_code': 'send_code',
+        'forgot_password': 'send_code',
+        'reset_password': 'verify_email',
+    }
 
     @swagger_auto_schema(
         request_body=UserSerializer,
@@ -177,14 +188,12 @@ class AuthViewSet(viewsets.ViewSet):
         # Store in cache with 10-minute expiration (600 seconds)
         cache.set(f'password_reset_{email}', verification_code, timeout=600)
         
-        # Send email with verification code
+        # Queue email with verification code
         try:
-            send_mail(
+            queue_email(
                 'Password Reset Verification Code',
                 f'Your verification code is: {verification_code}',
-                settings.DEFAULT_FROM_EMAIL,
                 [email],
-                fail_silently=False,
             )
             return Response({'message': 'Verification code sent to email'}, status=status.HTTP_200_OK)
         except Exception as e:
@@ -346,7 +355,7 @@ class FavoriteHotelsViewSet(viewsets.ViewSet):
     )
     @action(detail=False, methods=['get'], url_path='list')
     def get_favorites(self, request):
-        favorite_hotels = request.user.favorite_hotels.filter(status="Accepted").select_related('hotel_manager').prefetch_related('facilities', 'rooms')
+        favorite_hotels = request.user.favorite_hotels.filter(status="Accepted").select_related('hotel_manager').prefetch_related('rooms')
         
         if not favorite_hotels.exists():
             return Response({'message': 'No favorite hotels found'}, status=status.HTTP_404_NOT_FOUND)
@@ -448,4 +457,10 @@ class FavoriteHotelsViewSet(viewsets.ViewSet):
         
         return Response({
             'message': 'All favorite hotels cleared successfully'
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+
+class TokenLoginView(TokenObtainPairView):
+    """TokenObtainPairView sharing the login rate limit"""
+    throttle_classes = [ScopedCacheRateThrottle]
+    throttle_scope = 'login'
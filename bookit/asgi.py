@@ -14,3 +14,13 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bookit.settings')
 
 application = get_asgi_application()
+
+# Load reference data (facilities, ...) before the worker takes its first request
+from core.reference_data import warm_up  # noqa: E402
+
+warm_up()
+
+# Calibrate password hashing now rather than during the first login
+from accounts.hashers import hash_iterations  # noqa: E402
+
+hash_iterations()
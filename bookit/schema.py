@@ -1,8 +1,11 @@
 import graphene
 from accounts.schema import RegisterCustomer, VerifyEmail
-from hotel.schema import CreateHotel
+from hotel.schema import CreateHotel, HotelQuery
+from room.schema import RoomQuery
+from reservation.schema import ReservationQuery
+from review.schema import ReviewQuery
 
-class Query(graphene.ObjectType):
+class Query(HotelQuery, RoomQuery, ReservationQuery, ReviewQuery, graphene.ObjectType):
     hello = graphene.String(default_value="Hello, GraphQL!")
 
 class Mutation(graphene.ObjectType):
@@ -9,7 +9,9 @@ https://docs.djangoproject.com/en/5.0/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
+import importlib.util
 import os
+import sys
 from pathlib import Path
 import dj_database_url
 from decouple import config, Csv
@@ -28,7 +30,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv("SECRET_KEY")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = os.getenv("DEBUG", default=0)
+DEBUG = config('DEBUG', default=False, cast=bool)
+
+# Running under manage.py test or pytest
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
 
 ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS").split(",")
 
@@ -46,6 +51,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Third party
     'rest_framework',
@@ -56,6 +62,7 @@ INSTALLED_APPS = [
     'graphene_django',
     
     # Local
+    'core',
     'accounts',
     'hotel',
     'hotelManager',
@@ -68,17 +75,45 @@ GRAPHENE = {
     "SCHEMA": "bookit.schema.schema",
 }
 
+# Static GraphQL cost limits (core.query_cost), checked before a query runs
+GRAPHQL_MAX_DEPTH = config('GRAPHQL_MAX_DEPTH', default=7, cast=int)
+# Items a list field returns without a `first` argument, and the most `first` can ask for
+GRAPHQL_DEFAULT_LIST_SIZE = config('GRAPHQL_DEFAULT_LIST_SIZE', default=10, cast=int)
+GRAPHQL_MAX_LIST_SIZE = config('GRAPHQL_MAX_LIST_SIZE', default=100, cast=int)
+# Weight of one object of a type; other object types weigh 1 and scalars 0
+GRAPHQL_TYPE_COSTS = {
+    'FacilityType': 0,
+    'ReservationType': 2,
+}
+GRAPHQL_COST_BUDGETS = {
+    'anonymous': config('GRAPHQL_BUDGET_ANONYMOUS', default=2000, cast=int),
+    'Customer': config('GRAPHQL_BUDGET_CUSTOMER', default=5000, cast=int),
+    'HotelManager': config('GRAPHQL_BUDGET_HOTEL_MANAGER', default=10000, cast=int),
+    'Admin': config('GRAPHQL_BUDGET_ADMIN', default=50000, cast=int),
+}
+# Parsed and validated persisted query documents kept per process
+GRAPHQL_PERSISTED_CACHE_SIZE = config('GRAPHQL_PERSISTED_CACHE_SIZE', default=512, cast=int)
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db_router.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Response compression (core.compression): bodies of at least COMPRESSION_MIN_SIZE bytes,
+# brotli when the package is installed and the client accepts it, gzip otherwise.
+# Levels suit dynamic responses, where the time to compress counts as much as the size.
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+
 ROOT_URLCONF = 'bookit.urls'
 
 TEMPLATES = [
@@ -100,12 +135,56 @@ TEMPLATES = [
 WSGI_APPLICATION = 'bookit.wsgi.application'
 
 # Database
+# Connections are kept open for DATABASE_CONN_MAX_AGE seconds (0 closes them after every
+# request, None never does) and checked before reuse, so a worker does not pay the
+# Postgres connection setup on each request nor fail on a connection the server dropped.
+# Under ASGI each request runs its ORM calls on a thread of its own, so connections
+# would pile up instead of being reused; that mode defaults to closing them.
+_asgi = config('GUNICORN_MODE', default='wsgi').lower() == 'asgi'
 DATABASES = {
     'default': dj_database_url.config(
-        default=config('DATABASE_URL')
+        default=config('DATABASE_URL'),
+        conn_max_age=config('DATABASE_CONN_MAX_AGE', default=0 if _asgi else 60, cast=int),
+        conn_health_checks=config('DATABASE_CONN_HEALTH_CHECKS', default=True, cast=bool),
     )
 }
 
+# Optional read replica for catalog and report reads (core.db_router). Views opt in with
+# ReplicaReadMixin.replica_actions or read_from_replica; writes, row locks and migrations
+# stay on the primary, and a user who wrote is pinned to it for
+# DATABASE_REPLICA_PIN_SECONDS so they read their own writes despite replication lag.
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+DATABASE_REPLICA = 'replica' if DATABASE_REPLICA_URL else None
+DATABASE_REPLICA_PIN_SECONDS = config('DATABASE_REPLICA_PIN_SECONDS', default=5, cast=int)
+if DATABASE_REPLICA:
+    DATABASES[DATABASE_REPLICA] = dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=DATABASES['default']['CONN_MAX_AGE'],
+        conn_health_checks=DATABASES['default']['CONN_HEALTH_CHECKS'],
+    )
+    # tests run against the primary's test database
+    DATABASES[DATABASE_REPLICA]['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+# Optional connection pool (psycopg 3 with Django 5.1+, replaces persistent connections).
+# Its size is the server's connection allowance split between the gunicorn workers, so
+# every worker of every host fits in DATABASE_MAX_CONNECTIONS.
+DATABASE_POOL = config('DATABASE_POOL', default=False, cast=bool)
+if DATABASE_POOL:
+    import django
+    from django.core.exceptions import ImproperlyConfigured
+
+    if django.VERSION < (5, 1) or DATABASES['default']['ENGINE'] != 'django.db.backends.postgresql':
+        raise ImproperlyConfigured("DATABASE_POOL needs Django 5.1+ with psycopg 3 on PostgreSQL")
+    _pool_workers = config('GUNICORN_WORKERS', default=os.cpu_count() * 2 + 1, cast=int)
+    _pool_hosts = config('DATABASE_POOL_HOSTS', default=1, cast=int)
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': config('DATABASE_POOL_MIN_SIZE', default=1, cast=int),
+        'max_size': max(1, config('DATABASE_MAX_CONNECTIONS', default=100, cast=int) // (_pool_workers * _pool_hosts)),
+        'timeout': config('DATABASE_POOL_TIMEOUT', default=10, cast=int),
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -124,6 +203,43 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing policy: 'pbkdf2' (calibrated), 'argon2' (needs argon2-cffi) or 'bcrypt' (needs bcrypt).
+# Hashes made with another algorithm still verify and are rehashed on the next login.
+PASSWORD_HASH_ALGORITHM = config('PASSWORD_HASH_ALGORITHM', default='pbkdf2')
+# Fixed PBKDF2 iteration count; 0 measures it at startup to take PASSWORD_HASH_TARGET_MS per hash
+PASSWORD_HASH_ITERATIONS = config('PASSWORD_HASH_ITERATIONS', default=0, cast=int)
+PASSWORD_HASH_TARGET_MS = config('PASSWORD_HASH_TARGET_MS', default=100, cast=int)
+# Floor for the measured count; 0 uses Django's default PBKDF2 count
+PASSWORD_HASH_MIN_ITERATIONS = config('PASSWORD_HASH_MIN_ITERATIONS', default=0, cast=int)
+# Stored counts within this fraction below the current one are not rehashed, higher ones never are
+PASSWORD_HASH_REHASH_TOLERANCE = config('PASSWORD_HASH_REHASH_TOLERANCE', default=0.25, cast=float)
+
+# Hasher of each algorithm and the module it needs (argon2-cffi and bcrypt are in requirements.txt)
+_PASSWORD_HASHERS = {
+    'pbkdf2': ('accounts.hashers.CalibratedPBKDF2PasswordHasher', None),
+    'argon2': ('django.contrib.auth.hashers.Argon2PasswordHasher', 'argon2'),
+    'bcrypt': ('django.contrib.auth.hashers.BCryptSHA256PasswordHasher', 'bcrypt'),
+}
+_PASSWORD_HASHERS_AVAILABLE = {
+    name: hasher for name, (hasher, module) in _PASSWORD_HASHERS.items()
+    if module is None or importlib.util.find_spec(module) is not None
+}
+if PASSWORD_HASH_ALGORITHM not in _PASSWORD_HASHERS_AVAILABLE:
+    from django.core.exceptions import ImproperlyConfigured
+
+    if PASSWORD_HASH_ALGORITHM not in _PASSWORD_HASHERS:
+        raise ImproperlyConfigured(
+            f"PASSWORD_HASH_ALGORITHM must be one of {', '.join(_PASSWORD_HASHERS)}, not {PASSWORD_HASH_ALGORITHM!r}"
+        )
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASH_ALGORITHM {PASSWORD_HASH_ALGORITHM!r} needs the "
+        f"{_PASSWORD_HASHERS[PASSWORD_HASH_ALGORITHM][1]} module, which is not installed"
+    )
+# The others, where installed, still verify old hashes
+PASSWORD_HASHERS = [_PASSWORD_HASHERS_AVAILABLE[PASSWORD_HASH_ALGORITHM]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS_AVAILABLE.items() if name != PASSWORD_HASH_ALGORITHM
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -144,20 +260,65 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# With nginx in front (the default outside DEBUG and tests), public media is served by
+# nginx and the private files that reach Django are only access checked and handed back
+# with X-Accel-Redirect (see nginx.conf). Set it off where nothing serves /protected-media/.
+MEDIA_ACCEL_REDIRECT = config('MEDIA_ACCEL_REDIRECT', default=not (DEBUG or TESTING), cast=bool)
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Resumable chunked uploads for hotel licenses and verification files
+CHUNKED_UPLOAD_DIR = config('CHUNKED_UPLOAD_DIR', default=os.path.join(BASE_DIR, 'chunked_uploads'))
+CHUNKED_UPLOAD_CHUNK_SIZE = config('CHUNKED_UPLOAD_CHUNK_SIZE', default=5 * 1024 * 1024, cast=int)
+CHUNKED_UPLOAD_MAX_SIZE = config('CHUNKED_UPLOAD_MAX_SIZE', default=50 * 1024 * 1024, cast=int)
+
+# Resized WebP/JPEG copies of uploaded hotel and room images
+IMAGE_PIPELINE_ASYNC = config('IMAGE_PIPELINE_ASYNC', default=True, cast=bool)
+IMAGE_PIPELINE_WORKERS = config('IMAGE_PIPELINE_WORKERS', default=2, cast=int)
+# The build_image_derivatives --loop worker checks every INTERVAL seconds for images
+# saved more than DELAY seconds ago that still have no derivatives (jobs a restart lost)
+IMAGE_PIPELINE_BACKFILL_INTERVAL = config('IMAGE_PIPELINE_BACKFILL_INTERVAL', default=60, cast=int)
+IMAGE_PIPELINE_BACKFILL_DELAY = config('IMAGE_PIPELINE_BACKFILL_DELAY', default=300, cast=int)
+
 # CORS settings
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # This makes endpoints public by default
     ],
+    # Scopes used by core.throttling.ScopedCacheRateThrottle (per user, or per IP when anonymous)
+    'DEFAULT_THROTTLE_RATES': {
+        'login': config('THROTTLE_LOGIN', default='10/min'),
+        'verify_email': config('THROTTLE_VERIFY_EMAIL', default='10/hour'),
+        'send_code': config('THROTTLE_SEND_CODE', default='5/hour'),
+        'room_search': config('THROTTLE_ROOM_SEARCH', default='60/min'),
+        'room_lock': config('THROTTLE_ROOM_LOCK', default='10/min'),
+    },
+    # Proxies in front that append to X-Forwarded-For. 0 trusts only the socket address;
+    # set it to 1 where the app is reachable through nginx alone (docker-compose.yaml),
+    # anything higher lets clients pick the address they are throttled by.
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
+# orjson renders and parses API JSON several times faster than the json module
+# (manage.py benchmark_json); without it, or with FAST_JSON=False, DRF's classes are used
+FAST_JSON = config('FAST_JSON', default=True, cast=bool) and importlib.util.find_spec('orjson') is not None
+if FAST_JSON:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = [
+        'core.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ]
+
 # For development
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -180,6 +341,59 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Cache
+# 'shared' is the store every worker sees: Redis in production (CACHE_BACKEND=redis,
+# CACHE_LOCATION=redis://host:6379/0), a directory for single-host deployments (file,
+# whose add/incr are not atomic across processes) and process memory in tests (locmem,
+# whatever the environment says, so throttle counters and pins never leak between runs).
+# Bumping CACHE_VERSION drops every entry written before, e.g. after a deploy.
+CACHE_BACKEND = 'locmem' if TESTING else config('CACHE_BACKEND', default='file')
+_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'bookit'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(BASE_DIR, '.cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://localhost:6379/0'),
+}
+CACHES = {
+    'shared': {
+        'BACKEND': _CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default=_CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'KEY_PREFIX': 'bookit',
+        'VERSION': config('CACHE_VERSION', default=1, cast=int),
+        'TIMEOUT': 300,
+    },
+    # the `cache` of the code: shared entries only, so password reset codes, cooldowns and
+    # throttles are the same for every worker; counts hits and misses (manage.py cache_stats)
+    'default': {
+        'BACKEND': 'core.cache.TieredCache',
+        'LOCATION': 'default',
+        'OPTIONS': {'L2': 'shared', 'L1_MAX_ENTRIES': 0},
+    },
+    # read-mostly data that may be CACHE_L1_TIMEOUT seconds stale: up to
+    # CACHE_L1_MAX_ENTRIES entries are also kept in each worker's memory (none in tests,
+    # which clear the cache between cases and would otherwise see each other's entries)
+    'tiered': {
+        'BACKEND': 'core.cache.TieredCache',
+        'LOCATION': 'tiered',
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_MAX_ENTRIES': config('CACHE_L1_MAX_ENTRIES', default=0 if TESTING else 1000, cast=int),
+            'L1_TIMEOUT': config('CACHE_L1_TIMEOUT', default=5, cast=int),
+        },
+    },
+}
+
+# Seconds expensive reads are served from the tiered cache (core.cache.remember): hotel
+# details and review stats (also dropped when the hotel, its rooms or reviews change),
+# room availability searches and hotel manager reports
+HOTEL_CACHE_TIMEOUT = config('HOTEL_CACHE_TIMEOUT', default=300, cast=int)
+ROOM_SEARCH_CACHE_TIMEOUT = config('ROOM_SEARCH_CACHE_TIMEOUT', default=30, cast=int)
+REPORT_CACHE_TIMEOUT = config('REPORT_CACHE_TIMEOUT', default=60, cast=int)
+
+# Seconds an authenticated user (with role profile) stays in the cache
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=300, cast=int)
+# Seconds the ids of a manager's hotels are shared between requests
+OWNED_HOTELS_CACHE_TIMEOUT = config('OWNED_HOTELS_CACHE_TIMEOUT', default=60, cast=int)
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
 EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
@@ -187,6 +401,18 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 
+# Outbox worker (python manage.py send_queued_email --loop)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=100, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+EMAIL_OUTBOX_RETRY_DELAY = 60         # seconds, doubled after every failed attempt
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 3600
+EMAIL_OUTBOX_LEASE = 300              # a claimed message is retried if its worker dies
+
+# Bulk notification jobs (sent by the outbox worker): messages per send_messages() call
+# and batches in flight at once, each thread over its own connection
+BULK_EMAIL_BATCH_SIZE = config('BULK_EMAIL_BATCH_SIZE', default=100, cast=int)
+BULK_EMAIL_CONCURRENCY = config('BULK_EMAIL_CONCURRENCY', default=4, cast=int)
+
 
 #
 
@@ -196,6 +422,11 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 
 SERVER_URL = config('SERVER_URL', default='127.0.0.1') 
 
+# In-process hotel search index, persisted so new workers skip the full rebuild
+HOTEL_SEARCH_INDEX_PATH = config(
+    'HOTEL_SEARCH_INDEX_PATH', default=os.path.join(BASE_DIR, 'search_index', 'hotels.idx')
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
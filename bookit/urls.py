@@ -2,14 +2,16 @@
 Set the urls for each app and then do this:
     1. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
-from graphene_file_upload.django import FileUploadGraphQLView
+from core.views import PRIVATE_MEDIA, CostLimitedGraphQLView, media
 
 # Swagger Schema View
 schema_view = get_schema_view(
@@ -24,6 +26,10 @@ schema_view = get_schema_view(
     permission_classes=[permissions.AllowAny],
 )
 
+# Behind nginx (MEDIA_ACCEL_REDIRECT) public media never reaches Django,
+# so only the access checked prefixes are routed to the media view
+media_prefixes = '|'.join(map(re.escape, PRIVATE_MEDIA)) if settings.MEDIA_ACCEL_REDIRECT else ''
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('accounts.urls')),
@@ -32,9 +38,13 @@ urlpatterns = [
     path('room-api/', include('room.urls')),
     path('reservation-api/', include('reservation.urls')),
     path('reviews/', include('review.urls')),
+    path('upload-api/', include('core.urls')),
 
     path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-    path("graphql/", FileUploadGraphQLView.as_view(graphiql=True)),
-] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT) + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    path("graphql/", CostLimitedGraphQLView.as_view(graphiql=True)),
+
+    # Access checked media, delivered by nginx through X-Accel-Redirect
+    re_path(r'^%s(?P<path>(?:%s).+)$' % (settings.MEDIA_URL.lstrip('/'), media_prefixes), media, name='media'),
+] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
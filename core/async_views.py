@@ -0,0 +1,65 @@
+from functools import wraps
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.utils.encoders import JSONEncoder
+
+from accounts.authentication import CachedJWTAuthentication
+from core.throttling import ScopedCacheRateThrottle
+
+
+def json_response(body, status_code=status.HTTP_200_OK, headers=None):
+    # DRF's encoder, so decimals and dates render as they do in the sync API
+    return JsonResponse(body, status=status_code, headers=headers, encoder=JSONEncoder, safe=False)
+
+
+@sync_to_async
+def authenticate(request):
+    result = CachedJWTAuthentication().authenticate(request)
+    return result[0] if result else AnonymousUser()
+
+
+@sync_to_async
+def throttle_wait(request, scope):
+    """None when the request is allowed, otherwise the seconds to wait"""
+    throttle = ScopedCacheRateThrottle()
+    if throttle.allow_request(request, SimpleNamespace(throttle_scope=scope)):
+        return None
+    return throttle.wait()
+
+
+def async_api_view(methods, authenticated=True, throttle_scope=None):
+    """
+    Async counterpart of DRF's api_view for I/O bound read endpoints served under ASGI.
+    Authentication (JWT only, so no CSRF token is involved) and throttling reuse the
+    DRF classes, mostly answered from the cache; the view awaits the async ORM and
+    returns (body, status), rendered as JSON.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return json_response({'error': f'Method "{request.method}" not allowed.'},
+                                     status.HTTP_405_METHOD_NOT_ALLOWED)
+            try:
+                request.user = await authenticate(request)
+            except exceptions.APIException as e:
+                return json_response({'detail': e.detail}, e.status_code)
+            if authenticated and not request.user.is_authenticated:
+                return json_response({'detail': 'Authentication credentials were not provided.'},
+                                     status.HTTP_401_UNAUTHORIZED)
+            if throttle_scope:
+                wait = await throttle_wait(request, throttle_scope)
+                if wait is not None:
+                    return json_response({'detail': 'Request was throttled.'}, status.HTTP_429_TOO_MANY_REQUESTS,
+                                         headers={'Retry-After': str(wait)})
+
+            body, status_code = await view(request, *args, **kwargs)
+            return json_response(body, status_code)
+        return wrapper
+    return decorator
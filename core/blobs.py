@@ -0,0 +1,86 @@
+from django.db.models import F
+from django.db.models.signals import post_init, post_save, post_delete
+from django.utils import timezone
+
+from core.models import MediaBlob
+from core.storage import BLOB_DIR, blob_storage
+
+
+# (model, field name) pairs whose files live in blob_storage
+_tracked_fields = []
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(f'{BLOB_DIR}/')
+
+
+def add_reference(name):
+    if not is_blob(name):
+        return
+    updated = MediaBlob.objects.filter(name=name).update(
+        ref_count=F('ref_count') + 1, modify_datetime=timezone.now()
+    )
+    if not updated:
+        size = blob_storage.size(name) if blob_storage.exists(name) else 0
+        blob, created = MediaBlob.objects.get_or_create(name=name, defaults={'ref_count': 1, 'size': size})
+        if not created:
+            MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+
+def remove_reference(name):
+    if not is_blob(name):
+        return
+    MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') - 1, modify_datetime=timezone.now())
+
+
+def track_blob_references(model, *field_names):
+    """Keep MediaBlob.ref_count in sync with the given file fields of model"""
+    for field_name in field_names:
+        _tracked_fields.append((model, field_name))
+
+    attr = '_blob_names'
+
+    def remember(sender, instance, **kwargs):
+        # Skip deferred fields, reading them would cost a query per instance
+        setattr(instance, attr, {
+            name: getattr(instance, name).name
+            for name in field_names
+            if name in instance.__dict__
+        })
+
+    def saved(sender, instance, **kwargs):
+        previous = getattr(instance, attr, {})
+        for name in field_names:
+            if name not in instance.__dict__:
+                continue
+            current = getattr(instance, name).name
+            old = previous.get(name)
+            if current != old:
+                add_reference(current)
+                remove_reference(old)
+            previous[name] = current
+        setattr(instance, attr, previous)
+
+    def deleted(sender, instance, **kwargs):
+        for name, current in getattr(instance, attr, {}).items():
+            remove_reference(current)
+
+    post_init.connect(remember, sender=model, weak=False)
+    post_save.connect(saved, sender=model, weak=False)
+    post_delete.connect(deleted, sender=model, weak=False)
+
+
+def tracked_fields():
+    return list(_tracked_fields)
+
+
+def count_references():
+    """name -> number of rows referencing it, computed from the tracked columns"""
+    counts = {}
+    for model, field_name in _tracked_fields:
+        names = model._base_manager.filter(**{f'{field_name}__startswith': f'{BLOB_DIR}/'}).values_list(
+            field_name, flat=True
+        )
+        for name in names:
+            counts[name] = counts.get(name, 0) + 1
+    return counts
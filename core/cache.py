@@ -0,0 +1,305 @@
+import math
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_missing = object()
+
+STATS_KEY = 'cache_stats:{name}:{event}'
+STATS_EVENTS = ('l1_hits', 'l2_hits', 'misses')
+# outcomes of remember(): values computed on a miss or refreshed early, readers that got the
+# value another worker was computing, readers that kept the old value during a refresh and
+# readers that computed themselves because the worker holding the lock was too slow
+REMEMBER_EVENTS = ('computed', 'refreshed_early', 'stampedes_avoided', 'served_while_refreshing', 'lock_timeouts')
+
+
+class CacheStats:
+    """
+    Hit/miss counters of one process, added to totals in the shared cache every
+    flush_every events so `manage.py cache_stats` sees every worker.
+    """
+
+    def __init__(self, name, events=STATS_EVENTS, flush_every=100):
+        self.events = events
+        self.keys = {event: STATS_KEY.format(name=name, event=event) for event in events}
+        self.flush_every = flush_every
+        self.local = dict.fromkeys(events, 0)
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def record(self, event, shared):
+        with self.lock:
+            self.local[event] += 1
+            self.pending += 1
+            if self.pending < self.flush_every:
+                return
+            counts, self.local, self.pending = self.local, dict.fromkeys(self.events, 0), 0
+        self.flush(counts, shared)
+
+    def flush(self, counts, shared):
+        for event, count in counts.items():
+            if not count:
+                continue
+            key = self.keys[event]
+            shared.add(key, 0, timeout=None)
+            try:
+                shared.incr(key, count)
+            except ValueError:
+                # evicted between add() and incr()
+                shared.add(key, count, timeout=None)
+
+    def totals(self, shared):
+        """Shared totals plus what this process has not flushed yet"""
+        totals = shared.get_many(list(self.keys.values()))
+        with self.lock:
+            return {event: totals.get(key, 0) + self.local[event] for event, key in self.keys.items()}
+
+    def reset(self, shared):
+        with self.lock:
+            self.local, self.pending = dict.fromkeys(self.events, 0), 0
+        shared.delete_many(list(self.keys.values()))
+
+
+class TieredCache(BaseCache):
+    """
+    Bounded in-process LRU (L1) in front of a shared cache (L2, the OPTIONS['L2'] alias).
+    L1 entries live at most L1_TIMEOUT seconds, since a change made by another worker
+    only reaches this one through L2; misses are never kept in L1. With L1_MAX_ENTRIES 0
+    the backend only passes through to L2 and counts hits and misses.
+    add/incr/decr always go to L2, so they stay atomic across workers.
+    """
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__(params)
+        self.l2_alias = options.get('L2', 'shared')
+        self.l1_max_entries = options.get('L1_MAX_ENTRIES', 1000)
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.l1 = OrderedDict()
+        self.l1_lock = threading.Lock()
+        # LOCATION names the cache in the shared stats
+        self.stats = CacheStats(location or 'default', flush_every=options.get('STATS_FLUSH_EVERY', 100))
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    # L1
+
+    def l1_get(self, key):
+        if not self.l1_max_entries:
+            return _missing
+        with self.l1_lock:
+            entry = self.l1.get(key)
+            if entry is None:
+                return _missing
+            expires_at, pickled = entry
+            if expires_at <= time.monotonic():
+                del self.l1[key]
+                return _missing
+            self.l1.move_to_end(key)
+        # each caller gets its own copy, as from L2
+        return pickle.loads(pickled)
+
+    def l1_set(self, key, value, timeout):
+        if not self.l1_max_entries:
+            return
+        timeout = self.l1_timeout if timeout in (DEFAULT_TIMEOUT, None) else min(timeout, self.l1_timeout)
+        if timeout <= 0:
+            self.l1_delete(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.l1_lock:
+            self.l1[key] = (time.monotonic() + timeout, pickled)
+            self.l1.move_to_end(key)
+            while len(self.l1) > self.l1_max_entries:
+                self.l1.popitem(last=False)
+
+    def l1_delete(self, key):
+        with self.l1_lock:
+            self.l1.pop(key, None)
+
+    # cache API; keys are passed to L2 as given, which applies the prefix and version
+
+    def get(self, key, default=None, version=None):
+        l1_key = (key, version)
+        value = self.l1_get(l1_key)
+        if value is not _missing:
+            self.stats.record('l1_hits', self.l2)
+            return value
+        value = self.l2.get(key, _missing, version=version)
+        if value is _missing:
+            self.stats.record('misses', self.l2)
+            return default
+        self.stats.record('l2_hits', self.l2)
+        self.l1_set(l1_key, value, DEFAULT_TIMEOUT)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version=version)
+        self.l1_set((key, version), value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version=version)
+        if added:
+            self.l1_set((key, version), value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.l1_delete((key, version))
+        return self.l2.delete(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.l1_delete((key, version))
+        return self.l2.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self.l1_delete((key, version))
+        return self.l2.decr(key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _missing, version=version) is not _missing
+
+    def clear(self):
+        with self.l1_lock:
+            self.l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+
+class Namespace:
+    """
+    Cache keys of one app, '<name>:v<version>:<key>'. Bump version when the format of
+    the cached values changes, so a deploy never reads entries written by older code.
+    The whole cache is versioned by CACHE_VERSION on top of this.
+    """
+
+    def __init__(self, name, version=1, alias='default'):
+        self.name = name
+        self.version = version
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, key):
+        return f'{self.name}:v{self.version}:{key}'
+
+    def get(self, key, default=None):
+        return self.cache.get(self.key(key), default)
+
+    def get_many(self, keys):
+        found = self.cache.get_many([self.key(key) for key in keys])
+        return {key: found[self.key(key)] for key in keys if self.key(key) in found}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.cache.set(self.key(key), value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT):
+        return self.cache.add(self.key(key), value, timeout)
+
+    def delete(self, key):
+        return self.cache.delete(self.key(key))
+
+    def incr(self, key, delta=1):
+        return self.cache.incr(self.key(key), delta)
+
+    def decr(self, key, delta=1):
+        return self.cache.decr(self.key(key), delta)
+
+    def generation(self, key):
+        """Current generation of key, to build keys of entries that bump(key) invalidates together"""
+        return self.get(f'generation:{key}', 0)
+
+    def bump(self, key):
+        # entries keyed with the old generation are never read again and expire
+        if not self.add(f'generation:{key}', 1, timeout=None):
+            try:
+                self.incr(f'generation:{key}')
+            except ValueError:
+                self.set(f'generation:{key}', 1, timeout=None)
+
+    def remember(self, key, compute, timeout, **kwargs):
+        return remember(self.cache, self.key(key), compute, timeout, **kwargs)
+
+
+remember_stats = CacheStats('remember', events=REMEMBER_EVENTS)
+
+
+def stats_store(cache):
+    # counters go to the shared cache itself, bypassing L1 and the hit counts
+    return getattr(cache, 'l2', cache)
+
+
+def remember(cache, key, compute, timeout, beta=1.0, lock_timeout=10, lock_wait=2.0, poll_interval=0.05):
+    """
+    Value of key, computed with compute() and kept for timeout seconds, without a stampede
+    when it expires: a short lock in the shared cache lets one worker compute while the
+    others wait for its result, and popular entries are refreshed before they expire
+    (probabilistic early expiration, weighted by how long compute() took) while readers
+    keep getting the current value.
+    """
+    store = stats_store(cache)
+    lock_key = f'{key}:lock'
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        if time.time() - delta * beta * math.log(1 - random.random()) < expires_at:
+            return value
+        if not cache.add(lock_key, 1, lock_timeout):
+            remember_stats.record('served_while_refreshing', store)
+            return value
+        remember_stats.record('refreshed_early', store)
+        return _compute(cache, key, lock_key, compute, timeout)
+
+    if cache.add(lock_key, 1, lock_timeout):
+        remember_stats.record('computed', store)
+        return _compute(cache, key, lock_key, compute, timeout)
+
+    deadline = time.monotonic() + lock_wait
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        entry = cache.get(key)
+        if entry is not None:
+            remember_stats.record('stampedes_avoided', store)
+            return entry[0]
+    remember_stats.record('lock_timeouts', store)
+    value, _ = _timed(compute)
+    return value
+
+
+def _timed(compute):
+    start = time.perf_counter()
+    value = compute()
+    return value, time.perf_counter() - start
+
+
+def _compute(cache, key, lock_key, compute, timeout):
+    try:
+        value, delta = _timed(compute)
+        cache.set(key, (value, delta, time.time() + timeout), timeout)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def cache_stats(alias='default'):
+    """{'l1_hits', 'l2_hits', 'misses'} of a TieredCache, totalled over the workers"""
+    backend = caches[alias]
+    return backend.stats.totals(backend.l2)
+
+
+def reset_cache_stats(alias='default'):
+    backend = caches[alias]
+    backend.stats.reset(backend.l2)
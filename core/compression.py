@@ -0,0 +1,143 @@
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+# already compressed formats (images, archives, fonts, ...) are not listed
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/.*|application/(json|.*\+json|javascript|xml|.*\+xml|graphql-response\+json)|image/svg\+xml)$'
+)
+ACCEPT_ENCODING = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def accepted_encodings(header):
+    """Encodings of an Accept-Encoding header, without those refused with q=0"""
+    accepted = set()
+    for match in ACCEPT_ENCODING.finditer(header):
+        name, quality = match.group(1).lower(), match.group(2)
+        try:
+            if quality is not None and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name)
+    return accepted
+
+
+class Gzip:
+    name = 'gzip'
+
+    def __init__(self):
+        # wbits 31: gzip header and trailer
+        self.compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        # sync flush, so a streamed chunk reaches the client without waiting for the next
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class Brotli:
+    name = 'br'
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def choose_codec(request):
+    encodings = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if brotli is not None and 'br' in encodings:
+        return Brotli
+    if 'gzip' in encodings:
+        return Gzip
+    return None
+
+
+def compress_stream(codec, chunks):
+    for chunk in chunks:
+        data = codec.compress(chunk) + codec.flush()
+        if data:
+            yield data
+    yield codec.finish()
+
+
+async def acompress_stream(codec, chunks):
+    async for chunk in chunks:
+        data = codec.compress(chunk) + codec.flush()
+        if data:
+            yield data
+    yield codec.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compresses text and JSON responses with brotli (when installed and accepted) or gzip.
+    Responses under COMPRESSION_MIN_SIZE bytes, already encoded responses and other
+    content types (images and other compressed media) are sent as they are.
+    Streaming responses are compressed chunk by chunk.
+    Like Django's GZipMiddleware it must come before middleware that reads or changes the
+    response body. Compressing responses that mix secrets with user input exposes them
+    to BREACH; the API sends tokens only in login responses, which stay small.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codec_class = choose_codec(request)
+        if codec_class is None:
+            return response
+        codec = codec_class()
+
+        if response.streaming:
+            stream = acompress_stream if response.is_async else compress_stream
+            response.streaming_content = stream(codec, response.streaming_content)
+            response.headers.pop('Content-Length', None)
+        else:
+            compressed = codec.compress(response.content) + codec.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # the compressed body differs from the one the ETag was computed for
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+        return response
+
+    def compressible(self, response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not COMPRESSIBLE_TYPES.match(content_type):
+            return False
+        if response.streaming:
+            return True
+        return len(response.content) >= settings.COMPRESSION_MIN_SIZE
@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from core.cache import Namespace
+
+cache = Namespace('core')
+
+# set while a catalog or report view that may read from the replica runs
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def pin_key(user):
+    return f'replica:pin:user:{user.pk}'
+
+
+def pin_to_primary(user):
+    """Send the user's reads to the primary for DATABASE_REPLICA_PIN_SECONDS, so they see their own writes"""
+    cache.set(pin_key(user), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    return bool(user and user.is_authenticated and cache.get(pin_key(user)))
+
+
+@contextmanager
+def replica_reads(request):
+    """Route the reads of safe requests to the replica, unless the user wrote recently"""
+    if not settings.DATABASE_REPLICA or request.method not in SAFE_METHODS or is_pinned(request.user):
+        yield
+        return
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def read_from_replica(view):
+    """replica_reads around an api_view function, which runs after authentication"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads(request):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """
+    ViewSet mixin sending the reads of the actions listed in replica_actions to the
+    replica. The replica is chosen after authentication, so pinned users are known.
+    """
+    replica_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            self._replica_reads = replica_reads(request)
+            self._replica_reads.__enter__()
+
+    def dispatch(self, request, *args, **kwargs):
+        self._replica_reads = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # also when the handler raised, or the next request of this thread would inherit it
+            if self._replica_reads is not None:
+                self._replica_reads.__exit__(None, None, None)
+
+
+class ReplicaRouter:
+    """
+    Reads go to DATABASE_REPLICA inside replica_reads, everything else to the primary.
+    Writes and select_for_update() (reservation locks) always use the primary, and
+    migrations only run there since the replica follows it.
+    """
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICA and _use_replica.get():
+            return settings.DATABASE_REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaPinMiddleware:
+    """Pins users to the primary after a successful write request (see pin_to_primary)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if (settings.DATABASE_REPLICA and request.method not in SAFE_METHODS
+                and response.status_code < 400 and user is not None and user.is_authenticated):
+            pin_to_primary(user)
+        return response
@@ -0,0 +1,177 @@
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+# label -> longest edge in pixels
+DERIVATIVE_SIZES = {
+    'thumbnail': 320,
+    'medium': 800,
+    'large': 1600,
+}
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DERIVATIVES_DIR = 'derivatives'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PIPELINE_WORKERS,
+                thread_name_prefix='image-pipeline',
+            )
+        return _executor
+
+
+def file_digest(file):
+    sha = hashlib.sha256()
+    for chunk in file.chunks():
+        sha.update(chunk)
+    return sha.hexdigest()
+
+
+def encode(image, image_format, options):
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(name, storage=default_storage):
+    """
+    Build every size/format of the image stored under `name`.
+    Files are named after the source digest, so identical uploads share derivatives.
+    Returns {'source': name, 'thumbnail': {'webp': path, 'jpeg': path}, ...}
+    """
+    with storage.open(name, 'rb') as source:
+        digest = file_digest(source)
+        source.seek(0)
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    variants = {'source': name}
+    for label, max_edge in DERIVATIVE_SIZES.items():
+        variants[label] = {}
+        resized = None
+        for extension, (image_format, options) in DERIVATIVE_FORMATS.items():
+            path = f'{DERIVATIVES_DIR}/{digest[:2]}/{digest}_{label}.{extension}'
+            if not storage.exists(path):
+                if resized is None:
+                    resized = image.copy()
+                    resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+                path = storage.save(path, ContentFile(encode(resized, image_format, options)))
+            variants[label][extension] = path
+    return variants
+
+
+def process_image(model, pk, field='image'):
+    """
+    Generate derivatives for one row and store them unless the image changed meanwhile.
+    Returns whether they were stored.
+    """
+    try:
+        instance = model._base_manager.filter(pk=pk).only(field).first()
+        if instance is None:
+            return False
+        name = getattr(instance, field).name
+        if not name:
+            return False
+        variants = generate_derivatives(name)
+        return bool(model._base_manager.filter(pk=pk, **{field: name}).update(**{f'{field}_variants': variants}))
+    except Exception:
+        logger.exception("Image derivatives failed for %s %s", model.__name__, pk)
+        return False
+
+
+def _process_image_in_worker(model, pk, field):
+    try:
+        process_image(model, pk, field)
+    finally:
+        # worker threads own their connections, do not leak them
+        connections.close_all()
+
+
+def schedule_derivatives(instance, field='image'):
+    """
+    Queue derivative generation once the current transaction commits.
+    Does nothing when the stored variants already belong to the current image.
+    Jobs live in this process only; the build_image_derivatives --loop worker catches
+    up on the ones a restart lost.
+    """
+    name = getattr(instance, field).name
+    variants = getattr(instance, f'{field}_variants') or {}
+    if not name or variants.get('source') == name:
+        return
+
+    model, pk = type(instance), instance.pk
+    if settings.IMAGE_PIPELINE_ASYNC:
+        transaction.on_commit(lambda: get_executor().submit(_process_image_in_worker, model, pk, field))
+    else:
+        transaction.on_commit(lambda: process_image(model, pk, field))
+
+
+def current_variants(instance, field='image'):
+    """Stored variants, or {} when they were generated for a previous image"""
+    variants = getattr(instance, f'{field}_variants') or {}
+    image = getattr(instance, field)
+    if not image or variants.get('source') != image.name:
+        return {}
+    return variants
+
+
+def missing_derivatives(model, field='image', older_than=None):
+    """Pks of the model's rows whose image has no derivatives yet, saved before older_than if given"""
+    rows = model._base_manager.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+    if older_than is not None:
+        rows = rows.filter(modify_datetime__lt=older_than)
+    for instance in rows.only('pk', field, f'{field}_variants').iterator():
+        if not current_variants(instance, field):
+            yield instance.pk
+
+
+def _absolute(url, request):
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def variant_urls(instance, request=None, field='image'):
+    """{'thumbnail': {'webp': url, 'jpeg': url}, ...} or None until derivatives exist"""
+    variants = current_variants(instance, field)
+    if not variants:
+        return None
+    return {
+        label: {
+            extension: _absolute(default_storage.url(path), request)
+            for extension, path in variants[label].items()
+        }
+        for label in DERIVATIVE_SIZES
+        if label in variants
+    }
+
+
+def thumbnail_url(instance, request=None, field='image'):
+    """JPEG thumbnail for catalog pages, the original image until derivatives exist"""
+    path = current_variants(instance, field).get('thumbnail', {}).get('jpeg')
+    if path:
+        return _absolute(default_storage.url(path), request)
+    image = getattr(instance, field)
+    return _absolute(image.url, request) if image else None
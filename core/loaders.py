@@ -0,0 +1,130 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+LoaderSpec = namedtuple('LoaderSpec', ['batch_load', 'parents', 'child', 'many', 'identity'])
+
+_specs = {}
+
+
+def register(name, batch_load, parents, child=None, many=False, identity=False):
+    """
+    Declare a GraphQL DataLoader.
+    batch_load(request, keys) returns {key: value}; keys it leaves out load as None ([] with many).
+    parents maps a type name to a function giving the key of a parent object, child names
+    the type of the loaded objects so their keys are queued for the next level.
+    An identity loader loads `child` objects by pk and is primed with every such object
+    another level already loaded.
+    """
+    _specs[name] = LoaderSpec(batch_load, parents, child, many, identity)
+
+
+class DataLoader:
+    """
+    Synchronous DataLoader. graphql-core resolves fields depth first without promises,
+    so keys cannot be collected while the level executes; instead every parent of a
+    level is queued when that level is loaded, and the first load() fetches all of them.
+    """
+
+    def __init__(self, batch_load, many=False, on_load=None):
+        self.batch_load = batch_load
+        self.many = many
+        self.on_load = on_load
+        self.cache = {}
+        self.pending = {}
+
+    def prime(self, key, value):
+        self.cache[key] = value
+        self.pending.pop(key, None)
+
+    def queue(self, keys):
+        for key in keys:
+            if key is not None and key not in self.cache:
+                self.pending[key] = None
+
+    def load(self, key):
+        if key is None:
+            return [] if self.many else None
+        if key not in self.cache:
+            self.pending[key] = None
+            keys, self.pending = list(self.pending), {}
+            values = self.batch_load(keys)
+            for batch_key in keys:
+                self.cache[batch_key] = values.get(batch_key, [] if self.many else None)
+            if self.on_load:
+                self.on_load(values.values())
+        return self.cache[key]
+
+
+class RequestLoaders:
+    """The DataLoaders of one request, created on first use"""
+
+    def __init__(self, request):
+        self.request = request
+        self.loaders = {}
+
+    def __getitem__(self, name):
+        if name not in self.loaders:
+            spec = _specs[name]
+            on_load = None
+            if spec.child:
+                on_load = lambda values, spec=spec: self.queue(spec.child, self.flatten(values, spec.many))
+            self.loaders[name] = DataLoader(
+                lambda keys, spec=spec: spec.batch_load(self.request, keys), many=spec.many, on_load=on_load
+            )
+        return self.loaders[name]
+
+    def flatten(self, values, many):
+        if not many:
+            return [value for value in values if value is not None]
+        return [item for value in values for item in value]
+
+    def queue(self, type_name, objects):
+        objects = list(objects)
+        for name, spec in _specs.items():
+            if spec.identity and spec.child == type_name:
+                for obj in objects:
+                    self[name].prime(obj.pk, obj)
+        for name, spec in _specs.items():
+            key_of = spec.parents.get(type_name)
+            if key_of is not None:
+                self[name].queue(key_of(obj) for obj in objects)
+
+
+def loaders_for(info):
+    request = info.context
+    if not hasattr(request, 'graphql_loaders'):
+        request.graphql_loaders = RequestLoaders(request)
+    return request.graphql_loaders
+
+
+def load(info, name, key):
+    return loaders_for(info)[name].load(key)
+
+
+def queue(info, type_name, objects):
+    """Queue the keys of a level's objects so their children load in one batch; returns objects"""
+    objects = list(objects)
+    loaders_for(info).queue(type_name, objects)
+    return objects
+
+
+def group_by(objects, key):
+    grouped = {}
+    for obj in objects:
+        grouped.setdefault(getattr(obj, key), []).append(obj)
+    return grouped
+
+
+def first_per_group(queryset, key, order_by):
+    """
+    group_by of queryset keeping only the first GRAPHQL_MAX_LIST_SIZE objects of each key,
+    the most a `first` argument can ask for; resolvers slice to what was asked
+    """
+    ranked = queryset.annotate(
+        group_row=Window(RowNumber(), partition_by=F(key), order_by=list(order_by))
+    ).filter(group_row__lte=settings.GRAPHQL_MAX_LIST_SIZE).order_by(*order_by)
+    return group_by(ranked, key)
@@ -0,0 +1,251 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.models import BulkEmailJob, OutgoingEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, body, to, from_email=None):
+    """
+    Put a message in the outbox instead of talking to SMTP during the request.
+    Written in the caller's transaction, so a rolled back signup sends nothing.
+    """
+    return OutgoingEmail.objects.create(
+        subject=subject, body=body, to=list(to), from_email=from_email or settings.DEFAULT_FROM_EMAIL
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(
+        settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), settings.EMAIL_OUTBOX_MAX_RETRY_DELAY
+    ))
+
+
+def claim_batch(batch_size):
+    """
+    Lock due messages (skipping rows other workers hold) and push their next attempt
+    past the lease, so each message is sent by one worker at a time.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.Status.PENDING, next_attempt_datetime__lte=now)
+            .order_by('next_attempt_datetime', 'id')[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            attempts=F('attempts') + 1,
+            next_attempt_datetime=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE),
+        )
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def record_failure(email, error):
+    """Schedule a retry of an outbox message (or a bulk job), or give up after EMAIL_OUTBOX_MAX_ATTEMPTS"""
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = type(email).Status.FAILED
+        logger.error("Giving up on email %s after %s attempts: %s", email.pk, email.attempts, error)
+    else:
+        email.next_attempt_datetime = timezone.now() + retry_delay(email.attempts)
+    email.last_error = str(error)[:1000]
+    email.save(update_fields=['status', 'next_attempt_datetime', 'last_error'])
+
+
+def send_queued_emails(batch_size=None, connection=None):
+    """
+    Send one batch from the outbox over a single SMTP connection.
+    Returns (sent, failed).
+    """
+    emails = claim_batch(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            record_failure(email, e)
+        return 0, len(emails)
+
+    sent, failed = [], 0
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email or None, email.to, connection=connection
+            )
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                # the connection may be unusable now, send_messages reopens it
+                connection.close()
+                record_failure(email, e)
+                failed += 1
+            else:
+                sent.append(email.pk)
+    finally:
+        connection.close()
+
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        status=OutgoingEmail.Status.SENT, sent_datetime=timezone.now(), last_error=''
+    )
+    return len(sent), failed
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def queue_bulk_email(subject, template_name, context, recipients, recipient_args=None, from_email=None):
+    """
+    Queue one message for many recipients as a single BulkEmailJob, in the caller's
+    transaction. The template is rendered once here; `recipients` is the dotted path of a
+    function called by the worker as recipients(after=address, **recipient_args), returning
+    the addresses after `after` (all of them for None) ordered by address.
+    """
+    return BulkEmailJob.objects.create(
+        subject=subject,
+        body=render_to_string(template_name, context),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=recipients,
+        recipient_args=recipient_args or {},
+    )
+
+
+def claim_bulk_job():
+    """Lock the next due job and push its next attempt past the lease, like claim_batch"""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            BulkEmailJob.objects.select_for_update(skip_locked=True)
+            .filter(status=BulkEmailJob.Status.PENDING, next_attempt_datetime__lte=now)
+            .order_by('next_attempt_datetime', 'id').first()
+        )
+        if job is None:
+            return None
+        job.attempts += 1
+        job.next_attempt_datetime = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        job.save(update_fields=['attempts', 'next_attempt_datetime'])
+    return job
+
+
+class BatchSender:
+    """
+    Sends batches of messages from worker threads, each thread over its own
+    connection that stays open for all the batches it sends.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def send(self, messages):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = get_connection()
+            connection.open()
+            with self.lock:
+                self.connections.append(connection)
+        try:
+            connection.send_messages(messages)
+        except Exception:
+            # the connection may be unusable now, the next batch opens a new one
+            self.local.connection = None
+            connection.close()
+            raise
+
+    def close(self):
+        for connection in self.connections:
+            connection.close()
+
+
+def send_bulk_job(job, batch_size=None, concurrency=None):
+    """
+    Stream the job's recipients and send them batch_size messages per send_messages()
+    call, with at most `concurrency` batches in flight. The cursor advances past every
+    batch finished in order (renewing the lease); recipients of a batch that failed are
+    queued in the outbox, which retries them one by one.
+    """
+    batch_size = batch_size or settings.BULK_EMAIL_BATCH_SIZE
+    concurrency = concurrency or settings.BULK_EMAIL_CONCURRENCY
+    recipients = import_string(job.recipients)(after=job.cursor or None, **job.recipient_args)
+
+    def build(address):
+        return EmailMessage(job.subject, job.body, job.from_email or None, [address])
+
+    def finish(batch, future):
+        error = future.exception()
+        if error is None:
+            job.sent += len(batch)
+        else:
+            logger.warning("Bulk email job %s: batch of %s failed, queued in the outbox: %s",
+                           job.pk, len(batch), error)
+            for address in batch:
+                queue_email(job.subject, job.body, [address], job.from_email)
+            job.requeued += len(batch)
+        job.cursor = batch[-1]
+        job.next_attempt_datetime = timezone.now() + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        job.save(update_fields=['sent', 'requeued', 'cursor', 'next_attempt_datetime'])
+
+    sender = BatchSender()
+    in_flight = deque()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bulk-email') as executor:
+            for batch in batched(recipients.iterator(chunk_size=2000), batch_size):
+                if len(in_flight) >= concurrency:
+                    # the oldest batch first, so the cursor never skips an unfinished one
+                    batch_done, future = in_flight.popleft()
+                    wait([future])
+                    finish(batch_done, future)
+                while in_flight and in_flight[0][1].done():
+                    finish(*in_flight.popleft())
+                in_flight.append((batch, executor.submit(sender.send, [build(address) for address in batch])))
+            while in_flight:
+                batch, future = in_flight.popleft()
+                wait([future])
+                finish(batch, future)
+    finally:
+        sender.close()
+
+    job.status = BulkEmailJob.Status.SENT
+    job.sent_datetime = timezone.now()
+    job.last_error = ''
+    job.save(update_fields=['status', 'sent_datetime', 'last_error'])
+    return job
+
+
+def run_bulk_job(batch_size=None, concurrency=None):
+    """Claim and send one due bulk job; returns it, or None when there is none"""
+    job = claim_bulk_job()
+    if job is None:
+        return None
+    try:
+        return send_bulk_job(job, batch_size, concurrency)
+    except Exception as e:
+        # resumed from the cursor on the next attempt
+        logger.exception("Bulk email job %s failed", job.pk)
+        record_failure(job, e)
+        return job
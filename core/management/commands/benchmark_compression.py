@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.compression import brotli
+from core.management.commands.benchmark_json import seed_hotels
+
+
+class Command(BaseCommand):
+    help = "Response sizes of the largest API responses with and without compression"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', type=int, default=5)
+        parser.add_argument('--reservations', type=int, default=200, help="Reservations per hotel")
+
+    def handle(self, *args, **options):
+        encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+        # the responses are built from rows that are rolled back afterwards
+        with transaction.atomic():
+            manager_user, hotels = seed_hotels(options['hotels'], options['reservations'])
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(manager_user)}')
+            # after the seeded reservations, so every room is free
+            check_in = timezone.localdate() + timedelta(days=options['reservations'] + 2)
+            requests = [
+                ('hotel list', 'get', '/hotel-api/all-hotels/', None),
+                ('hotel reservations', 'get', '/hotelManager-api/hotel_manager/hotel-reservations/', None),
+                ('room search', 'post', '/room-api/all-rooms/', {
+                    'city': hotels[0].location,
+                    'check_in_date': str(check_in),
+                    'check_out_date': str(check_in + timedelta(days=2)),
+                    'rooms': [{'type_of_room': 'Double', 'number_of_passengers': 2, 'number_of_rooms': 1}],
+                }),
+            ]
+            for label, method, path, body in requests:
+                sizes = {}
+                for encoding in encodings:
+                    kwargs = {'HTTP_ACCEPT_ENCODING': encoding}
+                    if body is not None:
+                        kwargs.update(data=body, content_type='application/json')
+                    response = getattr(client, method)(path, **kwargs)
+                    sizes[encoding] = len(response.content)
+                plain = sizes.pop('identity')
+                self.stdout.write(
+                    f"{label} ({response.status_code}): {plain / 1024:.1f} KiB plain, " + ", ".join(
+                        f"{encoding} {size / 1024:.1f} KiB ({100 * (1 - size / plain):.0f}% saved)"
+                        for encoding, size in sizes.items()
+                    )
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,50 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+
+SAMPLE_QUERY = '{ hotels(first: 1) { id name } }'
+
+
+class Command(BaseCommand):
+    help = "Compare per-request latency of a simple endpoint with a new database connection per request and with a persistent one"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        client = Client(HTTP_HOST='localhost')
+        configured = connection.settings_dict['CONN_MAX_AGE']
+        self.stdout.write(f"{connection.vendor} database, DATABASE_CONN_MAX_AGE={configured}")
+        try:
+            results = {
+                'new connection per request (CONN_MAX_AGE=0)': self.time_requests(client, 0, count),
+                'persistent connection': self.time_requests(client, None, count),
+            }
+        finally:
+            connection.settings_dict['CONN_MAX_AGE'] = configured
+            connection.close()
+
+        for label, seconds in results.items():
+            self.stdout.write(f"{label}: {seconds * 1000:.2f} ms per request")
+        fresh, persistent = results.values()
+        self.stdout.write(f"Persistent connections save {(fresh - persistent) * 1000:.2f} ms ({(fresh - persistent) / fresh:.0%}) per request")
+
+    def time_requests(self, client, max_age, count):
+        connection.close()
+        # read when the connection opens, as for a worker started with this setting
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        body = json.dumps({'query': SAMPLE_QUERY})
+        start = time.perf_counter()
+        for _ in range(count):
+            # the test client leaves connections alone; do what the request handler's
+            # request_started and request_finished signals do
+            close_old_connections()
+            response = client.post('/graphql/', body, content_type='application/json')
+            close_old_connections()
+            if response.status_code != 200:
+                raise CommandError(response.content.decode())
+        return (time.perf_counter() - start) / count
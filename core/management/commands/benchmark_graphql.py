@@ -0,0 +1,65 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+
+from bookit.schema import schema
+from core.persisted_queries import clear_cache, register_document
+
+SAMPLE_QUERY = """
+query HotelsWithRooms($location: String, $first: Int) {
+  hotels(location: $location, first: $first) {
+    id
+    name
+    rate
+    facilities { facilityType }
+    rooms { id name roomType price discountedPrice }
+    reviews { rating goodThing }
+  }
+}
+"""
+
+
+class Command(BaseCommand):
+    help = "Compare the per-request overhead of a GraphQL query sent as text and as a persisted query"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        client = Client(HTTP_HOST='localhost')
+        variables = {'location': 'no hotel matches this', 'first': 10}
+
+        # the sample document is registered in a transaction that is rolled back
+        with transaction.atomic():
+            persisted, _ = register_document(schema.graphql_schema, SAMPLE_QUERY, 'benchmark')
+            clear_cache()
+            bodies = {
+                'query text': {'query': SAMPLE_QUERY, 'variables': variables},
+                'persisted query': {
+                    'variables': variables,
+                    'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': persisted.sha256}},
+                },
+            }
+            results = {label: self.time_requests(client, body, count) for label, body in bodies.items()}
+            transaction.set_rollback(True)
+        clear_cache()
+
+        for label, seconds in results.items():
+            self.stdout.write(f"{label}: {seconds * 1e6:.0f} us per request")
+        saved = results['query text'] - results['persisted query']
+        self.stdout.write(f"Persisted queries save {saved * 1e6:.0f} us ({saved / results['query text']:.0%}) per request")
+
+    def time_requests(self, client, body, count):
+        data = json.dumps(body)
+        # warm up: first request fills the persisted document cache
+        client.post('/graphql/', data, content_type='application/json')
+        start = time.perf_counter()
+        for _ in range(count):
+            response = client.post('/graphql/', data, content_type='application/json')
+            if response.status_code != 200:
+                raise CommandError(response.content.decode())
+        return (time.perf_counter() - start) / count
@@ -0,0 +1,91 @@
+import io
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from core.renderers import ORJSONParser, ORJSONRenderer
+from hotel.models import Hotel
+from hotelManager.models import HotelManager
+from hotelManager.serializers import HotelReservationsSerializer
+from reservation.models import Payment, Reservation
+from room.models import Room
+
+
+def seed_hotels(hotel_count, reservation_count):
+    """Hotels of one manager with 10 rooms each and paid reservations, returns (manager user, hotels)"""
+    guest = User.objects.create_user(email='json-benchmark@example.com', password='Benchmark-Pass-1234')
+    manager_user = User.objects.create_user(email='json-benchmark-manager@example.com', password='Benchmark-Pass-1234')
+    hotel_manager = HotelManager.objects.create(user=manager_user, national_code='5151515151')
+    today = timezone.localdate()
+    hotels = []
+    for number in range(hotel_count):
+        hotel = Hotel.objects.create(
+            hotel_manager=hotel_manager, name=f"Benchmark {number}", location="Isfahan", status="Accepted",
+            discount_start_date=timezone.now(), discount_end_date=timezone.now() + timedelta(days=7),
+        )
+        rooms = Room.objects.bulk_create([
+            Room(hotel=hotel, room_number=room, name=f"Room {room}", room_type="Double", price=120)
+            for room in range(10)
+        ])
+        reservations = Reservation.objects.bulk_create([
+            Reservation(
+                room=rooms[index % len(rooms)], user=guest,
+                check_in_date=today + timedelta(days=index), check_out_date=today + timedelta(days=index + 2),
+            )
+            for index in range(reservation_count)
+        ])
+        Payment.objects.bulk_create([
+            Payment(reservation=reservation, amount=240, method='online', status='confirmed')
+            for reservation in reservations
+        ])
+        hotels.append(hotel)
+    return manager_user, hotels
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's JSON renderer and parser with the orjson ones on a hotel-reservations payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', type=int, default=5)
+        parser.add_argument('--reservations', type=int, default=200, help="Reservations per hotel")
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        # the payload is built from rows that are rolled back afterwards
+        with transaction.atomic():
+            _, hotels = seed_hotels(options['hotels'], options['reservations'])
+            data = HotelReservationsSerializer(hotels, many=True).data
+            transaction.set_rollback(True)
+
+        repeat = options['repeat']
+        body = JSONRenderer().render(data)
+        if json.loads(ORJSONRenderer().render(data)) != json.loads(body):
+            raise CommandError("orjson output differs from DRF's")
+        self.stdout.write(f"Payload: {len(body) / 1024:.0f} KiB, {options['hotels'] * options['reservations']} reservations")
+
+        self.compare("render", lambda: JSONRenderer().render(data), lambda: ORJSONRenderer().render(data), repeat)
+        self.compare(
+            "parse",
+            lambda: JSONParser().parse(io.BytesIO(body)),
+            lambda: ORJSONParser().parse(io.BytesIO(body)),
+            repeat,
+        )
+
+    def compare(self, label, stdlib, fast, repeat):
+        results = {}
+        for name, function in (('json', stdlib), ('orjson', fast)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                function()
+            results[name] = (time.perf_counter() - start) / repeat
+        self.stdout.write(
+            f"{label}: json {results['json'] * 1000:.2f} ms, orjson {results['orjson'] * 1000:.2f} ms "
+            f"({results['json'] / results['orjson']:.1f}x faster)"
+        )
@@ -0,0 +1,60 @@
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.image_pipeline import missing_derivatives, process_image
+
+
+class Command(BaseCommand):
+    help = "Generate the image derivatives that are missing, e.g. jobs lost when a worker restarted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument('--loop', action='store_true', help="Keep checking for missing derivatives")
+        parser.add_argument('--interval', type=float, default=settings.IMAGE_PIPELINE_BACKFILL_INTERVAL,
+                            help="Seconds between checks")
+
+    def handle(self, *args, **options):
+        # every model with an image field and its variants
+        models = [
+            model for model in apps.get_models()
+            if any(field.name == 'image_variants' for field in model._meta.get_fields())
+        ]
+        if not options['loop']:
+            built, failed = self.build(models, options['dry_run'])
+            prefix = "Would build" if options['dry_run'] else "Built"
+            self.stdout.write(self.style.SUCCESS(f"{prefix} derivatives for {built} images, {failed} failed"))
+            return
+
+        # images that keep failing are retried when the worker restarts, not on every check
+        failed_images = set()
+        try:
+            while True:
+                # recent uploads are still being processed by the web worker that saved them
+                older_than = timezone.now() - timedelta(seconds=settings.IMAGE_PIPELINE_BACKFILL_DELAY)
+                built, failed = self.build(models, options['dry_run'], older_than, failed_images)
+                if built or failed:
+                    self.stdout.write(f"Built derivatives for {built} images, {failed} failed")
+                close_old_connections()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def build(self, models, dry_run, older_than=None, failed_images=None):
+        built, failed = 0, 0
+        for model in models:
+            for pk in list(missing_derivatives(model, older_than=older_than)):
+                if failed_images is not None and (model, pk) in failed_images:
+                    continue
+                if dry_run or process_image(model, pk):
+                    built += 1
+                else:
+                    failed += 1
+                    if failed_images is not None:
+                        failed_images.add((model, pk))
+        return built, failed
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from core.cache import TieredCache, cache_stats, remember_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Hit and miss counts of the tiered caches, totalled over every worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Start counting from zero")
+
+    def handle(self, *args, **options):
+        for alias in settings.CACHES:
+            if not isinstance(caches[alias], TieredCache):
+                continue
+            if options['reset']:
+                reset_cache_stats(alias)
+                self.stdout.write(f"{alias}: reset")
+                continue
+            stats = cache_stats(alias)
+            lookups = sum(stats.values())
+            hits = stats['l1_hits'] + stats['l2_hits']
+            ratio = f"{hits / lookups:.1%}" if lookups else "-"
+            self.stdout.write(
+                f"{alias}: {lookups} lookups, hit ratio {ratio} "
+                f"(L1 {stats['l1_hits']}, L2 {stats['l2_hits']}, misses {stats['misses']})"
+            )
+
+        # remember() counts in the shared cache behind the tiered alias
+        shared = caches['tiered'].l2
+        if options['reset']:
+            remember_stats.reset(shared)
+            return
+        stats = remember_stats.totals(shared)
+        self.stdout.write("remember: " + ", ".join(f"{event} {count}" for event, count in stats.items()))
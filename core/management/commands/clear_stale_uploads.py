@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import ChunkedUpload
+from core.uploads import discard_upload
+
+
+class Command(BaseCommand):
+    help = "Delete chunked uploads that were abandoned or completed long ago, with their part files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24,
+                            help="Delete uploads not touched for this many hours")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        count = 0
+        for upload in ChunkedUpload.objects.filter(modify_datetime__lt=cutoff).iterator():
+            discard_upload(upload)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} stale uploads"))
@@ -0,0 +1,123 @@
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.blobs import count_references
+from core.models import MediaBlob
+from core.storage import BLOB_DIR, blob_storage
+
+
+class Command(BaseCommand):
+    help = "Delete content addressed media blobs that are no longer referenced"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount', action='store_true',
+                            help="Rebuild reference counts from the database before collecting")
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help="Keep unreferenced blobs younger than this (uploads still in flight)")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        # Counts can drift (queryset.update, raw SQL), so deletions are checked against the real references
+        referenced = count_references()
+        if options['recount']:
+            self.recount(referenced, batch_size, dry_run)
+
+        deleted, freed = 0, 0
+        candidates = MediaBlob.objects.filter(ref_count__lte=0, modify_datetime__lt=cutoff).order_by('id')
+        last_id = 0
+        while True:
+            batch = list(candidates.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            garbage = [blob for blob in batch if blob.name not in referenced]
+            if dry_run:
+                deleted += len(garbage)
+                freed += sum(blob.size for blob in garbage)
+                continue
+            with transaction.atomic():
+                # an upload of the same content may have referenced a blob since it was read:
+                # lock the rows, check them again and only delete files of the rows deleted here
+                locked = [
+                    blob for blob in candidates.select_for_update().filter(pk__in=[blob.pk for blob in garbage])
+                    if not self.touched_since(blob.name, cutoff)
+                ]
+                MediaBlob.objects.filter(pk__in=[blob.pk for blob in locked]).delete()
+                # while the rows are still locked, add_reference waits for this transaction
+                for blob in locked:
+                    blob_storage.delete(blob.name)
+            deleted += len(locked)
+            freed += sum(blob.size for blob in locked)
+
+        orphans, orphan_bytes = self.collect_untracked_files(referenced, cutoff, dry_run)
+
+        prefix = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {deleted} unreferenced blobs ({freed} bytes) "
+            f"and {orphans} untracked files ({orphan_bytes} bytes)"
+        ))
+
+    def touched_since(self, name, cutoff):
+        """Uploads of existing content touch the file before they reference it"""
+        try:
+            return os.path.getmtime(blob_storage.path(name)) >= cutoff.timestamp()
+        except OSError:
+            return False
+
+    def recount(self, referenced, batch_size, dry_run):
+        counts = dict(referenced)
+        changed = []
+        for blob in MediaBlob.objects.iterator(chunk_size=batch_size):
+            ref_count = counts.pop(blob.name, 0)
+            if blob.ref_count != ref_count:
+                blob.ref_count = ref_count
+                changed.append(blob)
+        missing = [
+            MediaBlob(name=name, ref_count=ref_count,
+                      size=blob_storage.size(name) if blob_storage.exists(name) else 0)
+            for name, ref_count in counts.items()
+        ]
+        if not dry_run:
+            with transaction.atomic():
+                MediaBlob.objects.bulk_update(changed, ['ref_count'], batch_size=batch_size)
+                MediaBlob.objects.bulk_create(missing, batch_size=batch_size, ignore_conflicts=True)
+        self.stdout.write(f"Recounted references: {len(changed)} corrected, {len(missing)} added")
+
+    def collect_untracked_files(self, referenced, cutoff, dry_run):
+        """
+        Files on disk that no row references and that have no MediaBlob entry,
+        e.g. uploads whose transaction rolled back or leftover temporary files.
+        """
+        root = blob_storage.path(BLOB_DIR)
+        cutoff_ts = cutoff.timestamp()
+        count, size = 0, 0
+        for directory, _, files in os.walk(root):
+            paths = {}
+            for file_name in files:
+                full_path = os.path.join(directory, file_name)
+                if os.path.getmtime(full_path) >= cutoff_ts:
+                    continue
+                name = os.path.relpath(full_path, blob_storage.location).replace(os.sep, '/')
+                if name not in referenced:
+                    paths[full_path] = name
+            if not paths:
+                continue
+
+            tracked = set(MediaBlob.objects.filter(name__in=paths.values()).values_list('name', flat=True))
+            for full_path, name in paths.items():
+                if name in tracked:
+                    continue
+                count += 1
+                size += os.path.getsize(full_path)
+                if not dry_run:
+                    os.remove(full_path)
+        return count, size
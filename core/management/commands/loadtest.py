@@ -0,0 +1,83 @@
+import json
+import math
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test running servers: throughput and tail latency of endpoints at a given concurrency. "
+        "Run it against GUNICORN_MODE=wsgi and GUNICORN_MODE=asgi deployments, or against a sync "
+        "endpoint and its async/ counterpart, to compare them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help="Full URLs, each one is tested in turn")
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--body', help="JSON request body, e.g. a room search for the all-rooms endpoints")
+        parser.add_argument('--token', help="JWT access token sent as a Bearer authorization header")
+        parser.add_argument('--concurrency', type=int, default=64, help="Requests in flight at once")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests sent to each URL")
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        if options['body'] is not None:
+            try:
+                json.loads(options['body'])
+            except ValueError:
+                raise CommandError("--body is not valid JSON")
+        for url in options['urls']:
+            self.report(url, *self.run(url, options))
+
+    def request(self, url, options):
+        """(latency in seconds, status code); status 0 for connection errors and timeouts"""
+        headers = {'Accept': 'application/json'}
+        data = None
+        if options['body'] is not None:
+            data = options['body'].encode()
+            headers['Content-Type'] = 'application/json'
+        if options['token']:
+            headers['Authorization'] = f"Bearer {options['token']}"
+        request = urllib.request.Request(url, data=data, headers=headers, method=options['method'].upper())
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=options['timeout']) as response:
+                response.read()
+                code = response.status
+        except urllib.error.HTTPError as e:
+            code = e.code
+        except (urllib.error.URLError, OSError):
+            code = 0
+        return time.perf_counter() - start, code
+
+    def run(self, url, options):
+        # a warm-up request, so connection setup and first-request work are not measured
+        self.request(url, options)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(lambda _: self.request(url, options), range(options['requests'])))
+        return results, time.perf_counter() - start
+
+    def report(self, url, results, elapsed):
+        latencies = sorted(latency for latency, _ in results)
+        codes = {}
+        for _, code in results:
+            codes[code] = codes.get(code, 0) + 1
+        failed = sum(count for code, count in codes.items() if not 200 <= code < 300)
+
+        self.stdout.write(url)
+        self.stdout.write(f"  {len(results) / elapsed:.1f} req/s, {failed} failed, status codes {dict(sorted(codes.items()))}")
+        self.stdout.write("  latency " + ", ".join(
+            f"{label} {percentile(latencies, fraction) * 1000:.1f} ms"
+            for label, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1))
+        ))
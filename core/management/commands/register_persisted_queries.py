@@ -0,0 +1,46 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from graphql import GraphQLError
+
+from bookit.schema import schema
+from core.persisted_queries import register_document
+
+
+class Command(BaseCommand):
+    help = "Register the GraphQL documents (*.graphql) of a directory as persisted queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--manifest', help="Write a {file: sha256} JSON manifest for clients to this path")
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError(f"{directory} is not a directory")
+
+        manifest, failed = {}, 0
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                if not filename.endswith(('.graphql', '.gql')):
+                    continue
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory)
+                with open(path, encoding='utf-8') as f:
+                    document = f.read()
+                try:
+                    persisted, created = register_document(schema.graphql_schema, document, name)
+                except GraphQLError as e:
+                    self.stderr.write(f"{name}: {e.message}")
+                    failed += 1
+                    continue
+                manifest[name] = persisted.sha256
+                self.stdout.write(f"{'Added' if created else 'Kept'} {name}: {persisted.sha256}")
+
+        if options['manifest']:
+            with open(options['manifest'], 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+        if failed:
+            raise CommandError(f"{failed} documents did not validate")
+        self.stdout.write(self.style.SUCCESS(f"Registered {len(manifest)} documents"))
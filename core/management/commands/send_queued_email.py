@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.mail import run_bulk_job, send_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Send messages from the email outbox, batching them over one SMTP connection, and bulk email jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Keep polling the outbox")
+        parser.add_argument('--interval', type=float, default=2, help="Seconds to wait when the outbox is empty")
+
+    def handle(self, *args, **options):
+        total_sent, total_failed = 0, 0
+        try:
+            while True:
+                sent, failed = send_queued_emails(options['batch_size'])
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent}, failed {failed}")
+                    continue
+                job = run_bulk_job()
+                if job is not None:
+                    self.stdout.write(
+                        f"Bulk job {job.pk} ({job.status}): {job.sent} sent, {job.requeued} queued in the outbox"
+                    )
+                    continue
+                if not options['loop']:
+                    break
+                close_old_connections()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Done: {total_sent} sent, {total_failed} failed"))
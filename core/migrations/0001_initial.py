@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('create_datetime', models.DateTimeField(auto_now_add=True)),
+                ('modify_datetime', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
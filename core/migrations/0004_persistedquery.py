@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersistedQuery',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, help_text='File the document was registered from', max_length=255)),
+                ('document', models.TextField()),
+                ('create_datetime', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
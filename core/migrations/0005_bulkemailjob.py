@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-19 08:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_persistedquery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkEmailJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('from_email', models.CharField(blank=True, max_length=254)),
+                ('recipients', models.CharField(max_length=255)),
+                ('recipient_args', models.JSONField(default=dict)),
+                ('cursor', models.CharField(blank=True, max_length=254)),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('requeued', models.PositiveIntegerField(default=0, help_text='Recipients of failed batches, moved to the outbox')),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Sent', 'Sent'), ('Failed', 'Failed')], default='Pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_datetime', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('create_datetime', models.DateTimeField(auto_now_add=True)),
+                ('sent_datetime', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_datetime'], name='core_bulkem_status_0e24e7_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,8 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from .manager import BaseManager
 
 
@@ -23,4 +27,114 @@ class BaseModel(models.Model):
 
     def deactivate(self):
         self.is_active = False
-        self.save()
\ No newline at end of file
+        self.save()
+
+class MediaBlob(models.Model):
+    """A file in the content addressed storage and how many rows reference it"""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    create_datetime = models.DateTimeField(auto_now_add=True, editable=False)
+    modify_datetime = models.DateTimeField(auto_now=True, editable=False)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class ChunkedUpload(models.Model):
+    """A resumable upload whose bytes are appended to a file in CHUNKED_UPLOAD_DIR"""
+
+    class Target(models.TextChoices):
+        HOTEL_LICENSE = 'hotel_license', 'Hotel license'
+        VERIFICATION_FILE = 'verification_file', 'Verification file'
+
+    class Status(models.TextChoices):
+        UPLOADING = 'Uploading', 'Uploading'
+        COMPLETE = 'Complete', 'Complete'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chunked_uploads')
+    target = models.CharField(max_length=20, choices=Target.choices)
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.UPLOADING)
+    create_datetime = models.DateTimeField(auto_now_add=True, editable=False)
+    modify_datetime = models.DateTimeField(auto_now=True, editable=False)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+
+class OutgoingEmail(models.Model):
+    """A message in the outbox, delivered by the send_queued_email worker"""
+
+    class Status(models.TextChoices):
+        PENDING = 'Pending', 'Pending'
+        SENT = 'Sent', 'Sent'
+        FAILED = 'Failed', 'Failed'
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_datetime = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    create_datetime = models.DateTimeField(auto_now_add=True, editable=False)
+    sent_datetime = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_datetime'])]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+class BulkEmailJob(models.Model):
+    """
+    One message for many recipients, delivered by the send_queued_email worker.
+    Recipients are read when the job runs from `recipients`, the dotted path of a function
+    taking recipient_args and `after`; cursor is the last address handled, so a job
+    whose worker died resumes where it stopped.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'Pending', 'Pending'
+        SENT = 'Sent', 'Sent'
+        FAILED = 'Failed', 'Failed'
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.CharField(max_length=255)
+    recipient_args = models.JSONField(default=dict)
+    cursor = models.CharField(max_length=254, blank=True)
+    sent = models.PositiveIntegerField(default=0)
+    requeued = models.PositiveIntegerField(default=0, help_text="Recipients of failed batches, moved to the outbox")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_datetime = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    create_datetime = models.DateTimeField(auto_now_add=True, editable=False)
+    sent_datetime = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_datetime'])]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipients} ({self.status}, {self.sent} sent)"
+
+
+class PersistedQuery(models.Model):
+    """A registered GraphQL document, requested by the sha256 of its text"""
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, blank=True, help_text="File the document was registered from")
+    document = models.TextField()
+    create_datetime = models.DateTimeField(auto_now_add=True, editable=False)
+
+    def __str__(self):
+        return self.name or self.sha256
@@ -0,0 +1,71 @@
+import hashlib
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from graphql import GraphQLError, parse, validate
+
+from core.models import PersistedQuery
+
+
+class PersistedQueryNotFound(GraphQLError):
+    def __init__(self):
+        # the message clients following the Apollo protocol look for
+        super().__init__("PersistedQueryNotFound")
+
+
+def document_hash(document):
+    return hashlib.sha256(document.encode()).hexdigest()
+
+
+def requested_hash(extensions):
+    """sha256Hash of the persistedQuery extension (Apollo format), given as a dict or as JSON"""
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            return None
+    if not isinstance(extensions, dict):
+        return None
+    persisted = extensions.get('persistedQuery')
+    if not isinstance(persisted, dict):
+        return None
+    return persisted.get('sha256Hash')
+
+
+def parse_and_validate(schema, document):
+    """Parsed document, raises the first GraphQLError of parsing or validation"""
+    ast = parse(document)
+    errors = validate(schema, ast)
+    if errors:
+        raise errors[0]
+    return ast
+
+
+@lru_cache(maxsize=settings.GRAPHQL_PERSISTED_CACHE_SIZE)
+def _load_document(schema, sha256):
+    # documents are immutable (keyed by their hash), so the cached AST never goes stale;
+    # misses raise and are not cached
+    document = PersistedQuery.objects.filter(sha256=sha256).values_list('document', flat=True).first()
+    if document is None:
+        raise PersistedQueryNotFound()
+    return parse_and_validate(schema, document)
+
+
+def get_document(schema, sha256):
+    """Parsed and validated AST of a registered document, kept in process after the first request"""
+    if not isinstance(sha256, str) or len(sha256) != 64:
+        raise PersistedQueryNotFound()
+    return _load_document(schema, sha256.lower())
+
+
+def register_document(schema, document, name=''):
+    """Validate a document against the schema and store it; returns (PersistedQuery, created)"""
+    parse_and_validate(schema, document)
+    return PersistedQuery.objects.update_or_create(
+        sha256=document_hash(document), defaults={'document': document, 'name': name}
+    )
+
+
+def clear_cache():
+    _load_document.cache_clear()
@@ -0,0 +1,142 @@
+from django.conf import settings
+from graphql import (
+    FieldNode, FragmentDefinitionNode, FragmentSpreadNode, GraphQLError, InlineFragmentNode, IntValueNode,
+    VariableNode, get_named_type, get_nullable_type, get_operation_ast, is_list_type,
+)
+from graphql.validation import ValidationRule
+
+
+def budget_for(user):
+    """Cost budget of the user's role (Admin for staff, anonymous without a login)"""
+    budgets = settings.GRAPHQL_COST_BUDGETS
+    if not user.is_authenticated:
+        return budgets['anonymous']
+    if user.is_staff or user.is_superuser:
+        return budgets['Admin']
+    return budgets.get(user.role, budgets['anonymous'])
+
+
+def page_size(first):
+    """
+    Items a list field returns: `first`, GRAPHQL_DEFAULT_LIST_SIZE without it and at most
+    GRAPHQL_MAX_LIST_SIZE. Every list resolver slices with it, so costs match what runs.
+    """
+    if first is None:
+        first = settings.GRAPHQL_DEFAULT_LIST_SIZE
+    return max(0, min(first, settings.GRAPHQL_MAX_LIST_SIZE))
+
+
+def list_size(node, variables):
+    """page_size of a list field's `first` argument"""
+    first = None
+    for argument in node.arguments or ():
+        if argument.name.value != 'first':
+            continue
+        value = argument.value
+        if isinstance(value, IntValueNode):
+            first = int(value.value)
+        elif isinstance(value, VariableNode):
+            size = (variables or {}).get(value.name.value)
+            if isinstance(size, int):
+                first = size
+    return page_size(first)
+
+
+class QueryCost:
+    """
+    Static cost of an operation, computed from the document before it runs.
+    A field costs its type's weight (GRAPHQL_TYPE_COSTS, 1 for objects, 0 for scalars)
+    plus its selections, times the number of items for a list field.
+    Introspection fields are free and do not count towards the depth.
+    """
+
+    def __init__(self, schema, fragments, variables):
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables
+
+    def selection_set(self, parent_type, selection_set, depth, visited=frozenset()):
+        """Returns (cost, depth) of the selections made on parent_type"""
+        cost, max_depth = 0, depth
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field_cost, field_depth = self.field(parent_type, selection, depth + 1, visited)
+            elif isinstance(selection, InlineFragmentNode):
+                type_ = self.schema.get_type(selection.type_condition.name.value) if selection.type_condition else None
+                field_cost, field_depth = self.selection_set(type_ or parent_type, selection.selection_set, depth, visited)
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in visited:
+                    continue
+                type_ = self.schema.get_type(fragment.type_condition.name.value)
+                field_cost, field_depth = self.selection_set(type_, fragment.selection_set, depth, visited | {name})
+            else:
+                continue
+            cost += field_cost
+            max_depth = max(max_depth, field_depth)
+        return cost, max_depth
+
+    def field(self, parent_type, node, depth, visited):
+        name = node.name.value
+        fields = getattr(parent_type, 'fields', None) or {}
+        if name.startswith('__') or name not in fields:
+            # introspection, or an unknown field that validation reports
+            return 0, depth - 1
+
+        field_type = get_nullable_type(fields[name].type)
+        multiplier = list_size(node, self.variables) if is_list_type(field_type) else 1
+        named_type = get_named_type(field_type)
+        if node.selection_set is None:
+            return multiplier * settings.GRAPHQL_TYPE_COSTS.get(named_type.name, 0), depth
+
+        weight = settings.GRAPHQL_TYPE_COSTS.get(named_type.name, 1)
+        child_cost, child_depth = self.selection_set(named_type, node.selection_set, depth, visited)
+        return multiplier * (weight + child_cost), child_depth
+
+
+def check_query_cost(request, schema, document, variables, operation_name):
+    """
+    Cost and depth of the operation that will run, kept on request.graphql_cost.
+    Returns the errors for an operation over the depth limit or the user's budget.
+    """
+    operation = get_operation_ast(document, operation_name)
+    root_type = schema.get_root_type(operation.operation) if operation else None
+    if root_type is None:
+        # no single operation to run, execution reports it
+        return []
+    fragments = {
+        definition.name.value: definition for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+    cost, depth = QueryCost(schema, fragments, variables).selection_set(root_type, operation.selection_set, 0)
+    budget = budget_for(request.user)
+    request.graphql_cost = {
+        'requested': cost, 'budget': budget, 'depth': depth, 'maxDepth': settings.GRAPHQL_MAX_DEPTH
+    }
+    if depth > settings.GRAPHQL_MAX_DEPTH:
+        return [GraphQLError(f"Query depth {depth} exceeds the maximum of {settings.GRAPHQL_MAX_DEPTH}.", operation)]
+    if cost > budget:
+        return [GraphQLError(f"Query cost {cost} exceeds the budget of {budget}.", operation)]
+    return []
+
+
+class QueryCostRule(ValidationRule):
+    """
+    Rejects operations deeper than GRAPHQL_MAX_DEPTH or costlier than the
+    requesting user's budget before anything is resolved.
+    """
+    request = None
+    variables = None
+    operation_name = None
+
+    def enter_document(self, node, *args):
+        for error in check_query_cost(self.request, self.context.schema, node, self.variables, self.operation_name):
+            self.report_error(error)
+
+
+def cost_rule(request, variables, operation_name):
+    """QueryCostRule bound to one request, since validation rules are passed as classes"""
+    return type('QueryCostRule', (QueryCostRule,), {
+        'request': request, 'variables': variables, 'operation_name': operation_name
+    })
@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+
+from core.cache import Namespace
+
+
+logger = logging.getLogger(__name__)
+
+# How often a process asks the shared cache whether its copy is still current
+VERSION_CHECK_INTERVAL = 5
+
+namespace = Namespace('core')
+
+
+class ReferenceData:
+    """
+    Process-local copy of a small, rarely changing lookup table.
+    The table is loaded lazily on first use. Writers call invalidate(), which after
+    commit bumps a version key in the shared cache so other workers reload too.
+    """
+
+    def __init__(self, name, loader, check_interval=VERSION_CHECK_INTERVAL):
+        self.name = name
+        self.loader = loader
+        self.check_interval = check_interval
+        self.version_key = namespace.key(f'reference_data:{name}:version')
+        self._value = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _shared_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, 1, timeout=None)
+            version = cache.get(self.version_key, 1)
+        return version
+
+    def get(self):
+        value = self._value
+        if value is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return value
+        with self._lock:
+            version = self._shared_version()
+            if self._value is None or version != self._version:
+                self._value = self.loader()
+                self._version = version
+            self._checked_at = time.monotonic()
+            return self._value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._version = None
+        # other workers reload after the commit, before it they would load the rows as they were
+        transaction.on_commit(self._bump_version)
+
+    def _bump_version(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.add(self.version_key, 1, timeout=None)
+            cache.incr(self.version_key)
+
+
+_registry = {}
+
+
+def register(name, loader, **kwargs):
+    if name in _registry:
+        raise ValueError(f'reference data {name} is already registered')
+    _registry[name] = ReferenceData(name, loader, **kwargs)
+    return _registry[name]
+
+
+def get(name):
+    return _registry[name].get()
+
+
+def warm_up():
+    """Load every registered table, called once when a worker starts"""
+    for name, data in _registry.items():
+        try:
+            data.get()
+        except DatabaseError:
+            logger.warning("Could not warm up reference data %s", name, exc_info=True)
@@ -0,0 +1,47 @@
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# datetimes, dates, times and UUIDs are encoded natively, as DRF's encoder would (UTC as 'Z');
+# report dicts may have int keys (e.g. months)
+OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+# everything else (Decimal as float, lazy strings, querysets, timedelta, ...) goes through DRF's encoder
+_encoder = JSONEncoder()
+
+
+def dumps(data, indent=False):
+    return orjson.dumps(data, default=_encoder.default, option=OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer on orjson. The output matches DRF's renderer except for whitespace
+    when indented (always 2 spaces), NaN and infinity (rendered as null), and U+2028/U+2029,
+    which are left unescaped (valid JSON, and valid JavaScript since ES2019).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        return dumps(data, indent=bool(indent))
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser on orjson for UTF-8 bodies, other encodings fall back to the json module"""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,14 @@
+from rest_framework import serializers
+
+from core.models import ChunkedUpload
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'target', 'object_id', 'filename', 'content_type', 'size', 'offset', 'status']
+        read_only_fields = ['id', 'content_type', 'offset', 'status']
+
+
+class CompleteUploadSerializer(serializers.Serializer):
+    sha256 = serializers.CharField(required=False, max_length=64)
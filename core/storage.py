@@ -0,0 +1,62 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+BLOB_DIR = 'blobs'
+BLOB_TMP_DIR = 'blobs/.tmp'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file once under the sha256 of its bytes: blobs/ab/cd/<digest><ext>.
+    The upload is hashed while it is streamed to a temporary file, so large
+    files are never held in memory. Saving identical bytes again returns the
+    existing name, and a stored blob never changes.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is decided by the content in _save
+        return name
+
+    def blob_name(self, digest, extension):
+        return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()
+        tmp_dir = self.path(BLOB_TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            sha = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as out:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    sha.update(chunk)
+                    out.write(chunk)
+
+            name = self.blob_name(sha.hexdigest(), extension)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(tmp_path)
+                # marks the blob as in use for gc_media_blobs until the reference is saved
+                os.utime(full_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return name
+
+
+blob_storage = ContentAddressedStorage()
@@ -1,3 +1,686 @@
-from django.test import TestCase
+import hashlib
+import importlib
+import io
+import json
+import os
+import shutil
+import smtplib
+import tempfile
+import time
+import uuid
+import zlib
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.mail.backends import locmem
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import clear_url_caches
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.cache import CacheStats, Namespace, TieredCache, remember, remember_stats
+from core.compression import CompressionMiddleware
+from core.db_router import (
+    ReplicaPinMiddleware, ReplicaRouter, _use_replica, is_pinned, pin_to_primary, replica_reads,
+)
+from core.mail import queue_email, send_queued_emails
+from core.models import OutgoingEmail, PersistedQuery
+from core.persisted_queries import clear_cache
+from core.renderers import ORJSONParser, ORJSONRenderer
+from core.throttling import ScopedCacheRateThrottle
+from hotel.models import Hotel
+from hotelManager.models import HotelManager
+from room.models import Room
+
+User = get_user_model()
+
+
+class MediaViewTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_PIPELINE_ASYNC=False)
+        self.settings_override.enable()
+        self.client = APIClient()
+
+        self.owner = User.objects.create_user(email='owner@example.com', password='pass1234')
+        self.other = User.objects.create_user(email='other@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(
+            user=self.owner, national_code='1212121212',
+            verificationFile=SimpleUploadedFile('verify.pdf', b'%PDF dummy', content_type='application/pdf')
+        )
+        self.hotel = Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name="Media", location="Tabriz", description="Desc",
+            image=SimpleUploadedFile('photo.jpg', b'jpeg bytes', content_type='image/jpeg'),
+            hotel_license=SimpleUploadedFile('license.jpg', b'license bytes', content_type='image/jpeg'),
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_public_blob_is_immutable(self):
+        response = self.client.get(self.hotel.image.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'jpeg bytes')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_license_only_for_owner_and_staff(self):
+        url = self.hotel.hotel_license.url
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-store')
+
+        staff = User.objects.create_user(email='staff@example.com', password='pass1234', is_staff=True)
+        self.client.force_authenticate(user=staff)
+        self.assertEqual(self.client.get(self.hotel_manager.verificationFile.url).status_code, 200)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT=True)
+    def test_accel_redirect_hands_off_to_nginx(self):
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get(self.hotel_manager.verificationFile.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['X-Accel-Redirect'], f'/protected-media/{self.hotel_manager.verificationFile.name}'
+        )
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response.content, b'')
+
+    def test_public_media_is_left_to_nginx(self):
+        import bookit.urls
+        # the routes are built on import, put the default ones back afterwards
+        self.addCleanup(clear_url_caches)
+        self.addCleanup(importlib.reload, bookit.urls)
+        with override_settings(MEDIA_ACCEL_REDIRECT=True):
+            importlib.reload(bookit.urls)
+            clear_url_caches()
+            self.assertEqual(self.client.get(self.hotel.image.url).status_code, 404)
+
+            self.client.force_authenticate(user=self.owner)
+            response = self.client.get(self.hotel.hotel_license.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.hotel.hotel_license.name}')
+
+    def test_path_traversal_is_rejected(self):
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/blobs/.tmp/partial').status_code, 404)
+
+
+class ChunkedUploadTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.upload_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, CHUNKED_UPLOAD_DIR=self.upload_dir,
+            CHUNKED_UPLOAD_CHUNK_SIZE=1024, IMAGE_PIPELINE_ASYNC=False
+        )
+        self.settings_override.enable()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='uploader@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='3434343434')
+        self.hotel = Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name="Uploads", location="Rasht", description="Desc"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.content = b'%PDF-1.7\n' + bytes(range(256)) * 10
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+    def start(self, target='hotel_license', object_id=None):
+        response = self.client.post('/upload-api/uploads/', {
+            'target': target, 'object_id': object_id or self.hotel.id,
+            'filename': 'license.pdf', 'size': len(self.content)
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['data']['id']
+
+    def put_chunk(self, upload_id, start, end):
+        return self.client.put(
+            f'/upload-api/uploads/{upload_id}/', self.content[start:end],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end - 1}/{len(self.content)}'
+        )
+
+    def test_resumable_upload_into_hotel_license(self):
+        upload_id = self.start()
+        self.assertEqual(self.put_chunk(upload_id, 0, 1024).status_code, 200)
+
+        # a retried or out of order chunk is told where to resume
+        response = self.put_chunk(upload_id, 2048, 2500)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], 1024)
+
+        self.assertEqual(self.client.get(f'/upload-api/uploads/{upload_id}/').data['data']['offset'], 1024)
+        self.assertEqual(self.put_chunk(upload_id, 1024, 2048).status_code, 200)
+        self.assertEqual(self.put_chunk(upload_id, 2048, len(self.content)).status_code, 200)
+
+        response = self.client.post(f'/upload-api/uploads/{upload_id}/complete/', {
+            'sha256': hashlib.sha256(self.content).hexdigest()
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.hotel.refresh_from_db()
+        self.assertEqual(self.hotel.hotel_license.name, f'hotel/licenses/hotel_{self.hotel.id}_hotel_license.pdf')
+        with self.hotel.hotel_license.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(os.listdir(self.upload_dir), [])
+
+    def test_unsupported_type_rejected_on_first_chunk(self):
+        self.content = b'MZ\x90\x00' + b'\x00' * 100
+        upload_id = self.start()
+        self.assertEqual(self.put_chunk(upload_id, 0, len(self.content)).status_code, 415)
+
+    def test_oversized_chunk_and_foreign_target_rejected(self):
+        upload_id = self.start()
+        self.assertEqual(self.put_chunk(upload_id, 0, 2048).status_code, 413)
+
+        other = User.objects.create_user(email='intruder@example.com', password='pass1234')
+        self.client.force_authenticate(user=other)
+        response = self.client.post('/upload-api/uploads/', {
+            'target': 'hotel_license', 'object_id': self.hotel.id, 'filename': 'x.pdf', 'size': 10
+        }, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get(f'/upload-api/uploads/{upload_id}/').status_code, 404)
+
+    def test_complete_requires_every_chunk(self):
+        upload_id = self.start(target='verification_file')
+        self.put_chunk(upload_id, 0, 1024)
+        response = self.client.post(f'/upload-api/uploads/{upload_id}/complete/', {}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], 1024)
+
+
+class CountingBackend(locmem.EmailBackend):
+    """locmem backend that counts connections and refuses one recipient"""
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if 'bounce@example.com' in message.to:
+                raise smtplib.SMTPRecipientsRefused({'bounce@example.com': (550, b'no such user')})
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='core.tests.CountingBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+class EmailOutboxTest(TestCase):
+    def setUp(self):
+        CountingBackend.opened = 0
+
+    def test_batch_is_sent_over_one_connection(self):
+        for i in range(3):
+            queue_email('Hello', 'Body', [f'guest{i}@example.com'])
+
+        self.assertEqual(send_queued_emails(), (3, 0))
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(OutgoingEmail.objects.filter(status=OutgoingEmail.Status.SENT).count(), 3)
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+    def test_failed_message_backs_off_then_gives_up(self):
+        email = queue_email('Hello', 'Body', ['bounce@example.com'])
+        queue_email('Hello', 'Body', ['guest@example.com'])
+
+        self.assertEqual(send_queued_emails(), (1, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.Status.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_datetime, timezone.now())
+        self.assertIn('no such user', email.last_error)
+
+        # not due yet
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+        OutgoingEmail.objects.filter(pk=email.pk).update(next_attempt_datetime=timezone.now())
+        self.assertEqual(send_queued_emails(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.Status.FAILED)
+
+    def test_rolled_back_transaction_queues_nothing(self):
+        try:
+            with transaction.atomic():
+                queue_email('Hello', 'Body', ['guest@example.com'])
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+
+@mock.patch.object(ScopedCacheRateThrottle, 'THROTTLE_RATES', {'login': '3/min', 'room_search': '2/min'})
+class CacheRateThrottleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.now = 1200.0
+        timer = mock.patch.object(ScopedCacheRateThrottle, 'timer', lambda throttle: self.now)
+        timer.start()
+        self.addCleanup(timer.stop)
+
+    def login(self, ip='10.0.0.1'):
+        return self.client.post('/auth/login/', {'email': 'nobody@example.com'}, REMOTE_ADDR=ip)
+
+    def test_limit_per_ip_with_retry_after(self):
+        for _ in range(3):
+            self.assertNotEqual(self.login().status_code, 429)
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        # the full window has to slide a third of the way out
+        self.assertEqual(response['Retry-After'], '80')
+        self.assertNotEqual(self.login(ip='10.0.0.2').status_code, 429)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        for ip in ('1.1.1.1', '2.2.2.2', '3.3.3.3'):
+            self.client.post('/auth/login/', {'email': 'nobody@example.com'}, HTTP_X_FORWARDED_FOR=ip)
+        response = self.client.post('/auth/login/', {'email': 'nobody@example.com'}, HTTP_X_FORWARDED_FOR='4.4.4.4')
+        self.assertEqual(response.status_code, 429)
+
+    def test_hotel_manager_login_is_limited(self):
+        for _ in range(3):
+            self.assertNotEqual(self.client.post('/hotelManager-api/login/', {'email': 'nobody@example.com'}).status_code, 429)
+        self.assertEqual(self.client.post('/hotelManager-api/login/', {'email': 'nobody@example.com'}).status_code, 429)
+        # the same budget as the customer login
+        self.assertEqual(self.login(ip='127.0.0.1').status_code, 429)
+
+    def test_token_login_shares_the_scope(self):
+        for _ in range(3):
+            self.login()
+        response = self.client.post('/auth/token/login/', {'email': 'x@example.com', 'password': 'x'},
+                                    REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+
+    def test_previous_window_slides_out(self):
+        for _ in range(3):
+            self.login()
+        # half of the previous window still counts: 1.5 requests
+        self.now = 1290.0
+        self.assertNotEqual(self.login().status_code, 429)
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        # 2.5 counted, another 0.5 of the old window has to slide out
+        self.assertEqual(response['Retry-After'], '10')
+        self.now = 1300.0
+        self.assertNotEqual(self.login().status_code, 429)
+
+    def test_authenticated_requests_are_counted_per_user(self):
+        user = User.objects.create_user(email='searcher@example.com', password='pass1234')
+        other = User.objects.create_user(email='other-searcher@example.com', password='pass1234')
+        self.client.force_authenticate(user=user)
+        for _ in range(2):
+            self.assertNotEqual(self.client.post('/room-api/all-rooms/', {}, format='json').status_code, 429)
+        self.assertEqual(self.client.post('/room-api/all-rooms/', {}, format='json').status_code, 429)
+
+        self.client.force_authenticate(user=other)
+        self.assertNotEqual(self.client.post('/room-api/all-rooms/', {}, format='json').status_code, 429)
+
+
+@override_settings(
+    GRAPHQL_MAX_DEPTH=4, GRAPHQL_DEFAULT_LIST_SIZE=10, GRAPHQL_TYPE_COSTS={'ReservationType': 2},
+    GRAPHQL_COST_BUDGETS={'anonymous': 100, 'Customer': 500, 'HotelManager': 1000, 'Admin': 5000}
+)
+class GraphQLCostTest(TestCase):
+    def query(self, query, variables=None):
+        response = self.client.post(
+            '/graphql/', json.dumps({'query': query, 'variables': variables}), content_type='application/json'
+        )
+        return response.status_code, response.json()
+
+    def test_cost_is_reported(self):
+        status_code, body = self.query('{ hotels(first: 5) { name rooms { name } } }')
+        self.assertEqual(status_code, 200)
+        # 5 hotels * (1 + 10 rooms * 1)
+        self.assertEqual(body['extensions']['cost'], {'requested': 55, 'budget': 100, 'depth': 3, 'maxDepth': 4})
+
+    def test_over_budget_query_is_rejected_before_execution(self):
+        query = 'query($n: Int) { hotels(first: $n) { rooms { reservations { status } } } }'
+        with self.assertNumQueries(0):
+            status_code, body = self.query(query, {'n': 50})
+        self.assertEqual(status_code, 400)
+        self.assertNotIn('data', body)
+        # 50 * (1 + 10 * (1 + 10 * 2))
+        self.assertIn('Query cost 10550 exceeds the budget of 100', body['errors'][0]['message'])
+
+    def test_budget_depends_on_role(self):
+        query = '{ hotels(first: 20) { name rooms { name } } }'
+        self.assertEqual(self.query(query)[0], 400)
+        self.client.force_login(User.objects.create_user(email='budget@example.com', password='pass1234'))
+        status_code, body = self.query(query)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(body['extensions']['cost']['budget'], 500)
+
+    def test_depth_counts_fragments(self):
+        query = """
+        query { hotels(first: 1) { ...HotelRooms } }
+        fragment HotelRooms on HotelType { rooms { hotel { rooms { name } } } }
+        """
+        status_code, body = self.query(query)
+        self.assertEqual(status_code, 400)
+        self.assertIn('Query depth 5 exceeds the maximum of 4', body['errors'][0]['message'])
+
+    def test_nested_lists_return_what_is_costed(self):
+        manager = HotelManager.objects.create(
+            user=User.objects.create_user(email='fanout@example.com', password='pass1234'), national_code='4545454545'
+        )
+        hotel = Hotel.objects.create(hotel_manager=manager, name="Fanout", location="Kish", status="Accepted")
+        Room.objects.bulk_create(
+            Room(hotel=hotel, room_number=number, name=f"Room {number}", room_type="Double", price=100)
+            for number in range(12)
+        )
+        status_code, body = self.query(
+            'query($id: ID!) { hotel(id: $id) { rooms { name } few: rooms(first: 2) { name } } }', {'id': hotel.pk}
+        )
+        self.assertEqual(status_code, 200)
+        # 1 hotel + 10 rooms without `first` + 2 rooms
+        self.assertEqual(body['extensions']['cost']['requested'], 13)
+        self.assertEqual(len(body['data']['hotel']['rooms']), 10)
+        self.assertEqual(len(body['data']['hotel']['few']), 2)
+
+        status_code, body = self.query('query($id: ID!) { rooms(hotelId: $id) { name } }', {'id': hotel.pk})
+        self.assertEqual(len(body['data']['rooms']), 10)
+
+    def test_introspection_is_free(self):
+        status_code, body = self.query('{ __schema { types { name fields { name type { name ofType { name } } } } } }')
+        self.assertEqual(status_code, 200)
+        self.assertEqual(body['extensions']['cost']['requested'], 0)
+
+
+class PersistedQueryTest(TestCase):
+    QUERY = 'query Hotels($first: Int) { hotels(first: $first) { name } }\n'
+
+    def setUp(self):
+        clear_cache()
+        self.addCleanup(clear_cache)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        with open(os.path.join(self.directory, 'hotels.graphql'), 'w') as f:
+            f.write(self.QUERY)
+        call_command('register_persisted_queries', self.directory, stdout=io.StringIO())
+        self.sha256 = hashlib.sha256(self.QUERY.encode()).hexdigest()
+
+    def post(self, sha256, variables=None):
+        response = self.client.post('/graphql/', json.dumps({
+            'variables': variables or {'first': 5},
+            'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': sha256}},
+        }), content_type='application/json')
+        return response.status_code, response.json()
+
+    def test_registered_document_is_parsed_once(self):
+        self.assertEqual(PersistedQuery.objects.get().name, 'hotels.graphql')
+        with self.assertNumQueries(2):  # the document, then the hotels
+            status_code, body = self.post(self.sha256)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(body['data'], {'hotels': []})
+        with self.assertNumQueries(1):
+            self.post(self.sha256)
+
+    def test_get_request_and_cost_limits_apply(self):
+        response = self.client.get('/graphql/', {
+            'variables': json.dumps({'first': 1}),
+            'extensions': json.dumps({'persistedQuery': {'version': 1, 'sha256Hash': self.sha256}}),
+        }, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['extensions']['cost']['requested'], 1)
+
+        with override_settings(GRAPHQL_COST_BUDGETS={'anonymous': 10}):
+            status_code, body = self.post(self.sha256, {'first': 50})
+        self.assertEqual(status_code, 400)
+        self.assertIn('exceeds the budget', body['errors'][0]['message'])
+
+    def test_unknown_hash(self):
+        status_code, body = self.post('0' * 64)
+        self.assertEqual(status_code, 400)
+        self.assertEqual(body['errors'][0]['message'], 'PersistedQueryNotFound')
+
+    def test_invalid_document_is_not_registered(self):
+        with open(os.path.join(self.directory, 'broken.graphql'), 'w') as f:
+            f.write('{ hotels { noSuchField } }')
+        with self.assertRaises(CommandError):
+            call_command('register_persisted_queries', self.directory, stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(PersistedQuery.objects.count(), 1)
+
+
+@override_settings(DATABASE_REPLICA='replica')
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(email='replica@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='7171717171')
+        Hotel.objects.create(hotel_manager=self.hotel_manager, name="Replica", location="Tabriz", status="Accepted")
+
+    def request(self, method='get', user=None):
+        request = getattr(self.factory, method)('/')
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_reads_inside_replica_reads_use_the_replica(self):
+        self.assertEqual(self.router.db_for_read(Hotel), 'default')
+        with replica_reads(self.request()):
+            self.assertEqual(self.router.db_for_read(Hotel), 'replica')
+            self.assertEqual(self.router.db_for_write(Hotel), 'default')
+        self.assertEqual(self.router.db_for_read(Hotel), 'default')
+        with replica_reads(self.request('post')):
+            self.assertEqual(self.router.db_for_read(Hotel), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'hotel'))
+
+    @override_settings(DATABASE_REPLICA=None)
+    def test_without_replica_everything_uses_primary(self):
+        with replica_reads(self.request()):
+            self.assertEqual(self.router.db_for_read(Hotel), 'default')
+
+    def test_successful_writes_pin_user_to_primary(self):
+        ReplicaPinMiddleware(lambda request: HttpResponse(status=400))(self.request('post', self.user))
+        self.assertFalse(is_pinned(self.user))
+        ReplicaPinMiddleware(lambda request: HttpResponse(status=201))(self.request('post', self.user))
+        self.assertTrue(is_pinned(self.user))
+        with replica_reads(self.request(user=self.user)):
+            self.assertEqual(self.router.db_for_read(Hotel), 'default')
+
+    def test_catalog_views_read_from_replica(self):
+        seen = []
+
+        def db_for_read(router, model, **hints):
+            seen.append((model._meta.label, _use_replica.get()))
+            return 'default'
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with mock.patch.object(ReplicaRouter, 'db_for_read', db_for_read):
+            self.assertEqual(client.get('/hotel-api/all-hotels/').status_code, 200)
+        self.assertIn(('hotel.Hotel', True), seen)
+        self.assertFalse(_use_replica.get())
+
+        seen.clear()
+        pin_to_primary(self.user)
+        with mock.patch.object(ReplicaRouter, 'db_for_read', db_for_read):
+            self.assertEqual(client.get('/hotel-api/all-hotels/').status_code, 200)
+        self.assertIn(('hotel.Hotel', False), seen)
+        self.assertNotIn(('hotel.Hotel', True), seen)
+
+
+class TieredCacheTest(TestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        self.cache = TieredCache('test', {'OPTIONS': {'L2': 'shared', 'L1_MAX_ENTRIES': 2, 'L1_TIMEOUT': 60}})
+
+    def test_tests_never_share_a_cache_with_other_runs(self):
+        self.assertEqual(type(caches['shared']).__name__, 'LocMemCache')
+
+    def test_l1_serves_copies_and_is_bounded(self):
+        self.cache.set('a', {'rooms': [1]})
+        caches['shared'].delete('a')
+        value = self.cache.get('a')
+        self.assertEqual(value, {'rooms': [1]})
+        value['rooms'].append(2)
+        self.assertEqual(self.cache.get('a'), {'rooms': [1]})
+
+        self.cache.set('b', 2)
+        self.cache.set('c', 3)
+        self.assertEqual(list(self.cache.l1), [('b', None), ('c', None)])
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_writes_and_counters_go_through_to_l2(self):
+        self.cache.set('count', 1)
+        self.assertEqual(self.cache.incr('count'), 2)
+        self.assertEqual(caches['shared'].get('count'), 2)
+        self.assertEqual(self.cache.get('count'), 2)
+        self.assertFalse(self.cache.add('count', 5))
+        self.cache.delete('count')
+        self.assertIsNone(caches['shared'].get('count'))
+        self.assertIsNone(self.cache.get('count'))
+
+    def test_stats_are_shared(self):
+        self.cache.stats.flush_every = 2
+        self.cache.set('a', 1)
+        self.cache.get('a')
+        caches['shared'].set('b', 1)
+        self.cache.get('b')
+        self.cache.get('missing')
+        stats = self.cache.stats.totals(caches['shared'])
+        self.assertEqual(stats, {'l1_hits': 1, 'l2_hits': 1, 'misses': 1})
+        # other workers only see flushed counts
+        self.assertEqual(CacheStats('test').totals(caches['shared']), {'l1_hits': 1, 'l2_hits': 1, 'misses': 0})
+
+    def test_namespaces_write_to_the_shared_cache(self):
+        accounts = Namespace('accounts', version=2)
+        accounts.set('password_reset_a@example.com', '123456')
+        self.assertEqual(caches['shared'].get('accounts:v2:password_reset_a@example.com'), '123456')
+        self.assertIsNone(Namespace('accounts').get('password_reset_a@example.com'))
+        self.assertEqual(accounts.get_many(['password_reset_a@example.com', 'other']),
+                         {'password_reset_a@example.com': '123456'})
+
+
+class RememberTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache = caches['tiered']
+        remember_stats.reset(self.cache.l2)
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return {'calls': self.calls}
+
+    def stats(self):
+        return {event: count for event, count in remember_stats.totals(self.cache.l2).items() if count}
+
+    def test_computes_once(self):
+        self.assertEqual(remember(self.cache, 'report', self.compute, 60), {'calls': 1})
+        self.assertEqual(remember(self.cache, 'report', self.compute, 60), {'calls': 1})
+        self.assertEqual(self.stats(), {'computed': 1})
+
+    def test_waits_for_the_worker_holding_the_lock(self):
+        self.cache.add('report:lock', 1, 10)
+
+        def other_worker_finishes(seconds):
+            self.cache.set('report', ({'calls': 'other'}, 0.1, time.time() + 60), 60)
+
+        with mock.patch('core.cache.time.sleep', other_worker_finishes):
+            self.assertEqual(remember(self.cache, 'report', self.compute, 60), {'calls': 'other'})
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(self.stats(), {'stampedes_avoided': 1})
+
+    def test_computes_when_the_lock_holder_is_too_slow(self):
+        self.cache.add('report:lock', 1, 10)
+        self.assertEqual(remember(self.cache, 'report', self.compute, 60, lock_wait=0.01, poll_interval=0.005),
+                         {'calls': 1})
+        self.assertEqual(self.stats(), {'lock_timeouts': 1})
+
+    def test_refreshes_before_expiry_while_others_read_the_old_value(self):
+        # computed in 10 s and expiring in 1 s: due for an early refresh
+        self.cache.set('report', ({'calls': 'old'}, 10, time.time() + 1), 60)
+        self.cache.add('report:lock', 1, 10)
+        # the early expiry is random; fix the draw so it always falls before expires_at
+        with mock.patch('core.cache.random.random', return_value=0.5):
+            self.assertEqual(remember(self.cache, 'report', self.compute, 60), {'calls': 'old'})
+            self.cache.delete('report:lock')
+            self.assertEqual(remember(self.cache, 'report', self.compute, 60), {'calls': 1})
+        self.assertEqual(self.stats(), {'served_while_refreshing': 1, 'refreshed_early': 1})
+        self.assertIsNone(self.cache.get('report:lock'))
+
+
+class ORJSONRendererTest(TestCase):
+    def test_matches_drf_renderer(self):
+        data = {
+            'price': Decimal('120.50'),
+            'created': datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone.utc),
+            'check_in': date(2024, 5, 1),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'label': gettext_lazy('Hotel'),
+            'stay': timedelta(days=1),
+            'months': {1: 0, 2: 3},
+            'rooms': [{'name': 'Suite', 'discounted_price': '90.00'}],
+        }
+        rendered = ORJSONRenderer().render(data)
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render({**data, 'months': {'1': 0, '2': 3}})))
+        self.assertIn(b'"2024-05-01T12:30:00Z"', rendered)
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+        self.assertIn(b'\n  "price"', ORJSONRenderer().render(data, 'application/json; indent=4'))
+
+    def test_parser(self):
+        self.assertEqual(ORJSONParser().parse(io.BytesIO('{"city": "Sārī"}'.encode())), {'city': 'Sārī'})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"city": '))
+
+    def test_api_uses_orjson(self):
+        response = APIClient().post('/auth/token/login/', '{"email": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTest(TestCase):
+    body = json.dumps({'data': [{'name': f'Room {number}', 'price': '120.00'} for number in range(100)]}).encode()
+
+    def respond(self, response, accept_encoding='gzip, deflate, br'):
+        request = RequestFactory().get('/hotel-api/all-hotels/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        with mock.patch('core.compression.brotli', None):
+            return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzip_above_threshold(self):
+        response = self.respond(HttpResponse(self.body, content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(zlib.decompress(response.content, 31), self.body)
+
+    def test_skipped_responses(self):
+        small = self.respond(HttpResponse(b'{"data": []}', content_type='application/json'))
+        image = self.respond(HttpResponse(self.body, content_type='image/jpeg'))
+        refused = self.respond(HttpResponse(self.body, content_type='application/json'), 'gzip;q=0, identity')
+        for response in (small, image, refused):
+            self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(refused.content, self.body)
+        self.assertEqual(refused['Vary'], 'Accept-Encoding')
+
+    def test_streaming_and_etag(self):
+        chunks = [self.body[:500], self.body[500:]]
+        response = StreamingHttpResponse(iter(chunks), content_type='text/csv')
+        response['ETag'] = '"report"'
+        response = self.respond(response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], 'W/"report"')
+        self.assertEqual(zlib.decompress(b''.join(response.streaming_content), 31), self.body)
@@ -0,0 +1,100 @@
+import math
+
+from rest_framework.throttling import SimpleRateThrottle
+
+from core.cache import Namespace
+
+cache = Namespace('core')
+
+
+class CacheRateThrottle(SimpleRateThrottle):
+    """
+    Sliding window throttle kept in the shared cache with atomic counters.
+    Each client has one counter per fixed window; the previous window counts in
+    proportion to how much of it still overlaps the sliding window. Counters are
+    only changed with add/incr/decr, so workers sharing Redis or Memcached see
+    every request and never overwrite each other (unlike DRF's timestamp lists).
+    Requests are counted per user when authenticated, otherwise per client IP.
+    """
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def window_key(self, window):
+        return f'{self.key}:{window}'
+
+    def increment(self, key):
+        # add() is a no-op when another worker created the counter first
+        cache.add(key, 0, self.duration * 2)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # expired between add and incr
+            cache.add(key, 1, self.duration * 2)
+            return 1
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.elapsed = self.now - window * self.duration
+        current_key = self.window_key(window)
+
+        self.current = self.increment(current_key)
+        self.previous = cache.get(self.window_key(window - 1), 0)
+        if self.estimate(self.elapsed, self.previous, self.current) <= self.num_requests:
+            return True
+
+        # refused requests do not use up the allowance
+        try:
+            cache.decr(current_key)
+        except ValueError:
+            pass
+        self.current -= 1
+        return False
+
+    def estimate(self, elapsed, previous, current):
+        return previous * (1 - elapsed / self.duration) + current
+
+    def wait(self):
+        """Seconds until one more request fits in the window"""
+        allowance = self.num_requests - 1
+        if self.previous and self.current <= allowance:
+            # wait for enough of the previous window to slide out
+            seconds = self.duration * (1 - (allowance - self.current) / self.previous) - self.elapsed
+        else:
+            # the current window is full: it becomes the previous one and has to slide out
+            overlap = 1 - allowance / self.current if self.current else 0
+            seconds = self.duration - self.elapsed + self.duration * overlap
+        return max(1, math.ceil(round(seconds, 3)))
+
+
+class ScopedCacheRateThrottle(CacheRateThrottle):
+    """
+    CacheRateThrottle whose scope comes from the view: `throttle_scopes` maps
+    viewset actions to scopes, `throttle_scope` covers the whole view.
+    Rates are read from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']; unscoped actions are not throttled.
+    """
+
+    def __init__(self):
+        # the scope is only known once the view is
+        pass
+
+    def allow_request(self, request, view):
+        scopes = getattr(view, 'throttle_scopes', {})
+        self.scope = scopes.get(getattr(view, 'action', None), getattr(view, 'throttle_scope', None))
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -0,0 +1,187 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+
+from core.models import ChunkedUpload
+from hotel.models import Hotel
+from hotelManager.models import HotelManager
+
+
+READ_SIZE = 64 * 1024
+
+# leading bytes -> content type
+SIGNATURES = (
+    (b'%PDF-', 'application/pdf'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+)
+EXTENSIONS = {
+    'application/pdf': '.pdf',
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+}
+
+# target -> model file field
+TARGET_FIELDS = {
+    ChunkedUpload.Target.HOTEL_LICENSE: 'hotel_license',
+    ChunkedUpload.Target.VERIFICATION_FILE: 'verificationFile',
+}
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class ChunkedFile(File):
+    """Lets the storage move the assembled file into place instead of copying it"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def sniff(head):
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+def part_path(upload):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{upload.pk}.part')
+
+
+def target_instance(user, target, object_id=None):
+    """The row the finished file is written to, None when the user may not write it"""
+    if target == ChunkedUpload.Target.HOTEL_LICENSE:
+        return Hotel.objects.filter(pk=object_id, hotel_manager__user=user).first()
+    if target == ChunkedUpload.Target.VERIFICATION_FILE:
+        return HotelManager.objects.filter(user=user).first()
+    return None
+
+
+def start_upload(user, target, filename, size, object_id=None):
+    if size <= 0 or size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        raise UploadError(f"size must be between 1 and {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes")
+    if target_instance(user, target, object_id) is None:
+        raise UploadError("target not found", status=404)
+    return ChunkedUpload.objects.create(
+        user=user, target=target, object_id=object_id, filename=os.path.basename(filename), size=size
+    )
+
+
+def parse_content_range(header, total):
+    """'bytes 0-1023/4096' -> (0, 1024), validated against the announced total size"""
+    try:
+        unit, _, rest = header.partition(' ')
+        span, _, declared_total = rest.partition('/')
+        first, _, last = span.partition('-')
+        start, end = int(first), int(last) + 1
+    except ValueError:
+        raise UploadError("invalid Content-Range header")
+    if unit != 'bytes' or declared_total not in ('*', str(total)):
+        raise UploadError("invalid Content-Range header")
+    if start >= end or end > total:
+        raise UploadError("Content-Range is outside the file")
+    if end - start > settings.CHUNKED_UPLOAD_CHUNK_SIZE:
+        raise UploadError(f"chunks are limited to {settings.CHUNKED_UPLOAD_CHUNK_SIZE} bytes", status=413)
+    return start, end
+
+
+def write_chunk(upload, stream, content_range):
+    """
+    Copy one chunk from the request stream to the part file, READ_SIZE bytes at a time.
+    The chunk must start at the current offset; otherwise the client is told where to resume.
+    """
+    if upload.status != ChunkedUpload.Status.UPLOADING:
+        raise UploadError("upload already completed", status=409)
+    start, end = parse_content_range(content_range, upload.size)
+    if start != upload.offset:
+        raise UploadError("chunk does not start at the current offset", status=409, offset=upload.offset)
+
+    path = part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    read = stream.read if stream is not None else (lambda size: b'')
+    expected = end - start
+    received = 0
+    with open(path, 'r+b' if start else 'wb') as part:
+        part.seek(start)
+        while received < expected:
+            data = read(min(READ_SIZE, expected - received))
+            if not data:
+                break
+            if start == 0 and received == 0:
+                # Reject the file from its first bytes, before the rest is sent
+                upload.content_type = sniff(data)
+                if upload.content_type is None:
+                    raise UploadError("unsupported file type, expected PDF, JPEG or PNG", status=415)
+            part.write(data)
+            received += len(data)
+        if read(1):
+            raise UploadError("chunk is longer than its Content-Range")
+    if received != expected:
+        raise UploadError("chunk is shorter than its Content-Range", offset=upload.offset)
+
+    # Only one request may advance the offset from `start`
+    updated = ChunkedUpload.objects.filter(pk=upload.pk, offset=start).update(
+        offset=end, content_type=upload.content_type
+    )
+    if not updated:
+        upload.refresh_from_db()
+        raise UploadError("chunk was written concurrently", status=409, offset=upload.offset)
+    upload.offset = end
+    return upload
+
+
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(READ_SIZE), b''):
+            sha.update(data)
+    return sha.hexdigest()
+
+
+def complete_upload(upload, sha256=None):
+    """Move the assembled file into its model field and mark the upload complete"""
+    if upload.status != ChunkedUpload.Status.UPLOADING:
+        raise UploadError("upload already completed", status=409)
+    if upload.offset != upload.size:
+        raise UploadError("upload is not finished", status=409, offset=upload.offset)
+    path = part_path(upload)
+    if sha256 and file_sha256(path) != sha256.lower():
+        raise UploadError("checksum mismatch")
+
+    field = TARGET_FIELDS[upload.target]
+    extension = EXTENSIONS[upload.content_type]
+    with transaction.atomic():
+        instance = target_instance(upload.user, upload.target, upload.object_id)
+        if instance is None:
+            raise UploadError("target not found", status=404)
+        instance = type(instance).objects.select_for_update().get(pk=instance.pk)
+        field_file = getattr(instance, field)
+        old_name = field_file.name
+        with open(path, 'rb') as part:
+            field_file.save(f'{type(instance).__name__.lower()}_{instance.pk}_{field}{extension}',
+                            ChunkedFile(part), save=False)
+        instance.save()
+        upload.status = ChunkedUpload.Status.COMPLETE
+        upload.save(update_fields=['status', 'modify_datetime'])
+        if old_name and old_name != field_file.name:
+            storage = field_file.storage
+            transaction.on_commit(lambda: storage.delete(old_name))
+
+    if os.path.exists(path):
+        os.remove(path)
+    return instance, field_file
+
+
+def discard_upload(upload):
+    path = part_path(upload)
+    if os.path.exists(path):
+        os.remove(path)
+    upload.delete()
@@ -0,0 +1,13 @@
+from .views import ChunkedUploadViewSet
+from django.urls import path
+
+
+urlpatterns = [
+    path('uploads/', ChunkedUploadViewSet.as_view({'post': 'create'})),
+    path('uploads/<uuid:pk>/', ChunkedUploadViewSet.as_view({
+        'get': 'retrieve',
+        'put': 'upload_chunk',
+        'delete': 'destroy'
+    })),
+    path('uploads/<uuid:pk>/complete/', ChunkedUploadViewSet.as_view({'post': 'complete'})),
+]
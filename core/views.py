@@ -1,3 +1,270 @@
-from django.shortcuts import render
+import mimetypes
+import posixpath
+from urllib.parse import quote
 
-# Create your views here.
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
+from django.shortcuts import get_object_or_404
+from django.views.static import serve
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import HttpError
+from graphene_file_upload.django import FileUploadGraphQLView
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast
+from graphql.validation import specified_rules
+from rest_framework import status, viewsets
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+
+from core.models import ChunkedUpload
+from core.persisted_queries import get_document, requested_hash
+from core.query_cost import check_query_cost, cost_rule
+from core.serializers import ChunkedUploadSerializer, CompleteUploadSerializer
+from core.storage import BLOB_TMP_DIR
+from core.uploads import UploadError, complete_upload, discard_upload, start_upload, write_chunk
+from hotel.models import Hotel
+from hotelManager.models import HotelManager
+
+
+# Content addressed files never change, so browsers and CDNs may keep them forever
+IMMUTABLE_MEDIA = ('blobs/', 'derivatives/')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+PUBLIC_CACHE_CONTROL = 'public, max-age=86400'
+PRIVATE_CACHE_CONTROL = 'private, no-store'
+
+
+def can_read_hotel_license(user, name):
+    return Hotel.objects.filter(hotel_license=name, hotel_manager__user=user).exists()
+
+
+def can_read_verification_file(user, name):
+    return HotelManager.objects.filter(verificationFile=name, user=user).exists()
+
+
+# upload_to prefix -> check(user, name) for files only their owner and staff may read
+PRIVATE_MEDIA = {
+    'hotel/licenses/': can_read_hotel_license,
+    'hotel-manager/verificationFiles/': can_read_verification_file,
+}
+
+
+def clean_media_path(path):
+    """Normalize a requested media path, None when it points outside MEDIA_ROOT"""
+    name = posixpath.normpath(path).lstrip('/')
+    if name in ('', '.') or name == '..' or name.startswith('../'):
+        return None
+    if name.startswith(f'{BLOB_TMP_DIR}/'):
+        return None
+    return name
+
+
+def private_media_check(name):
+    for prefix, check in PRIVATE_MEDIA.items():
+        if name.startswith(prefix):
+            return check
+    return None
+
+
+def can_read_media(user, name):
+    check = private_media_check(name)
+    if check is None:
+        return True
+    if not user.is_authenticated:
+        return False
+    return user.is_staff or check(user, name)
+
+
+def cache_control_for(name):
+    if private_media_check(name) is not None:
+        return PRIVATE_CACHE_CONTROL
+    if name.startswith(IMMUTABLE_MEDIA):
+        return IMMUTABLE_CACHE_CONTROL
+    return PUBLIC_CACHE_CONTROL
+
+
+@swagger_auto_schema(method='get', auto_schema=None)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def media(request, path):
+    """
+    Check access to an uploaded file, then let nginx send it (X-Accel-Redirect).
+    Without nginx (MEDIA_ACCEL_REDIRECT off) the file is streamed by Django.
+    Private files answer 404 to everyone else so their names are not confirmed.
+    """
+    name = clean_media_path(path)
+    if name is None or not can_read_media(request.user, name):
+        raise Http404
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        content_type, encoding = mimetypes.guess_type(name)
+        response = HttpResponse(content_type=content_type or 'application/octet-stream')
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(name)
+    else:
+        response = serve(request, name, document_root=settings.MEDIA_ROOT)
+    response['Cache-Control'] = cache_control_for(name)
+    return response
+
+
+def upload_error_response(error):
+    body = {'error': str(error)}
+    if error.offset is not None:
+        body['offset'] = error.offset
+    return Response(body, status=error.status)
+
+
+class ChunkedUploadViewSet(viewsets.ViewSet):
+    """
+    Resumable uploads for hotel licenses and verification files.
+    POST creates the upload, each PUT appends one chunk (Content-Range header, raw body),
+    GET returns the offset to resume from and POST complete/ stores the file.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_upload(self, request, pk):
+        return get_object_or_404(ChunkedUpload, pk=pk, user=request.user)
+
+    @swagger_auto_schema(
+        request_body=ChunkedUploadSerializer,
+        responses={201: ChunkedUploadSerializer, 400: 'Bad Request', 404: 'Target not found'},
+        operation_description="Start a chunked upload. object_id is the hotel id for hotel_license.",
+        tags=['Upload']
+    )
+    def create(self, request):
+        serializer = ChunkedUploadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            upload = start_upload(request.user, **serializer.validated_data)
+        except UploadError as e:
+            return upload_error_response(e)
+        return Response({'data': ChunkedUploadSerializer(upload).data}, status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        responses={200: ChunkedUploadSerializer, 404: 'Upload not found'},
+        operation_description="Get the upload state; offset is where the next chunk starts.",
+        tags=['Upload']
+    )
+    def retrieve(self, request, pk=None):
+        upload = self.get_upload(request, pk)
+        return Response({'data': ChunkedUploadSerializer(upload).data}, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Content-Range', openapi.IN_HEADER, type=openapi.TYPE_STRING,
+                              description="bytes <first>-<last>/<size>", required=True)
+        ],
+        responses={
+            200: ChunkedUploadSerializer,
+            409: 'Chunk does not start at the current offset',
+            413: 'Chunk too large',
+            415: 'Unsupported file type'
+        },
+        operation_description="Append one chunk, sent as the raw request body.",
+        tags=['Upload']
+    )
+    def upload_chunk(self, request, pk=None):
+        upload = self.get_upload(request, pk)
+        try:
+            write_chunk(upload, request.stream, request.headers.get('Content-Range', ''))
+        except UploadError as e:
+            return upload_error_response(e)
+        return Response({'data': ChunkedUploadSerializer(upload).data}, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        request_body=CompleteUploadSerializer,
+        responses={200: 'File stored', 409: 'Upload not finished'},
+        operation_description="Store the uploaded file, optionally checking its sha256.",
+        tags=['Upload']
+    )
+    def complete(self, request, pk=None):
+        upload = self.get_upload(request, pk)
+        serializer = CompleteUploadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            instance, field_file = complete_upload(upload, serializer.validated_data.get('sha256'))
+        except UploadError as e:
+            return upload_error_response(e)
+        return Response({'data': {
+            'upload': ChunkedUploadSerializer(upload).data,
+            'file': request.build_absolute_uri(field_file.url),
+        }}, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        responses={204: 'Upload discarded', 404: 'Upload not found'},
+        operation_description="Abort an upload and delete its chunks.",
+        tags=['Upload']
+    )
+    def destroy(self, request, pk=None):
+        discard_upload(self.get_upload(request, pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CostLimitedGraphQLView(FileUploadGraphQLView):
+    """
+    GraphQL endpoint that checks the static cost and depth of each operation
+    against the user's budget before executing it, and reports the cost
+    under `extensions.cost` in the response.
+    Persisted queries (extensions.persistedQuery.sha256Hash instead of a query) run
+    from a document parsed and validated once per process.
+    """
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        query_hash = requested_hash(request.GET.get('extensions') or data.get('extensions'))
+        if query_hash is not None:
+            return self.execute_persisted_query(request, query_hash, variables, operation_name)
+        # a view instance serves one request, so the rules can be bound to it
+        self.validation_rules = (*specified_rules, cost_rule(request, variables, operation_name))
+        return super().execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+
+    def execute_persisted_query(self, request, query_hash, variables, operation_name):
+        schema = self.schema.graphql_schema
+        try:
+            document = get_document(schema, query_hash)
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if request.method.lower() == 'get' and operation_ast is not None \
+                and operation_ast.operation != OperationType.QUERY:
+            raise HttpError(HttpResponseNotAllowed(
+                ['POST'], f"Can only perform a {operation_ast.operation.value} operation from a POST request."
+            ))
+
+        errors = check_query_cost(request, schema, document, variables, operation_name)
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        execute_options = {
+            'root_value': self.get_root_value(request),
+            'context_value': self.get_context(request),
+            'variable_values': variables,
+            'operation_name': operation_name,
+            'middleware': self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            execute_options['execution_context_class'] = self.execution_context_class
+        try:
+            # same atomic mutation handling as GraphQLView
+            if operation_ast is not None and operation_ast.operation == OperationType.MUTATION and (
+                graphene_settings.ATOMIC_MUTATIONS is True
+                or connection.settings_dict.get('ATOMIC_MUTATIONS', False) is True
+            ):
+                with transaction.atomic():
+                    result = execute(schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+            return execute(schema, document, **execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    def json_encode(self, request, d, pretty=False):
+        cost = getattr(request, 'graphql_cost', None)
+        if cost is not None:
+            d['extensions'] = {'cost': cost}
+        return super().json_encode(request, d, pretty)
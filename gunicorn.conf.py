@@ -0,0 +1,21 @@
+# Gunicorn settings, read from the environment so one image serves either mode.
+# GUNICORN_MODE=wsgi (default) runs sync workers on bookit.wsgi,
+# GUNICORN_MODE=asgi runs uvicorn workers on bookit.asgi, where the async endpoints
+# (hotel-api/async/..., room-api/async/..., reviews/async/...) wait on the database
+# without holding a worker each.
+import multiprocessing
+import os
+
+mode = os.environ.get('GUNICORN_MODE', 'wsgi').lower()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+if mode == 'asgi':
+    wsgi_app = 'bookit.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'bookit.wsgi:application'
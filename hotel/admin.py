@@ -2,7 +2,7 @@ from django.contrib import admin
 from bookit.settings import SERVER_URL, MEDIA_URL
 from django.utils.html import format_html
 
-from hotel.models import Hotel
+from hotel.models import Hotel, FACILITY_LABELS, mask_to_facilities
 
 
 @admin.action(description='Verify selected hotels')
@@ -35,7 +35,10 @@ class HotelAdmin(admin.ModelAdmin):
 
     actions = [verify_hotels]
 
-    list_display = ['name', 'description', 'location', 'status', 'image_tag', 'hotel_license_tag']
+    list_display = ['name', 'description', 'location', 'status', 'facilities_tag', 'image_tag', 'hotel_license_tag']
+
+    def facilities_tag(self, obj):
+        return ", ".join(FACILITY_LABELS[facility] for facility in mask_to_facilities(obj.facility_mask))
 
     def image_tag(self, obj):
         if obj.image:
@@ -57,5 +60,7 @@ class HotelAdmin(admin.ModelAdmin):
             )
         return "No hotel_license"
 
+    facilities_tag.short_description = 'Facilities'
+
 
 admin.site.register(Hotel, HotelAdmin)
\ No newline at end of file
@@ -0,0 +1,18 @@
+from django.conf import settings
+
+from core.cache import Namespace
+
+cache = Namespace('hotel', alias='tiered')
+
+
+def remember_for_hotel(hotel_id, name, compute):
+    """
+    compute() cached for HOTEL_CACHE_TIMEOUT seconds under the hotel's current generation,
+    so invalidate_hotel drops every entry of the hotel at once
+    """
+    generation = cache.generation(f'hotel:{hotel_id}')
+    return cache.remember(f'{name}:{hotel_id}:g{generation}', compute, settings.HOTEL_CACHE_TIMEOUT)
+
+
+def invalidate_hotel(hotel_id):
+    cache.bump(f'hotel:{hotel_id}')
@@ -0,0 +1,59 @@
+from core import reference_data
+from hotel.models import Facility, HotelFacility
+
+
+def _load_facility_ids():
+    mapping = {}
+    for facility_id, facility_type in HotelFacility.objects.order_by('id').values_list('id', 'facility_type'):
+        mapping.setdefault(facility_type, facility_id)
+    return mapping
+
+
+# facility_type -> HotelFacility id
+facility_ids = reference_data.register('hotel_facilities', _load_facility_ids)
+
+
+def facility_id_map():
+    return facility_ids.get()
+
+
+def invalidate_facility_map():
+    facility_ids.invalidate()
+
+
+def normalize_facility_name(name):
+    """Accept the stored value ('Wi-Fi') as well as the enum member name ('WIFI')"""
+    name = name.strip()
+    if name not in Facility.values and name in Facility.names:
+        return Facility[name].value
+    return name
+
+
+def facility_names_from(data):
+    """Facility names from request data: repeated keys and/or comma separated values"""
+    if hasattr(data, 'getlist'):
+        values = data.getlist('facilities')
+    else:
+        values = data.get('facilities') or []
+        if isinstance(values, str):
+            values = [values]
+    names = []
+    for value in values:
+        names.extend(normalize_facility_name(name) for name in str(value).split(",") if name.strip())
+    return names
+
+
+def resolve_facility_ids(names):
+    """Map facility names to ids, unknown names are ignored"""
+    mapping = facility_id_map()
+    return list(dict.fromkeys(mapping[name] for name in names if name in mapping))
+
+
+def ensure_facilities(names):
+    """Create the missing facility rows in one query, using the cached map to find them"""
+    mapping = facility_id_map()
+    missing = [name for name in dict.fromkeys(names) if name not in mapping]
+    if missing:
+        HotelFacility.objects.bulk_create([HotelFacility(facility_type=name) for name in missing])
+        invalidate_facility_map()
+    return missing
@@ -0,0 +1,348 @@
+import math
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+
+from core.cache import Namespace
+from core.reference_data import VERSION_CHECK_INTERVAL
+from hotel.models import Hotel
+
+# without L1, so a bump reaches every worker at once
+cache = Namespace('hotel')
+VERSION_KEY = 'search_index:version'
+
+
+FIELD_WEIGHTS = {
+    'name': 3,
+    'location': 2,
+    'facilities': 1,
+    'description': 1,
+}
+
+FILE_MAGIC = b'BKIX'
+FILE_VERSION = 2
+
+_WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def tokenize(text):
+    return _WORD_RE.findall((text or '').lower())
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index over accepted hotels.
+    postings: term -> {hotel_id: weighted term frequency}
+    """
+
+    def __init__(self, snapshot=None):
+        self.snapshot = snapshot
+        # shared version the index is current for, see get_index()
+        self.version = snapshot[-1] if snapshot else None
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}
+        self.doc_facilities = {}
+        self.facility_postings = defaultdict(set)
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def add(self, hotel_id, name, location, description, facilities=()):
+        with self.lock:
+            self.remove(hotel_id)
+            facilities = frozenset(facilities)
+            weights = defaultdict(int)
+            fields = {
+                'name': name,
+                'location': location,
+                'description': description,
+                'facilities': ' '.join(facilities),
+            }
+            for field, text in fields.items():
+                for term in tokenize(text):
+                    weights[term] += FIELD_WEIGHTS[field]
+
+            for term, weight in weights.items():
+                self.postings[term][hotel_id] = weight
+            self.doc_terms[hotel_id] = frozenset(weights)
+            self.doc_facilities[hotel_id] = facilities
+            for facility in facilities:
+                self.facility_postings[facility].add(hotel_id)
+
+    def remove(self, hotel_id):
+        with self.lock:
+            for term in self.doc_terms.pop(hotel_id, ()):
+                docs = self.postings.get(term)
+                if docs is not None:
+                    docs.pop(hotel_id, None)
+                    if not docs:
+                        del self.postings[term]
+            for facility in self.doc_facilities.pop(hotel_id, ()):
+                ids = self.facility_postings.get(facility)
+                if ids is not None:
+                    ids.discard(hotel_id)
+                    if not ids:
+                        del self.facility_postings[facility]
+
+    def set_facilities(self, hotel_id, facilities):
+        with self.lock:
+            doc_terms = self.doc_terms.get(hotel_id)
+            if doc_terms is None:
+                return
+            old = self.doc_facilities[hotel_id]
+            facilities = frozenset(facilities)
+            if old == facilities:
+                return
+            weights = {term: self.postings[term][hotel_id] for term in doc_terms}
+            for term in tokenize(' '.join(old)):
+                weights[term] -= FIELD_WEIGHTS['facilities']
+            for term in tokenize(' '.join(facilities)):
+                weights[term] = weights.get(term, 0) + FIELD_WEIGHTS['facilities']
+
+            for term in doc_terms:
+                self.postings[term].pop(hotel_id, None)
+                if not self.postings[term]:
+                    del self.postings[term]
+            weights = {term: weight for term, weight in weights.items() if weight > 0}
+            for term, weight in weights.items():
+                self.postings[term][hotel_id] = weight
+            self.doc_terms[hotel_id] = frozenset(weights)
+
+            for facility in old - facilities:
+                self.facility_postings[facility].discard(hotel_id)
+                if not self.facility_postings[facility]:
+                    del self.facility_postings[facility]
+            for facility in facilities - old:
+                self.facility_postings[facility].add(hotel_id)
+            self.doc_facilities[hotel_id] = facilities
+
+    def search(self, query, operator='and', facilities=None, limit=None):
+        """
+        Return hotel ids ordered by tf-idf score.
+        operator: 'and' requires every term, 'or' requires any term.
+        facilities: hotels must have all of these facilities.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self.lock:
+            total = len(self.doc_terms)
+            postings = [self.postings.get(term, {}) for term in terms]
+
+            if facilities:
+                facility_sets = sorted(
+                    (self.facility_postings.get(f, set()) for f in facilities), key=len
+                )
+                allowed = set(facility_sets[0]).intersection(*facility_sets[1:])
+            else:
+                allowed = None
+
+            if not terms:
+                candidates = allowed if allowed is not None else set(self.doc_terms)
+            elif operator == 'or':
+                candidates = set().union(*postings)
+            else:
+                ordered = sorted(postings, key=len)
+                candidates = set(ordered[0]).intersection(*ordered[1:])
+            if allowed is not None:
+                candidates &= allowed
+
+            scores = {}
+            for docs in postings:
+                if not docs:
+                    continue
+                idf = math.log(1 + total / len(docs))
+                for hotel_id in candidates.intersection(docs):
+                    scores[hotel_id] = scores.get(hotel_id, 0.0) + docs[hotel_id] * idf
+
+        ranked = sorted(candidates, key=lambda hotel_id: (-scores.get(hotel_id, 0.0), hotel_id))
+        return ranked[:limit] if limit is not None else ranked
+
+    def dump(self, path):
+        """Write the index atomically as zlib-compressed pickle with a small header"""
+        with self.lock:
+            payload = (
+                self.snapshot,
+                {term: dict(docs) for term, docs in self.postings.items()},
+                self.doc_facilities,
+            )
+            data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.hotels-index-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(FILE_MAGIC + bytes([FILE_VERSION]) + data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        if raw[:4] != FILE_MAGIC or raw[4] != FILE_VERSION:
+            raise ValueError('unsupported hotel index file')
+        snapshot, postings, doc_facilities = pickle.loads(zlib.decompress(raw[5:]))
+
+        index = cls(snapshot)
+        doc_terms = defaultdict(set)
+        for term, docs in postings.items():
+            index.postings[term] = docs
+            for hotel_id in docs:
+                doc_terms[hotel_id].add(term)
+        index.doc_terms = {hotel_id: frozenset(terms) for hotel_id, terms in doc_terms.items()}
+        index.doc_facilities = doc_facilities
+        for hotel_id, facilities in doc_facilities.items():
+            index.doc_terms.setdefault(hotel_id, frozenset())
+            for facility in facilities:
+                index.facility_postings[facility].add(hotel_id)
+        return index
+
+
+def shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_version():
+    """Mark the index of every worker stale, returns the new version"""
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        return cache.incr(VERSION_KEY)
+
+
+def database_snapshot(version):
+    """
+    Cheap fingerprint used to tell whether a persisted index is stale. Facility changes
+    and queryset updates leave modify_datetime alone, the facility masks and the shared
+    version catch those.
+    """
+    stats = Hotel.objects.aggregate(
+        count=Count('id'), last_modified=Max('modify_datetime'), facility_masks=Sum('facility_mask')
+    )
+    return stats['count'], stats['last_modified'], stats['facility_masks'] or 0, version
+
+
+def hotel_facilities(hotel_ids=None):
+    through = Hotel.facilities.through.objects.all()
+    if hotel_ids is not None:
+        through = through.filter(hotel_id__in=hotel_ids)
+    facilities = defaultdict(set)
+    for hotel_id, facility_type in through.values_list('hotel_id', 'hotelfacility__facility_type'):
+        facilities[hotel_id].add(facility_type)
+    return facilities
+
+
+def build_index(version=None):
+    # the version is read before the rows, a change made meanwhile bumps it again
+    index = InvertedIndex(database_snapshot(shared_version() if version is None else version))
+    rows = Hotel.objects.filter(status="Accepted").values_list('id', 'name', 'location', 'description')
+    facilities = hotel_facilities()
+    for hotel_id, name, location, description in rows:
+        index.add(hotel_id, name, location, description, facilities.get(hotel_id, ()))
+    return index
+
+
+def index_path():
+    return settings.HOTEL_SEARCH_INDEX_PATH
+
+
+def load_or_build(version):
+    """The persisted index when its snapshot still matches the database, a new one otherwise"""
+    path = index_path()
+    if os.path.exists(path):
+        try:
+            index = InvertedIndex.load(path)
+        except (OSError, ValueError, pickle.UnpicklingError, zlib.error):
+            index = None
+        if index is not None and index.snapshot == database_snapshot(version):
+            return index
+    index = build_index(version)
+    try:
+        index.dump(path)
+    except OSError:
+        pass
+    return index
+
+
+_index = None
+_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """
+    Return the process-wide index. Every VERSION_CHECK_INTERVAL seconds the shared
+    version is checked, and the index is reloaded when another worker changed a hotel.
+    """
+    global _index, _checked_at
+    index = _index
+    if index is not None and time.monotonic() - _checked_at < VERSION_CHECK_INTERVAL:
+        return index
+    with _index_lock:
+        version = shared_version()
+        if _index is None or _index.version != version:
+            _index = load_or_build(version)
+        _checked_at = time.monotonic()
+        return _index
+
+
+def reset_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def _publish(change):
+    """
+    After commit, apply change to the loaded index (if any) and bump the shared version.
+    The index keeps up with the new version only when no other worker bumped it meanwhile,
+    otherwise it is reloaded on the next check.
+    """
+    def apply():
+        version = bump_version()
+        index = _index
+        if index is None:
+            return
+        with index.lock:
+            current = index.version == version - 1
+            change(index)
+            if current:
+                index.version = version
+    transaction.on_commit(apply)
+
+
+def update_hotel(hotel):
+    """Apply a saved hotel to the loaded index"""
+    def change(index):
+        if hotel.status != "Accepted" or hotel.is_delete:
+            index.remove(hotel.id)
+            return
+        facilities = hotel_facilities([hotel.id]).get(hotel.id, ())
+        index.add(hotel.id, hotel.name, hotel.location, hotel.description, facilities)
+    _publish(change)
+
+
+def remove_hotel(hotel_id):
+    _publish(lambda index: index.remove(hotel_id))
+
+
+def update_hotel_facilities(hotel_id):
+    _publish(lambda index: index.set_facilities(hotel_id, hotel_facilities([hotel_id]).get(hotel_id, ())))
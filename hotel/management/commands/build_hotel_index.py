@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hotel.inverted_index import build_index, index_path
+
+
+class Command(BaseCommand):
+    help = "Build the in-process hotel search index and persist it for fast worker boot"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = build_index()
+        path = index_path()
+        index.dump(path)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index)} hotels ({len(index.postings)} terms) into {path} in {elapsed:.0f} ms"
+        ))
@@ -0,0 +1,17 @@
+from django.db.models import F
+
+from hotel.models import facilities_to_mask
+
+
+def filter_by_facilities(queryset, facilities_all=None, facilities_any=None, field='facility_mask'):
+    """
+    Filter on the facility bitmask column instead of joining the facilities table.
+    field is the path to the mask, e.g. 'hotel__facility_mask' for rooms.
+    """
+    if facilities_all:
+        mask = facilities_to_mask(facilities_all)
+        queryset = queryset.alias(_facilities_all=F(field).bitand(mask)).filter(_facilities_all=mask)
+    if facilities_any:
+        mask = facilities_to_mask(facilities_any)
+        queryset = queryset.alias(_facilities_any=F(field).bitand(mask)).exclude(_facilities_any=0)
+    return queryset
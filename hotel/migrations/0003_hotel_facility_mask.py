@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:03
+
+from django.db import migrations, models
+
+
+FACILITIES = [
+    'Wi-Fi', 'Parking', 'Restaurant', 'CoffeShop', 'Room Service', 'Laundry Service',
+    'Support Agent', 'Elevator', 'Safebox', 'TV', 'FreeBreakFast', 'Meeting Room',
+    'Child Care', 'Pool', 'Gym', 'Taxi', 'Pets Allowed', 'Shopping Mall',
+]
+
+
+def backfill_facility_mask(apps, schema_editor):
+    Hotel = apps.get_model('hotel', 'Hotel')
+    bits = {facility: 1 << position for position, facility in enumerate(FACILITIES)}
+    masks = {}
+    rows = Hotel.facilities.through.objects.values_list('hotel_id', 'hotelfacility__facility_type')
+    for hotel_id, facility_type in rows:
+        masks[hotel_id] = masks.get(hotel_id, 0) | bits.get(facility_type, 0)
+    for hotel_id, mask in masks.items():
+        Hotel.objects.filter(pk=hotel_id).update(facility_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0002_hotel_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='facility_mask',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Bitmask of facilities, kept in sync with the facilities M2M'),
+        ),
+        migrations.RunPython(backfill_facility_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0003_hotel_facility_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
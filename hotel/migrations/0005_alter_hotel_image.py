@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:08
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0004_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hotel',
+            name='image',
+            field=models.ImageField(storage=core.storage.ContentAddressedStorage(), upload_to='hotel/images/'),
+        ),
+    ]
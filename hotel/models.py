@@ -1,5 +1,6 @@
 from django.db import models
 from core.models import BaseModel
+from core.storage import blob_storage
 from hotelManager.models import HotelManager
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -24,6 +25,36 @@ class Facility(models.TextChoices):
     shoppingMall = "Shopping Mall", "Shopping Mall"
 
 
+# Bit position of every facility in Hotel.facility_mask.
+# Positions follow the declaration order above, so new facilities must be appended.
+FACILITY_BITS = {facility: 1 << position for position, facility in enumerate(Facility.values)}
+FACILITY_LABELS = dict(Facility.choices)
+
+
+def parse_facilities(value):
+    """Accept a list or a comma separated string of facility names, raise ValueError on unknown names"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    facilities = [name.strip() for name in value if name and name.strip()]
+    unknown = [name for name in facilities if name not in FACILITY_BITS]
+    if unknown:
+        raise ValueError(f"Unknown facilities: {', '.join(unknown)}")
+    return facilities
+
+
+def facilities_to_mask(facilities):
+    mask = 0
+    for facility in facilities:
+        mask |= FACILITY_BITS.get(facility, 0)
+    return mask
+
+
+def mask_to_facilities(mask):
+    return [facility for facility, bit in FACILITY_BITS.items() if mask & bit]
+
+
 class Status(models.TextChoices):
     ACCEPTED = 'Accepted', 'Accepted'
     REJECTED = 'Rejected', 'Rejected'
@@ -40,8 +71,11 @@ class Hotel(BaseModel):
     name = models.CharField(max_length=100)
     location = models.TextField()
     description = models.TextField()
-    image = models.ImageField(upload_to='hotel/images/')
+    image = models.ImageField(upload_to='hotel/images/', storage=blob_storage)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     facilities = models.ManyToManyField('HotelFacility', blank=True)
+    facility_mask = models.PositiveIntegerField(default=0, editable=False,
+                                                help_text="Bitmask of facilities, kept in sync with the facilities M2M")
     hotel_iban_number = models.CharField(max_length=24, blank=True)
     rate =  models.PositiveSmallIntegerField(default=0)
     rate_number = models.IntegerField(default=0)
@@ -62,6 +96,16 @@ class Hotel(BaseModel):
     discount_start_date = models.DateTimeField(null=True, blank=True)
     discount_end_date = models.DateTimeField(null=True, blank=True)
 
+    def save(self, *args, **kwargs):
+        # facility_mask is written only by the facilities signal (hotel.signals.sync_facility_mask),
+        # so saving an instance loaded before a facilities change does not put the old mask back
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'facility_mask'
+            ]
+        super().save(*args, **kwargs)
+
 
 class HotelFacility(models.Model):
 
@@ -0,0 +1,34 @@
+from django.utils import timezone
+
+from accounts.models import User
+from core.mail import queue_bulk_email
+
+
+def future_guest_emails(hotel_id, after=None):
+    """
+    Emails of customers holding a confirmed reservation at the hotel that has not started yet,
+    ordered, from after `after`
+    """
+    emails = User.objects.filter(
+        reservation__room__hotel_id=hotel_id,
+        reservation__status='confirmed',
+        reservation__check_in_date__gte=timezone.localdate(),
+        is_active=True,
+    )
+    if after is not None:
+        emails = emails.filter(email__gt=after)
+    return emails.values_list('email', flat=True).distinct().order_by('email')
+
+
+def notify_discount(hotel):
+    """
+    Queue one bulk job telling the hotel's future guests about its discount, in the caller's
+    transaction; the outbox worker reads the guests and sends the messages
+    """
+    return queue_bulk_email(
+        f'{hotel.name} has a new discount for your stay',
+        'discount_notification.txt',
+        {'hotel': hotel},
+        'hotel.notifications.future_guest_emails',
+        {'hotel_id': hotel.id},
+    )
@@ -1,14 +1,72 @@
 # hotel/schema.py
 import graphene
 from graphene_file_upload.scalars import Upload
-from hotel.models import Hotel, HotelFacility
+from core import loaders
+from core.query_cost import page_size
+from hotel.models import Hotel, HotelFacility, Status
 from hotel.serializers import HotelSerializer
+from hotel.facilities import normalize_facility_name, resolve_facility_ids
 from graphene_django.types import DjangoObjectType
 
+def load_hotels(request, keys):
+    return Hotel.objects.in_bulk(keys)
+
+
+def load_hotel_facilities(request, keys):
+    links = loaders.first_per_group(
+        Hotel.facilities.through.objects.filter(hotel_id__in=keys).select_related('hotelfacility'),
+        'hotel_id', ('hotelfacility_id',)
+    )
+    return {hotel_id: [link.hotelfacility for link in group] for hotel_id, group in links.items()}
+
+
+loaders.register('hotel', load_hotels, parents={
+    'room': lambda room: room.hotel_id,
+    'review': lambda review: review.hotel_id,
+}, child='hotel', identity=True)
+loaders.register('hotel_facilities', load_hotel_facilities, parents={'hotel': lambda hotel: hotel.pk}, many=True)
+
+
+class FacilityType(DjangoObjectType):
+    class Meta:
+        model = HotelFacility
+        fields = ['id', 'facility_type']
+
+
+# Relations are read through per-request DataLoaders, one query per level
 class HotelType(DjangoObjectType):
+    facilities = graphene.List(graphene.NonNull(FacilityType), first=graphene.Int())
+    rooms = graphene.List(graphene.NonNull('room.schema.RoomType'), first=graphene.Int())
+    reviews = graphene.List(graphene.NonNull('review.schema.ReviewType'), first=graphene.Int())
+
     class Meta:
         model = Hotel
-        fields = '__all__'
+        # the license, IBAN and the users who saved the hotel are not public
+        exclude = ['hotel_license', 'hotel_iban_number', 'favorited_by']
+
+    def resolve_facilities(self, info, first=None):
+        return loaders.load(info, 'hotel_facilities', self.pk)[:page_size(first)]
+
+    def resolve_rooms(self, info, first=None):
+        return loaders.load(info, 'hotel_rooms', self.pk)[:page_size(first)]
+
+    def resolve_reviews(self, info, first=None):
+        return loaders.load(info, 'hotel_reviews', self.pk)[:page_size(first)]
+
+
+class HotelQuery(graphene.ObjectType):
+    hotels = graphene.List(graphene.NonNull(HotelType), location=graphene.String(), first=graphene.Int())
+    hotel = graphene.Field(HotelType, id=graphene.ID(required=True))
+
+    def resolve_hotels(self, info, location=None, first=None):
+        hotels = Hotel.objects.filter(status=Status.ACCEPTED).order_by('id')
+        if location:
+            hotels = hotels.filter(location__istartswith=location)
+        return loaders.queue(info, 'hotel', hotels[:page_size(first)])
+
+    def resolve_hotel(self, info, id):
+        hotel = Hotel.objects.filter(status=Status.ACCEPTED, pk=id).first()
+        return loaders.queue(info, 'hotel', [hotel])[0] if hotel else None
 
 class CreateHotel(graphene.Mutation):
     class Arguments:
@@ -44,7 +102,10 @@ class CreateHotel(graphene.Mutation):
 
         serializer = HotelSerializer(data=data, context={'request': info.context})
         if serializer.is_valid():
-            hotel = serializer.save()
+            hotel = serializer.save(hotel_manager=user.hotelmanager)
+            facility_ids = resolve_facility_ids(normalize_facility_name(name) for name in facilities or [])
+            if facility_ids:
+                hotel.facilities.set(facility_ids)
             return CreateHotel(hotel=hotel, message="Hotel created successfully.")
         else:
             raise Exception(serializer.errors)
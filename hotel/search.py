@@ -0,0 +1,157 @@
+import re
+import threading
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Greatest
+
+from hotel.models import Hotel
+
+
+SIMILARITY_THRESHOLD = 0.3       # same default as pg_trgm.similarity_threshold
+WORD_SIMILARITY_THRESHOLD = 0.6  # same default as pg_trgm.word_similarity_threshold
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+_WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def trigrams(text):
+    """Split text into trigrams the way pg_trgm does (lowercase, per word, padded)"""
+    grams = set()
+    for word in _WORD_RE.findall((text or '').lower()):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def similarity(query_grams, field_grams):
+    if not query_grams or not field_grams:
+        return 0.0
+    shared = len(query_grams & field_grams)
+    return shared / (len(query_grams) + len(field_grams) - shared)
+
+
+def word_similarity(query_grams, field_grams):
+    """Share of the query trigrams found in the field, used for long descriptions"""
+    if not query_grams or not field_grams:
+        return 0.0
+    return len(query_grams & field_grams) / len(query_grams)
+
+
+class NgramIndex:
+    """
+    Pure-Python trigram index over accepted hotels.
+    Used when the database is not PostgreSQL (e.g. SQLite test runs).
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(set)
+        self.documents = {}
+
+    def add(self, hotel_id, name, location, description):
+        self.remove(hotel_id)
+        doc = {
+            'name': trigrams(name),
+            'location': trigrams(location),
+            'description': trigrams(description),
+        }
+        self.documents[hotel_id] = doc
+        for grams in doc.values():
+            for gram in grams:
+                self.postings[gram].add(hotel_id)
+
+    def remove(self, hotel_id):
+        doc = self.documents.pop(hotel_id, None)
+        if doc is None:
+            return
+        for grams in doc.values():
+            for gram in grams:
+                ids = self.postings.get(gram)
+                if ids is not None:
+                    ids.discard(hotel_id)
+                    if not ids:
+                        del self.postings[gram]
+
+    def search(self, query):
+        """Return [(hotel_id, score)] ordered by descending score"""
+        query_grams = trigrams(query)
+        candidates = set()
+        for gram in query_grams:
+            candidates |= self.postings.get(gram, set())
+
+        results = []
+        for hotel_id in candidates:
+            doc = self.documents[hotel_id]
+            name_score = similarity(query_grams, doc['name'])
+            location_score = similarity(query_grams, doc['location'])
+            description_score = word_similarity(query_grams, doc['description'])
+            if (name_score < SIMILARITY_THRESHOLD
+                    and location_score < SIMILARITY_THRESHOLD
+                    and description_score < WORD_SIMILARITY_THRESHOLD):
+                continue
+            results.append((hotel_id, max(name_score, location_score, description_score)))
+
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_ngram_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = NgramIndex()
+            rows = Hotel.objects.filter(status="Accepted").values_list(
+                'id', 'name', 'location', 'description'
+            )
+            for row in rows:
+                index.add(*row)
+            _index = index
+        return _index
+
+
+def invalidate_ngram_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def fuzzy_search_hotels(query, limit=DEFAULT_LIMIT, offset=0):
+    """
+    Rank accepted hotels by trigram similarity of name, location and description.
+    Returns a list of hotels, each with a `similarity` attribute.
+    """
+    queryset = Hotel.objects.filter(status="Accepted").prefetch_related('rooms')
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+
+        # The % and %> operators are served by the gin_trgm_ops indexes
+        hotels = queryset.filter(
+            Q(name__trigram_similar=query)
+            | Q(location__trigram_similar=query)
+            | Q(description__trigram_word_similar=query)
+        ).annotate(
+            similarity=Greatest(
+                TrigramSimilarity('name', query),
+                TrigramSimilarity('location', query),
+                TrigramWordSimilarity(query, 'description'),
+            )
+        ).order_by('-similarity', 'id')
+        return list(hotels[offset:offset + limit])
+
+    ranked = get_ngram_index().search(query)[offset:offset + limit]
+    hotels = queryset.in_bulk([hotel_id for hotel_id, _ in ranked])
+    results = []
+    for hotel_id, score in ranked:
+        hotel = hotels.get(hotel_id)
+        if hotel is not None:
+            hotel.similarity = score
+            results.append(hotel)
+    return results
@@ -1,19 +1,22 @@
 from rest_framework import serializers
-from hotel.models import Hotel, Facility
+from hotel.models import Hotel, FACILITY_LABELS, mask_to_facilities
 from django.utils import timezone
 from .models import DiscountStatus
+from core.image_pipeline import thumbnail_url, variant_urls
 
 
 class HotelSerializer(serializers.ModelSerializer):
 
-    facilities = serializers.CharField(source='facilities.name', read_only=True)
+    facilities = serializers.SerializerMethodField()
     total_rooms = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Hotel
         fields = ['id', 'name', 'location', 'description', 'facilities',
-                 'hotel_iban_number', 'rate', 'rate_number', 'hotel_license', 'image',
-                 'status', 'discount', 'total_rooms', 'discount_start_date', 'discount_end_date']
+                 'hotel_iban_number', 'rate', 'rate_number', 'hotel_license', 'image', 'thumbnail',
+                 'image_variants', 'status', 'discount', 'total_rooms', 'discount_start_date', 'discount_end_date']
 
 
     def get_total_rooms(self, obj):
@@ -22,15 +25,20 @@ class HotelSerializer(serializers.ModelSerializer):
 
 
 
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        representation['facilities'] = [
+    def get_thumbnail(self, obj):
+        return thumbnail_url(obj, self.context.get('request'))
+
+    def get_image_variants(self, obj):
+        return variant_urls(obj, self.context.get('request'))
+
+    def get_facilities(self, obj):
+        """Decoded from the facility bitmask, so the join table is not queried"""
+        return [
             {
-                'name': Facility(f.facility_type).label
+                'name': FACILITY_LABELS[facility]
             }
-            for f in instance.facilities.all()
+            for facility in mask_to_facilities(obj.facility_mask)
         ]
-        return representation
 
 class DiscountSerializer(serializers.Serializer):
     discount = serializers.DecimalField(
@@ -0,0 +1,76 @@
+from django.db.models.signals import post_init, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.blobs import track_blob_references
+from core.image_pipeline import schedule_derivatives
+from hotel import inverted_index
+from hotel.caching import invalidate_hotel
+from hotel.facilities import invalidate_facility_map
+from hotel.models import Hotel, HotelFacility, facilities_to_mask
+from hotel.search import invalidate_ngram_index
+from hotelManager.mixins import invalidate_owned_hotels
+
+
+track_blob_references(Hotel, 'image')
+
+
+@receiver(post_init, sender=Hotel)
+def remember_hotel_manager(sender, instance, **kwargs):
+    # the owner the hotel was loaded with, who loses it when it is reassigned
+    instance._loaded_hotel_manager_id = instance.__dict__.get('hotel_manager_id')
+
+
+@receiver(post_save, sender=Hotel)
+def hotel_saved(sender, instance, **kwargs):
+    invalidate_ngram_index()
+    inverted_index.update_hotel(instance)
+    invalidate_owned_hotels(instance.hotel_manager_id)
+    previous_manager_id = instance._loaded_hotel_manager_id
+    if previous_manager_id is not None and previous_manager_id != instance.hotel_manager_id:
+        invalidate_owned_hotels(previous_manager_id)
+    instance._loaded_hotel_manager_id = instance.hotel_manager_id
+    invalidate_hotel(instance.id)
+    schedule_derivatives(instance)
+
+
+@receiver(post_delete, sender=Hotel)
+def hotel_deleted(sender, instance, **kwargs):
+    invalidate_ngram_index()
+    inverted_index.remove_hotel(instance.id)
+    invalidate_owned_hotels(instance.hotel_manager_id)
+    invalidate_hotel(instance.id)
+
+
+def sync_facility_mask(hotel_id):
+    facility_types = Hotel.facilities.through.objects.filter(hotel_id=hotel_id).values_list(
+        'hotelfacility__facility_type', flat=True
+    )
+    mask = facilities_to_mask(facility_types)
+    Hotel.objects.filter(pk=hotel_id).update(facility_mask=mask)
+    invalidate_hotel(hotel_id)
+    return mask
+
+
+@receiver(m2m_changed, sender=Hotel.facilities.through)
+def hotel_facilities_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # post_clear has no pk_set, remember which hotels lose this facility
+        instance._cleared_hotel_ids = list(instance.hotel_set.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        instance.facility_mask = sync_facility_mask(instance.id)
+        inverted_index.update_hotel_facilities(instance.id)
+    else:
+        if action == 'post_clear':
+            pk_set = instance.__dict__.pop('_cleared_hotel_ids', ())
+        for hotel_id in pk_set or ():
+            sync_facility_mask(hotel_id)
+            inverted_index.update_hotel_facilities(hotel_id)
+
+
+@receiver(post_save, sender=HotelFacility)
+@receiver(post_delete, sender=HotelFacility)
+def hotel_facility_changed(sender, instance, **kwargs):
+    invalidate_facility_map()
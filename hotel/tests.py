@@ -1,11 +1,41 @@
-from django.test import TestCase
+import json
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.cache import cache
+from django.core.management import call_command
+from core.mail import run_bulk_job
+from core.models import BulkEmailJob, MediaBlob, OutgoingEmail
+from core.reference_data import ReferenceData
+from core.image_pipeline import DERIVATIVE_SIZES
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import get_user_model
-from hotel.models import Hotel, HotelFacility, Facility
+from hotel.notifications import notify_discount
+from hotel.models import Hotel, HotelFacility, Facility, mask_to_facilities
+from hotel.serializers import HotelSerializer
+from hotel.facilities import facility_id_map, invalidate_facility_map, resolve_facility_ids
 from hotelManager.models import HotelManager
+from reservation.models import Reservation
+from review.models import Review
+from review.views import update_hotel_rating
+from room.models import Room
+from django.utils import timezone
+from datetime import timedelta
+from hotel.search import NgramIndex, invalidate_ngram_index
+from hotel import inverted_index
+from hotel.inverted_index import InvertedIndex, bump_version, get_index, reset_index
 from django.core.files.uploadedfile import SimpleUploadedFile
 from PIL import Image
 import io
+import os
+import shutil
+import smtplib
+import tempfile
 
 User = get_user_model()
 
@@ -149,4 +179,722 @@ class HotelViewSetTest(TestCase):
         print(f"response -> {response.data}")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data['data']), 1)
-        self.assertEqual(response.data['data'][0]['name'], "Ocean View")
\ No newline at end of file
+        self.assertEqual(response.data['data'][0]['name'], "Ocean View")
+
+class HotelFuzzySearchTest(TestCase):
+    def setUp(self):
+        invalidate_ngram_index()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='search@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='2222222222')
+        self.client.force_authenticate(user=self.user)
+
+        self.tehran = Hotel.objects.create(
+            hotel_manager=self.hotel_manager,
+            name="Espinas Palace",
+            location="Tehran",
+            description="Luxury hotel with a pool",
+            status="Accepted"
+        )
+        self.shiraz = Hotel.objects.create(
+            hotel_manager=self.hotel_manager,
+            name="Zandiyeh",
+            location="Shiraz",
+            description="Traditional garden hotel",
+            status="Accepted"
+        )
+        Hotel.objects.create(
+            hotel_manager=self.hotel_manager,
+            name="Pending Tehran Inn",
+            location="Tehran",
+            description="Not accepted yet",
+        )
+
+    def test_ngram_index_ranks_misspelled_query(self):
+        index = NgramIndex()
+        index.add(1, "Espinas Palace", "Tehran", "")
+        index.add(2, "Zandiyeh", "Shiraz", "")
+        results = index.search("Tehrn")
+        self.assertEqual([hotel_id for hotel_id, _ in results], [1])
+        index.remove(1)
+        self.assertEqual(index.search("Tehrn"), [])
+
+    def test_search_misspelled_location(self):
+        response = self.client.get('/hotel-api/hotels/search/', {'q': 'Tehrn'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([h['id'] for h in response.data['data']], [self.tehran.id])
+        self.assertIn('similarity', response.data['data'][0])
+
+    def test_search_limit_offset(self):
+        Hotel.objects.create(
+            hotel_manager=self.hotel_manager,
+            name="Shiraz Grand",
+            location="Shiraz",
+            description="City center",
+            status="Accepted"
+        )
+        response = self.client.get('/hotel-api/hotels/search/', {'q': 'Shiraz', 'limit': 1})
+        self.assertEqual(len(response.data['data']), 1)
+        second = self.client.get('/hotel-api/hotels/search/', {'q': 'Shiraz', 'limit': 1, 'offset': 1})
+        self.assertEqual(len(second.data['data']), 1)
+        self.assertNotEqual(response.data['data'][0]['id'], second.data['data'][0]['id'])
+
+    def test_search_requires_query(self):
+        response = self.client.get('/hotel-api/hotels/search/')
+        self.assertEqual(response.status_code, 400)
+
+
+class HotelInvertedIndexTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            HOTEL_SEARCH_INDEX_PATH=os.path.join(self.tmp_dir, 'hotels.idx')
+        )
+        self.settings_override.enable()
+        reset_index()
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='index@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='3333333333')
+        self.client.force_authenticate(user=self.user)
+        self.pool = HotelFacility.objects.create(facility_type=Facility.POOL)
+        self.gym = HotelFacility.objects.create(facility_type=Facility.GYM)
+
+        self.beach = Hotel.objects.create(
+            hotel_manager=self.hotel_manager,
+            name="Blue Beach",
+            location="Kish",
+            description="Sea view rooms",
+            status="Accepted"
+        )
+        self.beach.facilities.add(self.pool)
+        self.city = Hotel.objects.create(
+            hotel_manager=self.hotel_manager,
+            name="City Center",
+            location="Tehran",
+            description="Close to the sea of shops",
+            status="Accepted"
+        )
+
+    def tearDown(self):
+        reset_index()
+        self.settings_override.disable()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_and_or_and_facility_filters(self):
+        index = InvertedIndex()
+        index.add(1, "Blue Beach", "Kish", "Sea view", ["Pool"])
+        index.add(2, "City Center", "Tehran", "Sea of shops", ["Gym"])
+
+        self.assertEqual(index.search("sea kish"), [1])
+        self.assertEqual(sorted(index.search("kish tehran", operator='or')), [1, 2])
+        self.assertEqual(index.search("sea", facilities=["Gym"]), [2])
+        self.assertEqual(index.search("", facilities=["Pool"]), [1])
+
+        index.set_facilities(1, ["Gym"])
+        self.assertEqual(sorted(index.search("", facilities=["Gym"])), [1, 2])
+        self.assertEqual(index.search("pool"), [])
+
+    def test_dump_and_load_roundtrip(self):
+        index = get_index()
+        path = os.path.join(self.tmp_dir, 'hotels.idx')
+        self.assertTrue(os.path.exists(path))
+
+        loaded = InvertedIndex.load(path)
+        self.assertEqual(loaded.search("sea", operator='or'), index.search("sea", operator='or'))
+        self.assertEqual(loaded.search("", facilities=["Pool"]), [self.beach.id])
+
+    def test_signals_update_loaded_index(self):
+        index = get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city.facilities.add(self.gym)
+        self.assertEqual(get_index().search("", facilities=["Gym"]), [self.city.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.beach.status = "Rejected"
+            self.beach.save()
+        self.assertEqual(get_index().search("kish"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city.delete()
+        self.assertEqual(get_index().search("tehran"), [])
+        # kept up with its own changes, no reload
+        self.assertIs(get_index(), index)
+
+    def test_other_workers_changes_reload_the_index(self):
+        index = get_index()
+        # another worker renamed the hotel: only the shared version tells this one
+        Hotel.objects.filter(pk=self.beach.pk).update(name="Coral Bay")
+        bump_version()
+        self.assertEqual(get_index().search("coral"), [])
+
+        with mock.patch.object(inverted_index, '_checked_at', 0.0):
+            reloaded = get_index()
+        self.assertIsNot(reloaded, index)
+        self.assertEqual(reloaded.search("coral"), [self.beach.id])
+        # the persisted index was rebuilt for the new version as well
+        self.assertEqual(InvertedIndex.load(os.path.join(self.tmp_dir, 'hotels.idx')).snapshot, reloaded.snapshot)
+
+    def test_text_search_endpoint(self):
+        response = self.client.get('/hotel-api/hotels/text-search/', {'q': 'sea', 'facilities': 'Pool'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['data'][0]['id'], self.beach.id)
+
+
+class HotelFacilityMaskTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='mask@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='4444444444')
+        self.client.force_authenticate(user=self.user)
+        self.pool = HotelFacility.objects.create(facility_type=Facility.POOL)
+        self.gym = HotelFacility.objects.create(facility_type=Facility.GYM)
+        self.parking = HotelFacility.objects.create(facility_type=Facility.PARKING)
+
+        self.full = Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name="Full", location="Tehran",
+            description="Everything", status="Accepted"
+        )
+        self.full.facilities.add(self.pool, self.gym, self.parking)
+        self.partial = Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name="Partial", location="Tehran",
+            description="Some", status="Accepted"
+        )
+        self.partial.facilities.add(self.gym)
+
+    def test_mask_follows_m2m(self):
+        self.full.refresh_from_db()
+        self.assertEqual(set(mask_to_facilities(self.full.facility_mask)), {'Pool', 'Gym', 'Parking'})
+
+        self.full.facilities.remove(self.pool)
+        self.full.refresh_from_db()
+        self.assertEqual(set(mask_to_facilities(self.full.facility_mask)), {'Gym', 'Parking'})
+
+        self.gym.hotel_set.clear()
+        self.partial.refresh_from_db()
+        self.assertEqual(self.partial.facility_mask, 0)
+
+    def test_list_filters_by_facilities(self):
+        response = self.client.get('/hotel-api/all-hotels/', {'facilities_all': 'Pool,Gym,Parking'})
+        self.assertEqual([h['id'] for h in response.data['data']], [self.full.id])
+
+        response = self.client.get('/hotel-api/all-hotels/', {'facilities_any': 'Gym'})
+        self.assertEqual(len(response.data['data']), 2)
+
+        response = self.client.get('/hotel-api/all-hotels/', {'facilities_all': 'Sauna'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_serializer_decodes_mask_without_join(self):
+        hotel = Hotel.objects.get(pk=self.full.pk)
+        with self.assertNumQueries(1):  # only the rooms count
+            data = HotelSerializer(hotel).data
+        self.assertEqual({f['name'] for f in data['facilities']}, {'Pool', 'Gym', 'Parking'})
+
+
+class HotelFacilityAssignmentTest(TestCase):
+    def setUp(self):
+        invalidate_facility_map()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='assign@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='5555555555')
+        self.client.force_authenticate(user=self.user)
+        for facility in Facility.values:
+            HotelFacility.objects.create(facility_type=facility)
+        self.hotel = Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name="Assign", location="Tabriz",
+            description="Desc", status="Accepted"
+        )
+
+    def test_facility_map_is_cached(self):
+        facility_id_map()
+        with self.assertNumQueries(0):
+            ids = resolve_facility_ids(["Pool", "Gym", "Unknown"])
+        self.assertEqual(len(ids), 2)
+
+    def test_partial_update_replaces_facilities(self):
+        self.hotel.facilities.set(resolve_facility_ids(["Pool", "Gym"]))
+        response = self.client.patch(
+            f'/hotel-api/hotel/{self.hotel.pk}/',
+            {'facilities': 'Gym, Parking, TV'},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(self.hotel.facilities.values_list('facility_type', flat=True)),
+            {'Gym', 'Parking', 'TV'}
+        )
+        self.hotel.refresh_from_db()
+        self.assertEqual(set(mask_to_facilities(self.hotel.facility_mask)), {'Gym', 'Parking', 'TV'})
+
+    def test_stale_instance_keeps_facility_mask(self):
+        stale = Hotel.objects.get(pk=self.hotel.pk)
+        self.hotel.facilities.set(resolve_facility_ids(["Pool", "Gym"]))
+
+        # loaded before the facilities changed, e.g. the hotel a review points at
+        update_hotel_rating(stale)
+        self.hotel.refresh_from_db()
+        self.assertEqual(set(mask_to_facilities(self.hotel.facility_mask)), {'Pool', 'Gym'})
+
+    def test_new_facility_invalidates_map(self):
+        facility_id_map()
+        HotelFacility.objects.filter(facility_type="Pool").delete()
+        self.assertNotIn("Pool", facility_id_map())
+
+
+class ReferenceDataTest(TestCase):
+    def setUp(self):
+        self.loads = 0
+
+        def loader():
+            self.loads += 1
+            return {'version': self.loads}
+
+        self.data = ReferenceData('test_reference_data', loader, check_interval=0)
+
+    def test_lazy_load_and_reuse(self):
+        self.assertEqual(self.loads, 0)
+        self.assertEqual(self.data.get(), {'version': 1})
+        self.assertEqual(self.data.get(), {'version': 1})
+        self.assertEqual(self.loads, 1)
+
+    def test_version_bump_from_other_worker_reloads(self):
+        self.data.get()
+        # another process invalidated the table
+        cache.incr(self.data.version_key)
+        self.assertEqual(self.data.get(), {'version': 2})
+
+    def test_other_workers_see_invalidate_after_commit(self):
+        self.data.get()
+        version = self.data._shared_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.data.invalidate()
+            self.assertEqual(cache.get(self.data.version_key), version)
+        self.assertEqual(cache.get(self.data.version_key), version + 1)
+
+    def test_seeder_creates_missing_facilities_once(self):
+        user = User.objects.create_user(email='seed@example.com', password='pass1234')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        client.post('/hotel-api/add-fac/', {'name': 'all'}, format='json')
+        client.post('/hotel-api/add-fac/', {'name': 'all'}, format='json')
+        self.assertEqual(HotelFacility.objects.count(), len(Facility.values))
+        self.assertEqual(set(facility_id_map()), set(Facility.values))
+
+
+class HotelImageDerivativesTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_PIPELINE_ASYNC=False)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(email='images@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='6666666666')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def generate_image(self, size=(2000, 1000)):
+        image = Image.new('RGB', size, color='green')
+        image_io = io.BytesIO()
+        image.save(image_io, format='JPEG')
+        return SimpleUploadedFile('big.jpg', image_io.getvalue(), content_type='image/jpeg')
+
+    def test_derivatives_generated_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            hotel = Hotel.objects.create(
+                hotel_manager=self.hotel_manager, name="Images", location="Yazd",
+                description="Desc", image=self.generate_image(), status="Accepted"
+            )
+        hotel.refresh_from_db()
+
+        self.assertEqual(hotel.image_variants['source'], hotel.image.name)
+        for label, max_edge in DERIVATIVE_SIZES.items():
+            for extension in ('webp', 'jpeg'):
+                path = hotel.image_variants[label][extension]
+                with Image.open(os.path.join(self.media_root, path)) as derivative:
+                    self.assertEqual(max(derivative.size), max_edge)
+
+        data = HotelSerializer(hotel).data
+        self.assertEqual(data['thumbnail'], f"/media/{hotel.image_variants['thumbnail']['jpeg']}")
+        self.assertIn('webp', data['image_variants']['large'])
+
+    def test_lost_jobs_are_rebuilt_by_command(self):
+        # the commit callback never runs, as when the worker restarts before the job
+        hotel = Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name="Lost", location="Yazd",
+            description="Desc", image=self.generate_image(), status="Accepted"
+        )
+        Hotel.objects.create(hotel_manager=self.hotel_manager, name="No image", location="Yazd", description="Desc")
+
+        out = io.StringIO()
+        call_command('build_image_derivatives', stdout=out)
+        self.assertIn("Built derivatives for 1 images, 0 failed", out.getvalue())
+        hotel.refresh_from_db()
+        self.assertEqual(hotel.image_variants['source'], hotel.image.name)
+
+        out = io.StringIO()
+        call_command('build_image_derivatives', stdout=out)
+        self.assertIn("for 0 images", out.getvalue())
+
+    def test_worker_loop_rebuilds_lost_jobs_after_delay(self):
+        lost = Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name="Lost", location="Yazd",
+            description="Desc", image=self.generate_image(), status="Accepted"
+        )
+        recent = Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name="Recent", location="Yazd",
+            description="Desc", image=self.generate_image(), status="Accepted"
+        )
+        Hotel.objects.filter(pk=lost.pk).update(modify_datetime=timezone.now() - timedelta(hours=1))
+
+        out = io.StringIO()
+        # one check, then the worker is stopped
+        with mock.patch('time.sleep', side_effect=KeyboardInterrupt):
+            call_command('build_image_derivatives', loop=True, stdout=out)
+        self.assertIn("Built derivatives for 1 images, 0 failed", out.getvalue())
+        lost.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(lost.image_variants['source'], lost.image.name)
+        # still in the hands of the web worker that saved it
+        self.assertEqual(recent.image_variants, {})
+
+    def test_thumbnail_falls_back_to_original(self):
+        hotel = Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name="Pending images", location="Yazd",
+            description="Desc", image=self.generate_image((100, 100)), status="Accepted"
+        )
+        data = HotelSerializer(hotel).data
+        self.assertEqual(data['thumbnail'], hotel.image.url)
+        self.assertIsNone(data['image_variants'])
+
+
+class ContentAddressedMediaTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_PIPELINE_ASYNC=False)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(email='blobs@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='7777777777')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def generate_image(self, color='red', name='photo.jpg'):
+        image = Image.new('RGB', (50, 50), color=color)
+        image_io = io.BytesIO()
+        image.save(image_io, format='JPEG')
+        return SimpleUploadedFile(name, image_io.getvalue(), content_type='image/jpeg')
+
+    def create_hotel(self, image, name="Blob hotel"):
+        return Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name=name, location="Shiraz",
+            description="Desc", image=image
+        )
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.create_hotel(self.generate_image(name='a.jpg'))
+        second = self.create_hotel(self.generate_image(name='b.JPG'), name="Second")
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith('blobs/'))
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 2)
+
+        second.delete()
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 1)
+
+    def test_replacing_image_moves_reference(self):
+        hotel = self.create_hotel(self.generate_image())
+        old_name = hotel.image.name
+        hotel = Hotel.objects.get(pk=hotel.pk)
+        hotel.image = self.generate_image(color='blue')
+        hotel.save()
+
+        self.assertEqual(MediaBlob.objects.get(name=old_name).ref_count, 0)
+        self.assertEqual(MediaBlob.objects.get(name=hotel.image.name).ref_count, 1)
+
+    def test_gc_removes_unreferenced_blobs(self):
+        kept = self.create_hotel(self.generate_image())
+        dropped = self.create_hotel(self.generate_image(color='blue'), name="Dropped")
+        dropped_name = dropped.image.name
+        dropped.delete()
+
+        call_command('gc_media_blobs', grace_hours=0, dry_run=True, stdout=io.StringIO())
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, dropped_name)))
+
+        call_command('gc_media_blobs', grace_hours=0, stdout=io.StringIO())
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, dropped_name)))
+        self.assertFalse(MediaBlob.objects.filter(name=dropped_name).exists())
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, kept.image.name)))
+
+    def test_gc_keeps_blob_referenced_during_collection(self):
+        hotel = self.create_hotel(self.generate_image())
+        name = hotel.image.name
+        hotel.delete()
+        atomic = transaction.atomic
+
+        def upload_then_lock(*args, **kwargs):
+            # the same image is uploaded after the candidates were read
+            self.create_hotel(self.generate_image(), name="Reupload")
+            return atomic(*args, **kwargs)
+
+        with mock.patch('core.management.commands.gc_media_blobs.transaction') as gc_transaction:
+            gc_transaction.atomic.side_effect = upload_then_lock
+            call_command('gc_media_blobs', grace_hours=0, stdout=io.StringIO())
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+
+    def test_gc_keeps_referenced_blob_with_drifted_count(self):
+        hotel = self.create_hotel(self.generate_image())
+        MediaBlob.objects.filter(name=hotel.image.name).update(ref_count=0)
+
+        call_command('gc_media_blobs', grace_hours=0, stdout=io.StringIO())
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, hotel.image.name)))
+
+        call_command('gc_media_blobs', grace_hours=0, recount=True, stdout=io.StringIO())
+        self.assertEqual(MediaBlob.objects.get(name=hotel.image.name).ref_count, 1)
+
+
+class BatchRecordingBackend(locmem.EmailBackend):
+    batches = []
+    fail_for = None
+
+    def send_messages(self, messages):
+        if any(message.to[0] == BatchRecordingBackend.fail_for for message in messages):
+            raise smtplib.SMTPServerDisconnected("connection lost")
+        BatchRecordingBackend.batches.append(len(messages))
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='hotel.tests.BatchRecordingBackend', BULK_EMAIL_BATCH_SIZE=2, BULK_EMAIL_CONCURRENCY=2)
+class DiscountNotificationTest(TestCase):
+    def setUp(self):
+        BatchRecordingBackend.batches = []
+        BatchRecordingBackend.fail_for = None
+        self.user = User.objects.create_user(email='discount@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='8888888888')
+        self.hotel = Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name="Sun & Sea", location="Kish", description="Desc", status="Accepted"
+        )
+        room = Room.objects.create(hotel=self.hotel, room_number=1, name="Suite", room_type="Single", price=100)
+        today = timezone.localdate()
+        for i in range(5):
+            guest = User.objects.create_user(email=f'guest{i}@example.com', password='pass1234')
+            Reservation.objects.create(room=room, user=guest, check_in_date=today + timedelta(days=3 + i),
+                                       check_out_date=today + timedelta(days=5 + i))
+        # two reservations for the same guest get one email
+        Reservation.objects.create(room=room, user=guest, check_in_date=today + timedelta(days=30),
+                                   check_out_date=today + timedelta(days=31))
+        past_guest = User.objects.create_user(email='past@example.com', password='pass1234')
+        Reservation.objects.create(room=room, user=past_guest, check_in_date=today - timedelta(days=10),
+                                   check_out_date=today - timedelta(days=8))
+
+    def test_discount_queues_one_job_for_future_guests(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.post('/hotelManager-api/hotel_manager/activate_discount/', {
+            'hotel_id': self.hotel.id, 'discount': 20,
+            'discount_start_date': '2099-01-01', 'discount_end_date': '2099-02-01'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.count(), 0)
+        job = BulkEmailJob.objects.get()
+
+        # the outbox worker reads the guests and sends them in batches
+        self.assertEqual(run_bulk_job(), job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.sent, job.cursor), (BulkEmailJob.Status.SENT, 5, 'guest4@example.com'))
+        self.assertEqual(sorted(BatchRecordingBackend.batches), [1, 2, 2])
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f'guest{i}@example.com' for i in range(5)])
+        self.assertIn('20', mail.outbox[0].body)
+        self.assertIn('2099-01-01', mail.outbox[0].body)
+        # plain text, not HTML escaped
+        self.assertIn('Sun & Sea in Kish', mail.outbox[0].body)
+        self.assertIsNone(run_bulk_job())
+
+    def test_job_resumes_after_cursor_and_requeues_failed_batches(self):
+        job = notify_discount(self.hotel)
+        # a previous worker got through guest1 before it died
+        BulkEmailJob.objects.filter(pk=job.pk).update(cursor='guest1@example.com')
+        BatchRecordingBackend.fail_for = 'guest4@example.com'
+
+        run_bulk_job()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.sent, job.requeued), (BulkEmailJob.Status.SENT, 2, 1))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['guest2@example.com', 'guest3@example.com'])
+        # the failed batch is retried message by message from the outbox
+        self.assertEqual([email.to for email in OutgoingEmail.objects.all()], [['guest4@example.com']])
+
+
+class GraphQLQueryTest(TestCase):
+    QUERY = """
+    query {
+      hotels {
+        name
+        facilities { facilityType }
+        reviews { rating }
+        rooms {
+          name
+          discountedPrice
+          reservations { checkInDate room { name } }
+        }
+      }
+    }
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='graph@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='9191919191')
+        self.guest = User.objects.create_user(email='graph-guest@example.com', password='pass1234')
+        self.pool = HotelFacility.objects.create(facility_type=Facility.POOL)
+        self.client.force_login(self.user)
+        self.add_hotels(2)
+
+    def add_hotels(self, count):
+        today = timezone.localdate()
+        for _ in range(count):
+            hotel = Hotel.objects.create(
+                hotel_manager=self.hotel_manager, name="Graph", location="Yazd", description="Desc", status="Accepted"
+            )
+            hotel.facilities.add(self.pool)
+            for number in range(2):
+                room = Room.objects.create(hotel=hotel, room_number=number, name="Room", room_type="Single", price=100)
+                Reservation.objects.create(room=room, user=self.guest, check_in_date=today,
+                                           check_out_date=today + timedelta(days=2))
+
+    def run_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/graphql/', json.dumps({'query': self.QUERY}), content_type='application/json')
+        body = response.json()
+        self.assertNotIn('errors', body)
+        return body['data'], len(queries)
+
+    def test_nested_query_costs_one_query_per_level(self):
+        data, small = self.run_query()
+        self.assertEqual(len(data['hotels']), 2)
+        self.assertEqual(len(data['hotels'][0]['rooms'][0]['reservations']), 1)
+        self.assertEqual(data['hotels'][0]['facilities'], [{'facilityType': 'POOL'}])
+
+        self.add_hotels(5)
+        data, large = self.run_query()
+        self.assertEqual(len(data['hotels']), 7)
+        self.assertEqual(small, large)
+        # session, user and hotel manager, owned hotel ids, then one query per level:
+        # hotels, facilities, reviews, rooms and reservations
+        self.assertEqual(large, 9)
+
+    def test_reservations_are_only_visible_to_their_hotel(self):
+        self.client.force_login(User.objects.create_user(email='graph-other@example.com', password='pass1234'))
+        data, _ = self.run_query()
+        self.assertEqual(data['hotels'][0]['rooms'][0]['reservations'], [])
+
+
+class AsyncReadViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='async@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='8181818181')
+        self.hotel = Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name="Async", location="Kashan", description="Desc", status="Accepted"
+        )
+        self.rooms = [
+            Room.objects.create(hotel=self.hotel, room_number=number, name="Room", room_type="Single", price=100)
+            for number in range(2)
+        ]
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def test_requires_jwt(self):
+        response = self.client.get('/hotel-api/async/all-hotels/')
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get('/hotel-api/async/all-hotels/', HTTP_AUTHORIZATION='Bearer nonsense')
+        self.assertEqual(response.status_code, 401)
+
+    def test_hotel_list_matches_sync_view(self):
+        response = self.client.get('/hotel-api/async/all-hotels/', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        sync_response = self.client.get('/hotel-api/all-hotels/', **self.auth)
+        self.assertEqual(response.json(), sync_response.json())
+        self.assertEqual(response.json()['data'][0]['total_rooms'], 2)
+
+        response = self.client.get('/hotel-api/async/all-hotels/?facilities_all=Pool', **self.auth)
+        self.assertEqual(response.status_code, 404)
+
+    def test_reviews(self):
+        Review.objects.create(user=self.user, hotel=self.hotel, rating=4, good_thing="Quiet")
+        response = self.client.get(f'/reviews/async/hotels/{self.hotel.pk}/', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['user_email'], 'async@example.com')
+        self.assertEqual(self.client.get('/reviews/async/hotels/0/', **self.auth).status_code, 404)
+
+    def test_room_availability(self):
+        today = timezone.localdate()
+        Reservation.objects.create(room=self.rooms[0], user=self.user, check_in_date=today,
+                                   check_out_date=today + timedelta(days=2), status='confirmed')
+        search = {
+            'city': 'Kashan',
+            'check_in_date': str(today),
+            'check_out_date': str(today + timedelta(days=1)),
+            'rooms': [{'type_of_room': 'Single', 'number_of_passengers': 1, 'number_of_rooms': 1}],
+        }
+        response = self.client.post('/room-api/async/all-rooms/', json.dumps(search),
+                                    content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        single = response.json()['data']['available_rooms']['Single']
+        self.assertEqual(single['count'], 1)
+        self.assertEqual(single['rooms'][0]['id'], self.rooms[1].pk)
+
+        # the sync and async views share the cached result
+        with mock.patch('room.views.room_availability') as compute:
+            cached = self.client.post('/room-api/async/all-rooms/', json.dumps(search),
+                                      content_type='application/json', **self.auth)
+            sync_response = self.client.post('/room-api/all-rooms/', json.dumps(search),
+                                             content_type='application/json', **self.auth)
+        compute.assert_not_called()
+        self.assertEqual(cached.json(), response.json())
+        self.assertEqual(sync_response.json(), response.json())
+
+        del search['city']
+        response = self.client.post('/room-api/async/all-rooms/', json.dumps(search),
+                                    content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'city is required'})
+
+
+class HotelCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='cached-hotel@example.com', password='pass1234')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='6161616161')
+        self.hotel = Hotel.objects.create(
+            hotel_manager=self.hotel_manager, name="Cached", location="Shiraz", description="Desc", status="Accepted"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_detail_is_cached_until_the_hotel_changes(self):
+        response = self.client.get(f'/hotel-api/hotel/{self.hotel.pk}/')
+        self.assertEqual(response.data['data']['total_rooms'], 0)
+        with self.assertNumQueries(0):
+            self.client.get(f'/hotel-api/hotel/{self.hotel.pk}/')
+
+        Room.objects.create(hotel=self.hotel, room_number=1, name="Room", room_type="Single", price=100)
+        response = self.client.get(f'/hotel-api/hotel/{self.hotel.pk}/')
+        self.assertEqual(response.data['data']['total_rooms'], 1)
+
+        other = User.objects.create_user(email='not-owner@example.com', password='pass1234')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f'/hotel-api/hotel/{self.hotel.pk}/').status_code, 404)
+
+    def test_review_stats_follow_new_reviews(self):
+        response = self.client.get(f'/reviews/hotels/{self.hotel.pk}/stats/')
+        self.assertEqual(response.data['total_reviews'], 0)
+
+        Review.objects.create(user=self.user, hotel=self.hotel, rating=5, good_thing="View", bad_thing="-")
+        update_hotel_rating(self.hotel)
+        response = self.client.get(f'/reviews/hotels/{self.hotel.pk}/stats/')
+        self.assertEqual(response.data['total_reviews'], 1)
+        self.assertEqual(response.data['rating_distribution']['rating_5'], 1)
+        self.assertEqual(self.client.get('/reviews/hotels/0/stats/').status_code, 404)
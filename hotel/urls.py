@@ -1,4 +1,4 @@
-from .views import HotelViewSet, FacilitySeederViewSet
+from .views import HotelViewSet, FacilitySeederViewSet, hotel_list_async
 from django.urls import path
 
 
@@ -10,8 +10,11 @@ urlpatterns = [
         'delete': 'destroy'           
     })),
     path('all-hotels/', HotelViewSet.as_view({'get': 'list'})),  # List all accepted hotels (public)
+    path('async/all-hotels/', hotel_list_async),  # same listing on the async ORM, for ASGI
     path('add-fac/', FacilitySeederViewSet.as_view({'post': 'create_fac'})),
     path('hotels/by-location/', HotelViewSet.as_view({'get': 'hotels_by_location'})),
     path('hotels/with-discount/', HotelViewSet.as_view({'get': 'hotels_with_discount'})),
+    path('hotels/search/', HotelViewSet.as_view({'get': 'fuzzy_search'})),
+    path('hotels/text-search/', HotelViewSet.as_view({'get': 'text_search'})),
     path('hotels/top-rated/', HotelViewSet.as_view({'get': 'top_rated_hotels'})),
 ]
\ No newline at end of file
@@ -5,30 +5,56 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 
 from bookit import settings
-from hotel.models import Hotel, HotelFacility, Facility
+from hotel.caching import remember_for_hotel
+from hotel.models import Hotel, Facility, parse_facilities
+from hotel.manager import filter_by_facilities
+from hotel.facilities import facility_names_from, resolve_facility_ids, ensure_facilities
 from hotelManager.models import HotelManager
+from hotelManager.mixins import HotelManagerMixin
 from hotel.serializers import HotelSerializer
+from hotel.search import fuzzy_search_hotels, DEFAULT_LIMIT, MAX_LIMIT
+from hotel.inverted_index import get_index
+from core.async_views import async_api_view
+from core.db_router import ReplicaReadMixin
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-class HotelViewSet(viewsets.ViewSet):
+class HotelViewSet(ReplicaReadMixin, HotelManagerMixin, viewsets.ViewSet):
 
     permission_classes = [IsAuthenticated]
+    replica_actions = ('list', 'hotels_by_location', 'hotels_with_discount', 'fuzzy_search', 'text_search',
+                       'top_rated_hotels')
 
     @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('facilities_all', openapi.IN_QUERY, description="Comma separated facilities the hotel must all have, e.g. Pool,Gym,Parking", type=openapi.TYPE_STRING),
+            openapi.Parameter('facilities_any', openapi.IN_QUERY, description="Comma separated facilities of which the hotel must have at least one", type=openapi.TYPE_STRING),
+        ],
         responses={
             200: openapi.Response('List of all accepted hotels', HotelSerializer(many=True)),
+            400: 'Unknown facility',
             404: 'No hotels found'
         },
-        operation_description="List all hotels with status 'Accepted'.",
+        operation_description="List all hotels with status 'Accepted', optionally filtered by facilities.",
         tags=['Hotel']
     )
     def list(self, request):
         """it lists all the hotels"""
-        hotels = Hotel.objects.filter(status="Accepted")
+        try:
+            facilities_all = parse_facilities(request.query_params.get('facilities_all'))
+            facilities_any = parse_facilities(request.query_params.get('facilities_any'))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        hotels = filter_by_facilities(
+            Hotel.objects.filter(status="Accepted").prefetch_related('rooms'),
+            facilities_all=facilities_all,
+            facilities_any=facilities_any,
+        )
         if not hotels:
             return Response({"error": "hotel not found"}, status=status.HTTP_404_NOT_FOUND)
         serializer = HotelSerializer(hotels, many=True, context={'request': request})
@@ -57,9 +83,13 @@ class HotelViewSet(viewsets.ViewSet):
     )
     def retrieve(self, request, pk=None):
         """Retrieve a single hotel by its pk, owned by the current user"""
-        hotel = get_object_or_404(Hotel, pk=pk, hotel_manager__user=request.user)
-        serializer = HotelSerializer(hotel, context={'request': request})
-        return Response({'data': serializer.data}, status=status.HTTP_200_OK)
+        if not self.owns_hotel(pk):
+            raise Http404("No Hotel matches the given query.")
+        # image urls are absolute, so entries are per host
+        data = remember_for_hotel(pk, f"detail:{request.build_absolute_uri('/')}", lambda: HotelSerializer(
+            get_object_or_404(Hotel, pk=pk), context={'request': request}
+        ).data)
+        return Response({'data': data}, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(
         request_body=HotelSerializer,
@@ -79,18 +109,9 @@ class HotelViewSet(viewsets.ViewSet):
         # Handle facilities if present in the request
         if 'facilities' in data:
             try:
-                # Clear existing facilities
-                hotel.facilities.clear()
-                
-                # Add new facilities
-                facilities = data.get('facilities').split(",")
-                for facility_name in facilities:
-                    try:
-                        facility = HotelFacility.objects.get(facility_type=facility_name.strip())
-                        hotel.facilities.add(facility)
-                    except HotelFacility.DoesNotExist:
-                        continue
-                
+                # set() only writes the difference with the current facilities
+                hotel.facilities.set(resolve_facility_ids(facility_names_from(data)))
+
                 # Remove facilities from data to avoid serializer issues
                 del data['facilities']
             except Exception as e:
@@ -100,8 +121,8 @@ class HotelViewSet(viewsets.ViewSet):
         if serializer.is_valid():
             try:
                 # Handle file uploads similar to create method
+                # (the image is saved by the serializer into the content addressed storage)
                 files_list = {
-                    "image": [settings.MEDIA_ROOT + "/hotel/images/", 'image'],
                     "hotel_license": [settings.MEDIA_ROOT + "/hotel/licenses/", 'license']
                 }
     
@@ -150,15 +171,15 @@ class HotelViewSet(viewsets.ViewSet):
     def create(self, request):
         """Creates a new hotel for the authenticated hotel_manager with facilities"""
         try:
-            hotel_manager = HotelManager.objects.get(user=request.user)
+            hotel_manager = self.get_hotel_manager()
         except HotelManager.DoesNotExist:
             return Response({"error": "Hotel manager not found"}, status=status.HTTP_404_NOT_FOUND)
 
         data = request.data.copy()
 
         try:
+            # images go to the content addressed storage and keep their hashed name
             files_list = {
-                "image": [settings.MEDIA_ROOT + "/hotel/images/", 'image'],
                 "hotel_license": [settings.MEDIA_ROOT + "/hotel/licenses/", 'license']
             }
 
@@ -173,6 +194,9 @@ class HotelViewSet(viewsets.ViewSet):
                 discount_status=data.get('discount_status', 'Inactive')
             )
 
+            if 'image' in request.FILES:
+                hotel.image = request.FILES['image']
+
             for field in files_list.keys():
                 if field in request.FILES:
                     file = request.FILES[field]
@@ -186,13 +210,9 @@ class HotelViewSet(viewsets.ViewSet):
                     file.name = file_name
                     setattr(hotel, field, file)
 
-            facilities = data.get('facilities').split(",")
-            for facility_name in facilities:
-                try:
-                    facility = HotelFacility.objects.get(facility_type=facility_name)
-                    hotel.facilities.add(facility)
-                except HotelFacility.DoesNotExist:
-                    continue
+            facility_ids = resolve_facility_ids(facility_names_from(data))
+            if facility_ids:
+                hotel.facilities.set(facility_ids)
 
             hotel.save()
 
@@ -225,6 +245,85 @@ class HotelViewSet(viewsets.ViewSet):
         return Response({'data': serializer.data}, status=status.HTTP_200_OK)
 
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, description="Search text (hotel name, city or description)", type=openapi.TYPE_STRING),
+            openapi.Parameter('limit', openapi.IN_QUERY, description=f"Max results (default {DEFAULT_LIMIT}, max {MAX_LIMIT})", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('offset', openapi.IN_QUERY, description="Number of results to skip", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: openapi.Response('Hotels ranked by similarity', HotelSerializer(many=True)),
+            400: 'Bad Request'
+        },
+        operation_description="Fuzzy search of accepted hotels by name, location and description, tolerant to misspellings.",
+        tags=['Hotel']
+    )
+    @action(detail=False, methods=['get'], url_path='search')
+    def fuzzy_search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q query parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+            offset = int(request.query_params.get('offset', 0))
+        except ValueError:
+            return Response({'error': 'limit and offset must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1 or offset < 0:
+            return Response({'error': 'limit must be positive and offset non-negative'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, MAX_LIMIT)
+
+        hotels = fuzzy_search_hotels(query, limit=limit, offset=offset)
+        serializer = HotelSerializer(hotels, many=True, context={'request': request})
+        data = serializer.data
+        for item, hotel in zip(data, hotels):
+            item['similarity'] = round(hotel.similarity, 3)
+        return Response({'data': data, 'limit': limit, 'offset': offset}, status=status.HTTP_200_OK)
+
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, description="Search terms", type=openapi.TYPE_STRING),
+            openapi.Parameter('op', openapi.IN_QUERY, description="'and' (all terms, default) or 'or' (any term)", type=openapi.TYPE_STRING),
+            openapi.Parameter('facilities', openapi.IN_QUERY, description="Comma separated facilities the hotel must have, e.g. Pool,Gym", type=openapi.TYPE_STRING),
+            openapi.Parameter('limit', openapi.IN_QUERY, description=f"Max results (default {DEFAULT_LIMIT}, max {MAX_LIMIT})", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('offset', openapi.IN_QUERY, description="Number of results to skip", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: openapi.Response('Hotels ranked by relevance', HotelSerializer(many=True)),
+            400: 'Bad Request'
+        },
+        operation_description="Full-text search of accepted hotels using the in-process inverted index.",
+        tags=['Hotel']
+    )
+    @action(detail=False, methods=['get'], url_path='text-search')
+    def text_search(self, request):
+        query = request.query_params.get('q', '').strip()
+        operator = request.query_params.get('op', 'and').lower()
+        facilities = [f.strip() for f in request.query_params.get('facilities', '').split(',') if f.strip()]
+        if not query and not facilities:
+            return Response({'error': 'q or facilities query parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if operator not in ('and', 'or'):
+            return Response({'error': "op must be 'and' or 'or'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+            offset = int(request.query_params.get('offset', 0))
+        except ValueError:
+            return Response({'error': 'limit and offset must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1 or offset < 0:
+            return Response({'error': 'limit must be positive and offset non-negative'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, MAX_LIMIT)
+
+        hotel_ids = get_index().search(query, operator=operator, facilities=facilities)
+        page_ids = hotel_ids[offset:offset + limit]
+        hotels = Hotel.objects.prefetch_related('rooms').in_bulk(page_ids)
+        hotels = [hotels[hotel_id] for hotel_id in page_ids if hotel_id in hotels]
+        serializer = HotelSerializer(hotels, many=True, context={'request': request})
+        return Response({'data': serializer.data, 'count': len(hotel_ids), 'limit': limit, 'offset': offset},
+                        status=status.HTTP_200_OK)
+
+
     @swagger_auto_schema(
         responses={200: openapi.Response('Hotels with discount', HotelSerializer(many=True))},
         operation_description="List all accepted hotels that have a discount.",
@@ -271,18 +370,31 @@ class FacilitySeederViewSet (viewsets.ViewSet):
         try:
             data = request.data
             name = data['name']
-            facilities = [
-                "WIFI", "PARKING", "restaurant", "coffeShop", "roomService",
-                "laundryService", "supportAgent", "elevator", "safeBox",
-                "tv", "freeBreakFast", "meetingRoom", "childCare", "POOL",
-                "GYM", "taxi", "pets_allowed", "shoppingMall"
-            ]
-            for fa in facilities:
-                if hasattr(Facility, fa):
-                    HotelFacility.objects.get_or_create(facility_type=getattr(Facility, fa))
+            ensure_facilities(Facility.values)
 
             return Response({'data':'ok'},status=status.HTTP_201_CREATED)
 
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+
+
+@async_api_view(['GET'])
+async def hotel_list_async(request):
+    """HotelViewSet.list on the async ORM, for ASGI deployments"""
+    try:
+        facilities_all = parse_facilities(request.GET.get('facilities_all'))
+        facilities_any = parse_facilities(request.GET.get('facilities_any'))
+    except ValueError as e:
+        return {"error": str(e)}, status.HTTP_400_BAD_REQUEST
+
+    hotels = filter_by_facilities(
+        Hotel.objects.filter(status="Accepted").prefetch_related('rooms'),
+        facilities_all=facilities_all,
+        facilities_any=facilities_any,
+    )
+    hotels = [hotel async for hotel in hotels]
+    if not hotels:
+        return {"error": "hotel not found"}, status.HTTP_404_NOT_FOUND
+    serializer = HotelSerializer(hotels, many=True, context={'request': request})
+    return {'data': serializer.data}, status.HTTP_200_OK
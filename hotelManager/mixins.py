@@ -0,0 +1,55 @@
+from django.conf import settings
+
+from accounts.authentication import request_hotel_manager
+from core.cache import Namespace
+from hotel.models import Hotel
+from hotelManager.models import HotelManager
+
+cache = Namespace('hotelManager')
+
+
+def owned_hotels_cache_key(hotel_manager_id):
+    return f'owned_hotels:{hotel_manager_id}'
+
+
+def owned_hotel_ids(hotel_manager_id):
+    """Ids of the manager's hotels, shared between requests for OWNED_HOTELS_CACHE_TIMEOUT seconds"""
+    key = owned_hotels_cache_key(hotel_manager_id)
+    hotel_ids = cache.get(key)
+    if hotel_ids is None:
+        hotel_ids = frozenset(Hotel.objects.filter(hotel_manager_id=hotel_manager_id).values_list('id', flat=True))
+        cache.set(key, hotel_ids, settings.OWNED_HOTELS_CACHE_TIMEOUT)
+    return hotel_ids
+
+
+def invalidate_owned_hotels(hotel_manager_id):
+    cache.delete(owned_hotels_cache_key(hotel_manager_id))
+
+
+class HotelManagerMixin:
+    """
+    Resolves the requesting user's HotelManager and the ids of their hotels once per request
+    (a viewset instance lives for one request), so ownership checks are set lookups.
+    """
+
+    def get_hotel_manager(self):
+        """Raises HotelManager.DoesNotExist when the user is not a hotel manager"""
+        if not hasattr(self, '_hotel_manager'):
+            self._hotel_manager = request_hotel_manager(self.request)
+        if self._hotel_manager is None:
+            raise HotelManager.DoesNotExist("hotel manager not found")
+        return self._hotel_manager
+
+    def get_owned_hotel_ids(self):
+        if not hasattr(self, '_owned_hotel_ids'):
+            try:
+                self._owned_hotel_ids = owned_hotel_ids(self.get_hotel_manager().pk)
+            except HotelManager.DoesNotExist:
+                self._owned_hotel_ids = frozenset()
+        return self._owned_hotel_ids
+
+    def owns_hotel(self, hotel_id):
+        try:
+            return int(hotel_id) in self.get_owned_hotel_ids()
+        except (TypeError, ValueError):
+            return False
@@ -8,6 +8,8 @@ from datetime import timedelta
 from rest_framework.test import APITestCase
 from rest_framework import status
 from hotelManager.models import HotelManager
+from hotelManager.mixins import owned_hotel_ids
+from django.core.cache import cache
 from hotel.models import Hotel
 from room.models import Room
 from reservation.models import Reservation, Payment
@@ -246,3 +248,57 @@ class HotelManagerViewSetTests(APITestCase):
         response = self.client.post("/hotelManager-api/get/", data, format='multipart')
         print(f"data -> {response.data}")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class HotelManagerOwnershipTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='owner@example.com', password='pass1234', name='Owner')
+        self.hotel_manager = HotelManager.objects.create(user=self.user, national_code='9191919191')
+        self.hotel = Hotel.objects.create(hotel_manager=self.hotel_manager, name="Own", location="Ahvaz",
+                                          description="Desc")
+        other_user = User.objects.create_user(email='rival@example.com', password='pass1234', name='Rival')
+        other_manager = HotelManager.objects.create(user=other_user, national_code='9292929292')
+        self.other_hotel = Hotel.objects.create(hotel_manager=other_manager, name="Rival", location="Ahvaz",
+                                                description="Desc")
+        self.client.force_authenticate(user=self.user)
+
+    def create_room(self, hotel):
+        return Room.objects.create(hotel=hotel, room_number=1, name="Room", room_type="Single", price=100)
+
+    def test_owned_hotel_ids_are_cached_between_requests(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(owned_hotel_ids(self.hotel_manager.pk), {self.hotel.id})
+        with self.assertNumQueries(0):
+            owned_hotel_ids(self.hotel_manager.pk)
+
+        # a new hotel is owned right away
+        new_hotel = Hotel.objects.create(hotel_manager=self.hotel_manager, name="New", location="Ahvaz",
+                                         description="Desc")
+        self.assertEqual(owned_hotel_ids(self.hotel_manager.pk), {self.hotel.id, new_hotel.id})
+
+    def test_reassigned_hotel_is_no_longer_owned(self):
+        self.assertEqual(owned_hotel_ids(self.hotel_manager.pk), {self.hotel.id})
+        hotel = Hotel.objects.get(pk=self.hotel.pk)
+        hotel.hotel_manager = self.other_hotel.hotel_manager
+        hotel.save()
+
+        self.assertEqual(owned_hotel_ids(self.hotel_manager.pk), frozenset())
+        self.assertEqual(owned_hotel_ids(self.other_hotel.hotel_manager_id), {self.other_hotel.id, self.hotel.id})
+
+    def test_room_ownership_checks(self):
+        own_room = self.create_room(self.hotel)
+        other_room = self.create_room(self.other_hotel)
+
+        response = self.client.delete(f'/room-api/remove/{other_room.id}/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.delete(f'/room-api/remove/{own_room.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_user_without_profile_gets_not_found(self):
+        customer = User.objects.create_user(email='guest@example.com', password='pass1234', name='Guest')
+        self.client.force_authenticate(user=customer)
+        response = self.client.get('/hotelManager-api/hotel-manager/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post('/room-api/create/', {'hotel': self.hotel.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,4 +1,5 @@
 from datetime import datetime
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Count, Sum
 from django.db.models.functions import ExtractMonth
@@ -10,7 +11,12 @@ from accounts.models import User, EmailVerificationCode
 from accounts.serializers import UserSerializer
 from hotel.models import Hotel
 from hotelManager.models import HotelManager
+from hotelManager.mixins import HotelManagerMixin
+from core.cache import Namespace
+from core.db_router import ReplicaReadMixin
+from core.throttling import ScopedCacheRateThrottle
 from hotel.serializers import DiscountSerializer, HotelSerializer
+from hotel.notifications import notify_discount
 from hotelManager.serializers import HotelManagerSerializer, HotelReservationsSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.db import transaction
@@ -20,9 +26,13 @@ from drf_yasg import openapi
 
 from reservation.models import Reservation, Payment
 
+# reports follow new reservations within REPORT_CACHE_TIMEOUT seconds
+report_cache = Namespace('hotelManager', alias='tiered')
 
-class HotelManagerViewSet(viewsets.ViewSet):
+
+class HotelManagerViewSet(ReplicaReadMixin, HotelManagerMixin, viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
+    replica_actions = ('monthly_reservations', 'reservation_stats', 'list_reservations_of_hotels')
 
     @swagger_auto_schema(
         operation_description="Get authenticated hotel manager's profile",
@@ -46,8 +56,7 @@ class HotelManagerViewSet(viewsets.ViewSet):
     )
     def retrieve(self, request, pk=None):
         try:
-            user_email = request.user.email
-            hotel_manager = HotelManager.objects.get(user__email=user_email)
+            hotel_manager = self.get_hotel_manager()
             serializer = HotelManagerSerializer(hotel_manager)
             return Response({"data": serializer.data}, status=status.HTTP_200_OK)
         except HotelManager.DoesNotExist:
@@ -129,9 +138,8 @@ class HotelManagerViewSet(viewsets.ViewSet):
         }
     )
     def partial_update(self, request, pk=None):
-        user_email = request.user.email
         try:
-            hotel_manager = HotelManager.objects.get(user__email=user_email)
+            hotel_manager = self.get_hotel_manager()
             data = request.data
             serializer = HotelManagerSerializer(data=data, instance=hotel_manager, partial=True)
             if serializer.is_valid():
@@ -163,8 +171,7 @@ class HotelManagerViewSet(viewsets.ViewSet):
     )
     def destroy(self, request, pk=None):
         try:
-            user_email = request.user.email
-            hotel_manager = HotelManager.objects.get(user__email=user_email)
+            hotel_manager = self.get_hotel_manager()
             hotel_manager.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         except HotelManager.DoesNotExist:
@@ -176,33 +183,13 @@ class HotelManagerViewSet(viewsets.ViewSet):
         Returns a dictionary with hotel names as keys and monthly reservation counts as values.
         """
         try:
-            hotel_manager = HotelManager.objects.get(user=request.user)
-            hotels = Hotel.objects.filter(hotel_manager=hotel_manager)
-
-            response_data = {}
-
+            hotel_manager = self.get_hotel_manager()
             current_year = datetime.now().year
-
-            for hotel in hotels:
-                reservations = Reservation.objects.filter(
-                    room__hotel=hotel,
-                    check_in_date__year=current_year
-                ).annotate(
-                    month=ExtractMonth('check_in_date')
-                ).values('month').annotate(
-                    count=Count('id')
-                ).order_by('month')
-
-                monthly_counts = {month: 0 for month in range(1, 13)}
-
-                for entry in reservations:
-                    monthly_counts[entry['month']] = entry['count']
-
-                response_data[hotel.name] = {
-                    'year': current_year,
-                    'monthly_reservations': monthly_counts
-                }
-
+            response_data = report_cache.remember(
+                f'monthly_reservations:{hotel_manager.pk}:{current_year}',
+                lambda: self.monthly_reservations_report(hotel_manager, current_year),
+                settings.REPORT_CACHE_TIMEOUT,
+            )
             return Response(response_data, status=status.HTTP_200_OK)
 
         except HotelManager.DoesNotExist:
@@ -216,6 +203,34 @@ class HotelManagerViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def monthly_reservations_report(self, hotel_manager, current_year):
+        """Reservation counts per month of the year, by hotel name"""
+        hotels = Hotel.objects.filter(hotel_manager=hotel_manager)
+
+        response_data = {}
+
+        for hotel in hotels:
+            reservations = Reservation.objects.filter(
+                room__hotel=hotel,
+                check_in_date__year=current_year
+            ).annotate(
+                month=ExtractMonth('check_in_date')
+            ).values('month').annotate(
+                count=Count('id')
+            ).order_by('month')
+
+            monthly_counts = {month: 0 for month in range(1, 13)}
+
+            for entry in reservations:
+                monthly_counts[entry['month']] = entry['count']
+
+            response_data[hotel.name] = {
+                'year': current_year,
+                'monthly_reservations': monthly_counts
+            }
+
+        return response_data
+
     def reservation_stats(self, request):
         """
         Get reservation statistics between two dates for all hotels managed by the authenticated hotel manager.
@@ -244,45 +259,12 @@ class HotelManagerViewSet(viewsets.ViewSet):
             if start_date > end_date:
                 return Response({"error":"start_date must be before end_date"})
 
-            hotel_manager = HotelManager.objects.get(user=request.user)
-            hotels = Hotel.objects.filter(hotel_manager=hotel_manager)
-
-            response_data = {
-                'start_date': start_date_str,
-                'end_date': end_date_str,
-                'total_reservations': 0,
-                'total_revenue': 0,
-                'hotels': []
-            }
-            for hotel in hotels:
-                reservations = Reservation.objects.filter(
-                    room__hotel=hotel,
-                    check_in_date__gte=start_date,
-                    check_out_date__lte=end_date,
-                    status='confirmed'
-                )
-                print(f"start-end-> {start_date}, {end_date}")
-                for r in reservations:
-                    print(f"reserves-> {r.check_in_date},,{r.check_out_date}")
-                payment_stats = Payment.objects.filter(
-                    reservation__in=reservations,
-                    status='confirmed'
-                ).aggregate(
-                    total_amount=Sum('amount'),
-                    reservation_count=Count('id')
-                )
-
-                hotel_data = {
-                    'hotel_id': hotel.id,
-                    'hotel_name': hotel.name,
-                    'reservation_count': payment_stats['reservation_count'] or 0,
-                    'revenue': float(payment_stats['total_amount'] or 0)
-                }
-
-                response_data['hotels'].append(hotel_data)
-                response_data['total_reservations'] += hotel_data['reservation_count']
-                response_data['total_revenue'] += hotel_data['revenue']
-
+            hotel_manager = self.get_hotel_manager()
+            response_data = report_cache.remember(
+                f'reservation_stats:{hotel_manager.pk}:{start_date_str}:{end_date_str}',
+                lambda: self.reservation_stats_report(hotel_manager, start_date, end_date, start_date_str, end_date_str),
+                settings.REPORT_CACHE_TIMEOUT,
+            )
             return Response(response_data, status=status.HTTP_200_OK)
 
         except ValidationError as e:
@@ -301,10 +283,48 @@ class HotelManagerViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def reservation_stats_report(self, hotel_manager, start_date, end_date, start_date_str, end_date_str):
+        """Confirmed reservations and revenue between the dates, in total and by hotel"""
+        hotels = Hotel.objects.filter(hotel_manager=hotel_manager)
+
+        response_data = {
+            'start_date': start_date_str,
+            'end_date': end_date_str,
+            'total_reservations': 0,
+            'total_revenue': 0,
+            'hotels': []
+        }
+        for hotel in hotels:
+            reservations = Reservation.objects.filter(
+                room__hotel=hotel,
+                check_in_date__gte=start_date,
+                check_out_date__lte=end_date,
+                status='confirmed'
+            )
+            payment_stats = Payment.objects.filter(
+                reservation__in=reservations,
+                status='confirmed'
+            ).aggregate(
+                total_amount=Sum('amount'),
+                reservation_count=Count('id')
+            )
+
+            hotel_data = {
+                'hotel_id': hotel.id,
+                'hotel_name': hotel.name,
+                'reservation_count': payment_stats['reservation_count'] or 0,
+                'revenue': float(payment_stats['total_amount'] or 0)
+            }
+
+            response_data['hotels'].append(hotel_data)
+            response_data['total_reservations'] += hotel_data['reservation_count']
+            response_data['total_revenue'] += hotel_data['revenue']
+
+        return response_data
+
     def set_discount_on_hotel(self, request):
         try:
-            user_email = request.user.email
-            hotel_manager = HotelManager.objects.get(user__email=user_email)
+            hotel_manager = self.get_hotel_manager()
             discount_serial = DiscountSerializer(data=request.data)
             if discount_serial.is_valid():
                 start_date = request.data.get("discount_start_date")
@@ -317,6 +337,7 @@ class HotelManagerViewSet(viewsets.ViewSet):
                 hotel.discount_end_date = timezone.make_aware(datetime.strptime(end_date, '%Y-%m-%d'))
                 hotel.discount_status = "Active"
                 hotel.save()
+                notify_discount(hotel)
                 serializer = HotelSerializer(hotel)
                 return Response({"data": serializer.data}, status=status.HTTP_200_OK)
             return Response({"error":discount_serial.errors}, status=status.HTTP_400_BAD_REQUEST)
@@ -329,8 +350,7 @@ class HotelManagerViewSet(viewsets.ViewSet):
 
     def list_reservations_of_hotels(self, request):
         try:
-            user_email = request.user.email
-            hotel_manager = HotelManager.objects.get(user__email=user_email)
+            hotel_manager = self.get_hotel_manager()
             hotels = Hotel.objects.filter(hotel_manager=hotel_manager)
             serial = HotelReservationsSerializer(hotels, many=True)
             return Response({"data":serial.data}, status=status.HTTP_200_OK)
@@ -341,6 +361,9 @@ class HotelManagerViewSet(viewsets.ViewSet):
 
 
 class NoneAuthHotelManagerViewSet(viewsets.ViewSet):
+    # shares the login limit of the customer login, per client IP
+    throttle_classes = [ScopedCacheRateThrottle]
+    throttle_scopes = {'retrieve': 'login'}
 
     @swagger_auto_schema(
         operation_description="Register a new hotel manager",
@@ -416,8 +439,8 @@ class NoneAuthHotelManagerViewSet(viewsets.ViewSet):
                         user=user,
                         national_code=data['national_code'],
                     )
-                verification = EmailVerificationCode.objects.create(user=user)
-                send_verification_email(user, verification)
+                    verification = EmailVerificationCode.objects.create(user=user)
+                    send_verification_email(user, verification)
                 return Response({
                     'data': HotelManagerSerializer(manager).data,
                     'message': "hotel manager created not active enter otp code"
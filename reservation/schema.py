@@ -0,0 +1,57 @@
+import graphene
+from django.db.models import Q
+from graphene_django.types import DjangoObjectType
+from graphql import GraphQLError
+
+from accounts.authentication import request_hotel_manager
+from core import loaders
+from core.query_cost import page_size
+from hotelManager.mixins import owned_hotel_ids
+from reservation.models import Reservation
+from room.schema import RoomType
+
+
+def visible_reservations(request):
+    """Staff see every reservation, hotel managers those of their hotels, everyone their own"""
+    user = request.user
+    if not user.is_authenticated:
+        return Reservation.objects.none()
+    if user.is_staff:
+        return Reservation.objects.all()
+    hotel_manager = request_hotel_manager(request)
+    if hotel_manager is None:
+        return Reservation.objects.filter(user=user)
+    return Reservation.objects.filter(Q(user=user) | Q(room__hotel_id__in=owned_hotel_ids(hotel_manager.pk)))
+
+
+def load_room_reservations(request, keys):
+    return loaders.first_per_group(
+        visible_reservations(request).filter(room_id__in=keys), 'room_id', ('-check_in_date', 'id')
+    )
+
+
+loaders.register(
+    'room_reservations', load_room_reservations,
+    parents={'room': lambda room: room.pk}, child='reservation', many=True
+)
+
+
+class ReservationType(DjangoObjectType):
+    room = graphene.Field(RoomType)
+
+    class Meta:
+        model = Reservation
+        fields = ['id', 'room', 'check_in_date', 'check_out_date', 'status']
+
+    def resolve_room(self, info):
+        return loaders.load(info, 'room', self.room_id)
+
+
+class ReservationQuery(graphene.ObjectType):
+    my_reservations = graphene.List(graphene.NonNull(ReservationType), first=graphene.Int())
+
+    def resolve_my_reservations(self, info, first=None):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError("Authentication required.")
+        reservations = Reservation.objects.filter(user=info.context.user).order_by('-check_in_date')
+        return loaders.queue(info, 'reservation', reservations[:page_size(first)])
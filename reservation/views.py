@@ -1,45 +1,46 @@
 import decimal
+import math
 from django.db.models import Min
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from accounts.models import User
+from core.cache import Namespace
+from core.throttling import ScopedCacheRateThrottle
 from hotel.models import Hotel
+from hotelManager.mixins import HotelManagerMixin
 from hotelManager.models import HotelManager
 from reservation.models import Reservation, Payment
 from .serializer import ReservationSerializer, ReservationDetailSerializer, PaymentSerializer
 from room.models import Room, RoomLock
 from datetime import timedelta
 from django.utils import timezone
-from django.core.cache import cache
 from django.conf import settings
 
-class ReservationViewSet(viewsets.ViewSet):
+cache = Namespace('reservation')
+
+class ReservationViewSet(HotelManagerMixin, viewsets.ViewSet):
 
     permission_classes = [IsAuthenticated]
+    throttle_classes = [ScopedCacheRateThrottle]
+    throttle_scopes = {'lock_rooms_for_user': 'room_lock'}
 
     def list(self, request):
-        email = request.user
         try:
-            hotel_manager = HotelManager.objects.get(user__email=email)
-            hotel_reservations = Reservation.objects.filter(room__hotel__hotel_manager=hotel_manager)
-            serializer = ReservationSerializer(hotel_reservations, many=True)
-            return Response({'data':serializer.data}, status=status.HTTP_200_OK)
+            hotel_manager = self.get_hotel_manager()
         except HotelManager.DoesNotExist:
             return Response({'error' : 'hotel manager not found'},status=status.HTTP_404_NOT_FOUND)
+        hotel_reservations = Reservation.objects.filter(room__hotel__hotel_manager=hotel_manager)
+        serializer = ReservationSerializer(hotel_reservations, many=True)
+        return Response({'data':serializer.data}, status=status.HTTP_200_OK)
 
     def retrieve(self, request):
-        email = request.user
-        try:
-            data = {}
-            user = User.objects.get(email=email)
-            past_room_reservations = Reservation.objects.filter(user=user, check_out_date__lte=timezone.now())
-            data["past"] = ReservationSerializer(past_room_reservations, many=True).data
-            future_room_reservations = Reservation.objects.filter(user=user, check_out_date__gt=timezone.now())
-            data["future"] = ReservationSerializer(future_room_reservations, many=True).data
-            return Response({'data': data}, status=status.HTTP_200_OK)
-        except User.DoesNotExist:
-            return Response({'error': 'user not found'}, status=status.HTTP_404_NOT_FOUND)
+        data = {}
+        user = request.user
+        past_room_reservations = Reservation.objects.filter(user=user, check_out_date__lte=timezone.now())
+        data["past"] = ReservationSerializer(past_room_reservations, many=True).data
+        future_room_reservations = Reservation.objects.filter(user=user, check_out_date__gt=timezone.now())
+        data["future"] = ReservationSerializer(future_room_reservations, many=True).data
+        return Response({'data': data}, status=status.HTTP_200_OK)
 
     MAX_LOCKS_PER_USER = 3  # Maximum concurrent room locks per user
     LOCK_COOLDOWN_MINUTES = 5  # Minutes to wait after reaching max locks
@@ -47,27 +48,26 @@ class ReservationViewSet(viewsets.ViewSet):
     
     def lock_rooms_for_user(self, request):
         try:
-            email = request.user
-            user = User.objects.get(email=email)
+            user = request.user
             room_ids = request.data.get('room_ids', [])
             
             if not room_ids:
                 return Response({"error": "No room IDs provided"}, status=status.HTTP_400_BAD_REQUEST)
             cooldown_key = f"lock_cooldown_{user.id}"
-            if cache.get(cooldown_key):
-                return Response({
-                    "error": "You've reached your maximum lock attempts. Please wait before trying again.",
-                    "cooldown_until": cache.get(cooldown_key + "_time")
-                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            cooldown_until = cache.get(cooldown_key)
+            if cooldown_until:
+                return self.cooldown_response(
+                    "You've reached your maximum lock attempts. Please wait before trying again.", cooldown_until
+                )
             current_locks = RoomLock.objects.filter(user=user, locked_until__gt=timezone.now())
             if current_locks.count() >= self.MAX_LOCKS_PER_USER:
                 cooldown_until = timezone.now() + timedelta(minutes=self.LOCK_COOLDOWN_MINUTES)
-                cache.set(cooldown_key, True, timeout=self.LOCK_COOLDOWN_MINUTES * 60)
-                cache.set(cooldown_key + "_time", cooldown_until, timeout=self.LOCK_COOLDOWN_MINUTES * 60)
-                return Response({
-                    "error": f"You can only have {self.MAX_LOCKS_PER_USER} active room locks at a time.",
-                    "cooldown_until": cooldown_until
-                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+                # add() keeps the first cooldown when workers race
+                if not cache.add(cooldown_key, cooldown_until, timeout=self.LOCK_COOLDOWN_MINUTES * 60):
+                    cooldown_until = cache.get(cooldown_key) or cooldown_until
+                return self.cooldown_response(
+                    f"You can only have {self.MAX_LOCKS_PER_USER} active room locks at a time.", cooldown_until
+                )
             
             now = timezone.now()
             locked_until = now + timedelta(minutes=self.LOCK_TIMEOUT_MINUTES)
@@ -100,24 +100,25 @@ class ReservationViewSet(viewsets.ViewSet):
                 "remaining_locks": available_slots - len(room_ids)
             })
             
-        except User.DoesNotExist:
-            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def cooldown_response(self, error, cooldown_until):
+        retry_after = max(1, math.ceil((cooldown_until - timezone.now()).total_seconds()))
+        return Response(
+            {"error": error, "cooldown_until": cooldown_until},
+            status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(retry_after)}
+        )
+
     def unlock_rooms_for_user(self, request):
-        try:
-            email = request.user
-            user = User.objects.get(email=email)
-            room_ids = request.data.get('room_ids', [])
-            locks = RoomLock.objects.filter(user=user)
-            if room_ids:
-                locks = locks.filter(room__id__in=room_ids)
-                deleted_count, _ = locks.delete()
-                return Response({"unlocked": deleted_count}, status=status.HTTP_200_OK)
-            return Response({"error":"enter room numbers"}, status=status.HTTP_400_BAD_REQUEST)
-        except User.DoesNotExist:
-            return Response({'error': 'user not found'}, status=status.HTTP_404_NOT_FOUND)
+        user = request.user
+        room_ids = request.data.get('room_ids', [])
+        locks = RoomLock.objects.filter(user=user)
+        if room_ids:
+            locks = locks.filter(room__id__in=room_ids)
+            deleted_count, _ = locks.delete()
+            return Response({"unlocked": deleted_count}, status=status.HTTP_200_OK)
+        return Response({"error":"enter room numbers"}, status=status.HTTP_400_BAD_REQUEST)
 
 
     def reserve(self, request):
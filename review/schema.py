@@ -0,0 +1,46 @@
+import graphene
+from graphene_django.types import DjangoObjectType
+
+from core import loaders
+from core.query_cost import page_size
+from hotel.schema import HotelType
+from review.models import Review
+
+
+def load_hotel_reviews(request, keys):
+    return loaders.first_per_group(
+        Review.objects.filter(hotel_id__in=keys).select_related('user'), 'hotel_id', ('-created_at', 'id')
+    )
+
+
+loaders.register(
+    'hotel_reviews', load_hotel_reviews,
+    parents={'hotel': lambda hotel: hotel.pk}, child='review', many=True
+)
+
+
+class ReviewType(DjangoObjectType):
+    hotel = graphene.Field(HotelType)
+    user_name = graphene.String()
+    user_last_name = graphene.String()
+
+    class Meta:
+        model = Review
+        fields = ['id', 'hotel', 'good_thing', 'bad_thing', 'rating', 'created_at']
+
+    def resolve_hotel(self, info):
+        return loaders.load(info, 'hotel', self.hotel_id)
+
+    def resolve_user_name(self, info):
+        return self.user.name
+
+    def resolve_user_last_name(self, info):
+        return self.user.last_name
+
+
+class ReviewQuery(graphene.ObjectType):
+    reviews = graphene.List(graphene.NonNull(ReviewType), hotel_id=graphene.ID(required=True), first=graphene.Int())
+
+    def resolve_reviews(self, info, hotel_id, first=None):
+        reviews = Review.objects.filter(hotel_id=hotel_id).select_related('user')
+        return loaders.queue(info, 'review', reviews[:page_size(first)])
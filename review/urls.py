@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import review_list_create, review_detail, hotel_review_stats, user_hotel_review
+from .views import review_list_create, review_detail, hotel_review_stats, user_hotel_review, review_list_async
 
 app_name = 'review'
 
@@ -8,4 +8,5 @@ urlpatterns = [
     path('review/<int:pk>/', review_detail, name='review-detail'),
     path('hotels/<int:hotel_id>/stats/', hotel_review_stats, name='hotel-review-stats'),
     path('hotels/<int:hotel_id>/user/', user_hotel_review, name='user-hotel-review'),
-]
\ No newline at end of file
+    path('async/hotels/<int:hotel_id>/', review_list_async, name='review-list-async'),
+]
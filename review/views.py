@@ -10,8 +10,11 @@ from drf_yasg import openapi
 
 from .models import Review
 from .serializers import ReviewSerializer, ReviewCreateSerializer
+from hotel.caching import remember_for_hotel
 from hotel.models import Hotel
 from accounts.models import User
+from core.async_views import async_api_view
+from core.db_router import read_from_replica
 
 def update_hotel_rating(hotel):
     """Update hotel rating based on all reviews"""
@@ -43,6 +46,7 @@ def update_hotel_rating(hotel):
 )
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def review_list_create(request, hotel_id):
     hotel = get_object_or_404(Hotel, id=hotel_id)
     user = request.user
@@ -157,7 +161,13 @@ def review_detail(request, pk):
     }
 )
 @api_view(['GET'])
+@read_from_replica
 def hotel_review_stats(request, hotel_id):
+    # reviews change through update_hotel_rating, whose hotel.save() drops the entry
+    return Response(remember_for_hotel(hotel_id, 'review_stats', lambda: review_stats(hotel_id)))
+
+
+def review_stats(hotel_id):
     hotel = get_object_or_404(Hotel, id=hotel_id)
 
     stats = Review.objects.filter(hotel=hotel).aggregate(
@@ -170,13 +180,13 @@ def hotel_review_stats(request, hotel_id):
         for i in range(1, 6)
     }
 
-    return Response({
+    return {
         'hotel_id': hotel_id,
         'hotel_name': hotel.name,
         'average_rating': round(stats['avg_rating'] or 0, 1),
         'total_reviews': stats['total_reviews'],
         'rating_distribution': rating_distribution
-    })
+    }
 
 @swagger_auto_schema(
     method='get',
@@ -196,3 +206,13 @@ def user_hotel_review(request, hotel_id):
         return Response(serializer.data)
     except Review.DoesNotExist:
         return Response({'detail': 'No review found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@async_api_view(['GET'])
+async def review_list_async(request, hotel_id):
+    """GET of review_list_create on the async ORM, for ASGI deployments"""
+    if not await Hotel.objects.filter(id=hotel_id).aexists():
+        return {'detail': 'No Hotel matches the given query.'}, status.HTTP_404_NOT_FOUND
+    reviews = Review.objects.filter(hotel_id=hotel_id).select_related('user', 'hotel')
+    serializer = ReviewSerializer([review async for review in reviews], many=True)
+    return serializer.data, status.HTTP_200_OK
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+from django.db.models import Q
+
+from hotel.manager import filter_by_facilities
+from hotel.models import parse_facilities
+from reservation.models import Reservation
+from room.models import Room
+
+
+def exclude_reserved(queryset, check_in, check_out):
+    """Rooms of queryset without a confirmed reservation overlapping [check_in, check_out)"""
+    conflicting_rooms = Reservation.objects.filter(
+        Q(check_in_date__lt=check_out) & Q(check_out_date__gt=check_in),
+        status='confirmed'
+    ).values_list('room_id', flat=True)
+    return queryset.exclude(id__in=conflicting_rooms)
+
+
+def parse_availability_request(data):
+    """Validated parameters of a room search, raises ValueError with the message for the client"""
+    city = data.get('city')
+    check_in_date = data.get('check_in_date')
+    check_out_date = data.get('check_out_date')
+    rooms = data.get('rooms', [])
+    if not rooms:
+        raise ValueError("At least one room must be specified")
+    if not city:
+        raise ValueError("city is required")
+    if not check_in_date or not check_out_date:
+        raise ValueError("Both check_in_date and check_out_date are required")
+    try:
+        check_in = datetime.strptime(check_in_date, '%Y-%m-%d').date()
+        check_out = datetime.strptime(check_out_date, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+    if check_in >= check_out:
+        raise ValueError("check_out_date must be after check_in_date")
+    for room in rooms:
+        if not all([room.get('type_of_room'), room.get('number_of_passengers'), room.get('number_of_rooms')]):
+            raise ValueError("Each room must have room type ,passengers and count")
+    return {
+        'city': city,
+        'check_in': check_in,
+        'check_out': check_out,
+        'facilities_all': parse_facilities(data.get('facilities_all')),
+        'facilities_any': parse_facilities(data.get('facilities_any')),
+        'rooms': rooms,
+    }
+
+
+def available_rooms(search):
+    """Rooms free for the whole stay in hotels of the searched city, with their hotel loaded"""
+    rooms = filter_by_facilities(
+        Room.objects.filter(hotel__location__istartswith=search['city']),
+        facilities_all=search['facilities_all'],
+        facilities_any=search['facilities_any'],
+        field='hotel__facility_mask',
+    )
+    rooms = exclude_reserved(rooms, search['check_in'], search['check_out'])
+    return rooms.select_related('hotel').prefetch_related('hotel__rooms')
+
+
+def availability_entry(room, available_count, rooms_data=None):
+    """Response entry for one requested room type; rooms_data is None when too few rooms are free"""
+    if rooms_data is None:
+        return {
+            'available': False,
+            'count': available_count,
+            'rooms_needed': room['number_of_rooms']
+        }
+    return {
+        'available': True,
+        'count': available_count,
+        'rooms': rooms_data,
+        'passengers_per_room': room['number_of_passengers'],
+        'rooms_needed': room['number_of_rooms']
+    }
+
+
+def room_availability(search, serialize):
+    """Availability of each requested room type; serialize(rooms) renders the rooms to book"""
+    rooms = available_rooms(search)
+    response_data = {'available_rooms': {}, 'unavailable_types': []}
+    for room in search['rooms']:
+        type_rooms = rooms.filter(room_type=room['type_of_room'])
+        available_count = type_rooms.count()
+        rooms_data = None
+        if available_count >= room['number_of_rooms']:
+            rooms_data = serialize(type_rooms[:room['number_of_rooms']])
+        else:
+            response_data['unavailable_types'].append(room['type_of_room'])
+        response_data['available_rooms'][room['type_of_room']] = availability_entry(room, available_count, rooms_data)
+    return response_data
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
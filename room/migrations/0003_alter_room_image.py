@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-19 07:08
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0002_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='room',
+            name='image',
+            field=models.ImageField(storage=core.storage.ContentAddressedStorage(), upload_to='room/images/'),
+        ),
+    ]
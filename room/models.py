@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from core.models import BaseModel
+from core.storage import blob_storage
 from hotel.models import Hotel
 from accounts.models import User
 
@@ -23,7 +24,8 @@ class Room(BaseModel):
     name = models.CharField(max_length=120)
     room_type = models.CharField(max_length=15, choices=RoomType.choices)
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
-    image = models.ImageField(upload_to='room/images/')
+    image = models.ImageField(upload_to='room/images/', storage=blob_storage)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     rate = models.PositiveSmallIntegerField(default=0)
     rate_number = models.IntegerField(default=0)
 
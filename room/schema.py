@@ -0,0 +1,76 @@
+import graphene
+from graphene_django.types import DjangoObjectType
+from graphql import GraphQLError
+
+from core import loaders
+from core.query_cost import page_size
+from hotel.models import Status
+from hotel.schema import HotelType
+from room.manager import exclude_reserved
+from room.models import Room, RoomType as RoomKind
+
+
+def load_hotel_rooms(request, keys):
+    return loaders.first_per_group(Room.objects.filter(hotel_id__in=keys), 'hotel_id', ('room_type', 'price', 'id'))
+
+
+def load_rooms(request, keys):
+    return Room.objects.in_bulk(keys)
+
+
+loaders.register(
+    'hotel_rooms', load_hotel_rooms,
+    parents={'hotel': lambda hotel: hotel.pk}, child='room', many=True
+)
+loaders.register(
+    'room', load_rooms,
+    parents={'reservation': lambda reservation: reservation.room_id}, child='room', identity=True
+)
+
+
+class RoomType(DjangoObjectType):
+    hotel = graphene.Field(HotelType)
+    discounted_price = graphene.Decimal()
+    reservations = graphene.List(graphene.NonNull('reservation.schema.ReservationType'), first=graphene.Int())
+
+    class Meta:
+        model = Room
+        fields = ['id', 'hotel', 'room_number', 'name', 'room_type', 'price', 'image', 'rate', 'rate_number']
+
+    def resolve_hotel(self, info):
+        return loaders.load(info, 'hotel', self.hotel_id)
+
+    def resolve_discounted_price(self, info):
+        # discounted_price reads the hotel, which comes from the loader instead of a query per room
+        self.hotel = loaders.load(info, 'hotel', self.hotel_id)
+        return self.discounted_price
+
+    def resolve_reservations(self, info, first=None):
+        return loaders.load(info, 'room_reservations', self.pk)[:page_size(first)]
+
+
+class RoomQuery(graphene.ObjectType):
+    rooms = graphene.List(graphene.NonNull(RoomType), hotel_id=graphene.ID(required=True), first=graphene.Int())
+    availability = graphene.List(
+        graphene.NonNull(RoomType),
+        city=graphene.String(required=True),
+        check_in=graphene.Date(required=True),
+        check_out=graphene.Date(required=True),
+        room_type=graphene.String(),
+        first=graphene.Int(),
+    )
+
+    def resolve_rooms(self, info, hotel_id, first=None):
+        rooms = Room.objects.filter(hotel_id=hotel_id, hotel__status=Status.ACCEPTED)
+        return loaders.queue(info, 'room', rooms[:page_size(first)])
+
+    def resolve_availability(self, info, city, check_in, check_out, room_type=None, first=None):
+        if check_in >= check_out:
+            raise GraphQLError("checkOut must be after checkIn")
+        if room_type and room_type not in RoomKind.values:
+            raise GraphQLError(f"Unknown room type: {room_type}")
+        rooms = Room.objects.filter(hotel__location__istartswith=city, hotel__status=Status.ACCEPTED)
+        if room_type:
+            rooms = rooms.filter(room_type=room_type)
+        rooms = exclude_reserved(rooms, check_in, check_out)
+        return loaders.queue(info, 'room', rooms[:page_size(first)])
@@ -3,6 +3,7 @@ from rest_framework import serializers
 from hotel.models import Hotel
 from room.models import Room, RoomType, DiscountStatus
 from hotel.serializers import HotelSerializer
+from core.image_pipeline import thumbnail_url, variant_urls
 
 
 class RoomSerializer(serializers.ModelSerializer):
@@ -13,23 +14,21 @@ class RoomSerializer(serializers.ModelSerializer):
         read_only=True
     )
     hotel = serializers.PrimaryKeyRelatedField(queryset=Hotel.objects.all())
+    thumbnail = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Room
-        fields = ['id','hotel','name','room_type','price','image','rate','rate_number','discounted_price','room_number'
+        fields = ['id','hotel','name','room_type','price','image','thumbnail','image_variants','rate','rate_number',
+                  'discounted_price','room_number'
         ]
         read_only_fields = ['rate', 'rate_number']
 
-    def create(self, validated_data):
-        image = validated_data.get('image')
-        hotel = validated_data.get('hotel')
-        room_name = validated_data.get('name')
+    def get_thumbnail(self, obj):
+        return thumbnail_url(obj, self.context.get('request'))
 
-        # Customize image name
-        if image:
-            image.name = f"{hotel.id}_{room_name.lower().replace(' ', '_')}.png"
-
-        return super().create(validated_data)
+    def get_image_variants(self, obj):
+        return variant_urls(obj, self.context.get('request'))
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
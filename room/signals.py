@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.blobs import track_blob_references
+from core.image_pipeline import schedule_derivatives
+from hotel.caching import invalidate_hotel
+from room.models import Room
+
+
+track_blob_references(Room, 'image')
+
+
+@receiver(post_save, sender=Room)
+def room_saved(sender, instance, **kwargs):
+    # the hotel's details count its rooms
+    invalidate_hotel(instance.hotel_id)
+    schedule_derivatives(instance)
+
+
+@receiver(post_delete, sender=Room)
+def room_deleted(sender, instance, **kwargs):
+    invalidate_hotel(instance.hotel_id)
@@ -1,4 +1,4 @@
-from .views import RoomViewSet
+from .views import RoomViewSet, room_list_async
 from django.urls import path
 
 urlpatterns = [
@@ -7,4 +7,5 @@ urlpatterns = [
     path('remove/<int:pk>/', RoomViewSet.as_view({'delete': 'destroy'})),
     path('create/', RoomViewSet.as_view({'post': 'create'})),
     path('all-rooms/', RoomViewSet.as_view({'post': 'list'})),
-]
\ No newline at end of file
+    path('async/all-rooms/', room_list_async),  # same search as a native async view, for ASGI
+]
@@ -1,19 +1,42 @@
 # views.py
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from hotel.models import Hotel
+from core.async_views import async_api_view
+from core.cache import Namespace
+from core.throttling import ScopedCacheRateThrottle
+from hotelManager.mixins import HotelManagerMixin
+from room.manager import parse_availability_request, room_availability
 from room.models import Room
 from room.serializer import RoomSerializer
-from reservation.models import Reservation
-from django.db.models import Q
-from datetime import datetime
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+cache = Namespace('room', alias='tiered')
+
+
+def cached_room_availability(search):
+    """
+    room_availability of a parsed search. Identical searches within ROOM_SEARCH_CACHE_TIMEOUT
+    share one result, computed once (see remember); booking rechecks the rooms.
+    """
+    search_key = hashlib.sha256(json.dumps(search, sort_keys=True, default=str).encode()).hexdigest()
+    return cache.remember(
+        f'availability:{search_key}',
+        lambda: room_availability(search, lambda rooms: RoomSerializer(rooms, many=True).data),
+        settings.ROOM_SEARCH_CACHE_TIMEOUT,
+    )
+
 
-class RoomViewSet(viewsets.ViewSet):
+class RoomViewSet(HotelManagerMixin, viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [ScopedCacheRateThrottle]
+    throttle_scopes = {'list': 'room_search'}
 
     @swagger_auto_schema(
         operation_description="Get available rooms in a city for given dates and room preferences",
@@ -22,6 +45,10 @@ class RoomViewSet(viewsets.ViewSet):
             required=['city', 'check_in_date', 'check_out_date', 'rooms'],
             properties={
                 'city': openapi.Schema(type=openapi.TYPE_STRING),
+                'facilities_all': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                                 description="Hotel must have all of these facilities"),
+                'facilities_any': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                                 description="Hotel must have at least one of these facilities"),
                 'check_in_date': openapi.Schema(type=openapi.TYPE_STRING, format='date'),
                 'check_out_date': openapi.Schema(type=openapi.TYPE_STRING, format='date'),
                 'rooms': openapi.Schema(
@@ -44,84 +71,12 @@ class RoomViewSet(viewsets.ViewSet):
     def list(self, request):
 
         try:
-            data = request.data
-            city = data.get('city')
-            check_in_date = data.get('check_in_date')
-            check_out_date = data.get('check_out_date')
-            rooms = data.get('rooms', [])
-            if not rooms:
-                return Response(
-                    {"error": "At least one room must be specified"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            if not city:
-                return Response(
-                    {"error": "city is required"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            if not check_in_date or not check_out_date:
-                return Response(
-                    {"error": "Both check_in_date and check_out_date are required"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
             try:
-                check_in = datetime.strptime(check_in_date, '%Y-%m-%d').date()
-                check_out = datetime.strptime(check_out_date, '%Y-%m-%d').date()
-
-                if check_in >= check_out:
-                    return Response(
-                        {"error": "check_out_date must be after check_in_date"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            except ValueError:
-                return Response(
-                    {"error": "Invalid date format. Use YYYY-MM-DD"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            all_rooms = Room.objects.filter(hotel__location__istartswith=city)
-            conflicting_rooms = Reservation.objects.filter(
-                Q(check_in_date__lt=check_out) & Q(check_out_date__gt=check_in),
-                status='confirmed'
-            ).values_list('room_id', flat=True)
-            available_rooms = all_rooms.exclude(id__in=conflicting_rooms)
-            response_data = {
-                'available_rooms': {},
-                'unavailable_types': []
-            }
-            for room in rooms:
-                room_type = room.get('type_of_room')
-                passengers = room.get('number_of_passengers')
-                room_count = room.get('number_of_rooms')
-
-                if not all([room_type ,passengers, room_count]):
-                    return Response(
-                        {"error": "Each room must have room type ,passengers and count"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                type_rooms = available_rooms.filter(room_type=room_type)
-                available_count = type_rooms.count()
-
-                if available_count >= room_count:
-                    rooms_to_book = type_rooms[:room_count]
-                    response_data['available_rooms'][room_type] = {
-                        'available': True,
-                        'count': available_count,
-                        'rooms': RoomSerializer(rooms_to_book, many=True).data,
-                        'passengers_per_room': passengers,
-                        'rooms_needed': room_count
-                    }
-                else:
-                    response_data['available_rooms'][room_type] = {
-                        'available': False,
-                        'count': available_count,
-                        'rooms_needed': room_count
-                    }
-                    response_data['unavailable_types'].append(room_type)
-
-
+                search = parse_availability_request(request.data)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+            response_data = cached_room_availability(search)
             return Response(
                 {"data": response_data},
                 status=status.HTTP_200_OK
@@ -143,13 +98,9 @@ class RoomViewSet(viewsets.ViewSet):
         """Create a new room for a hotel"""
         try:
             # Verify the requesting user is the hotel manager
-            user_email = request.user
             hotel_id = request.data.get('hotel')
 
-            if not Hotel.objects.filter(
-                    id=hotel_id,
-                    hotel_manager__user__email=user_email
-            ).exists():
+            if not self.owns_hotel(hotel_id):
                 return Response(
                     {"error": "You don't have permission to add rooms to this hotel"},
                     status=status.HTTP_403_FORBIDDEN
@@ -212,10 +163,7 @@ class RoomViewSet(viewsets.ViewSet):
             room = Room.objects.get(pk=request.data.get("room_id"))
 
             # Verify the requesting user is the hotel manager
-            if not Hotel.objects.filter(
-                    id=room.hotel.id,
-                    hotel_manager__user__email=request.user
-            ).exists():
+            if not self.owns_hotel(room.hotel_id):
                 return Response(
                     {"error": "You don't have permission to update this room"},
                     status=status.HTTP_403_FORBIDDEN
@@ -248,10 +196,7 @@ class RoomViewSet(viewsets.ViewSet):
             room = Room.objects.get(pk=pk)
 
             # Verify the requesting user is the hotel manager
-            if not Hotel.objects.filter(
-                    id=room.hotel.id,
-                    hotel_manager__user__email=request.user
-            ).exists():
+            if not self.owns_hotel(room.hotel_id):
                 return Response(
                     {"error": "You don't have permission to delete this room"},
                     status=status.HTTP_403_FORBIDDEN
@@ -269,7 +214,7 @@ class RoomViewSet(viewsets.ViewSet):
             )
 
 
-class RoomDiscountViewSet(viewsets.ViewSet):
+class RoomDiscountViewSet(HotelManagerMixin, viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
@@ -289,10 +234,7 @@ class RoomDiscountViewSet(viewsets.ViewSet):
             room = Room.objects.get(pk=pk)
 
             # Verify the requesting user is the hotel manager
-            if not Hotel.objects.filter(
-                    id=room.hotel.id,
-                    hotel_manager__user__email=request.user
-            ).exists():
+            if not self.owns_hotel(room.hotel_id):
                 return Response(
                     {"error": "You don't have permission to modify this room"},
                     status=status.HTTP_403_FORBIDDEN
@@ -337,10 +279,7 @@ class RoomDiscountViewSet(viewsets.ViewSet):
             room = Room.objects.get(pk=pk)
 
             # Verify the requesting user is the hotel manager
-            if not Hotel.objects.filter(
-                    id=room.hotel.id,
-                    hotel_manager__user__email=request.user
-            ).exists():
+            if not self.owns_hotel(room.hotel_id):
                 return Response(
                     {"error": "You don't have permission to modify this room"},
                     status=status.HTTP_403_FORBIDDEN
@@ -357,3 +296,22 @@ class RoomDiscountViewSet(viewsets.ViewSet):
                 {"error": "Room not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
+
+
+@async_api_view(['POST'], throttle_scope='room_search')
+async def room_list_async(request):
+    """RoomViewSet.list for ASGI deployments, sharing its cached results"""
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return {"error": "Malformed JSON body"}, status.HTTP_400_BAD_REQUEST
+    if not isinstance(data, dict):
+        return {"error": "Malformed JSON body"}, status.HTTP_400_BAD_REQUEST
+    try:
+        search = parse_availability_request(data)
+    except ValueError as e:
+        return {"error": str(e)}, status.HTTP_400_BAD_REQUEST
+
+    # remember() may wait for another worker's result, which must not block the event loop
+    response_data = await sync_to_async(cached_room_availability)(search)
+    return {"data": response_data}, status.HTTP_200_OK